@@ -1,4 +1,5 @@
 # Cấu hình chung cho bot
+from utils.realm_registry import RealmRegistry, MajorRealmTable
 
 # Cấu hình Discord
 BOT_PREFIX = "!"
@@ -10,16 +11,52 @@ USERS_COLLECTION = "users"
 SECTS_COLLECTION = "sects"
 ITEMS_COLLECTION = "items"
 MONSTERS_COLLECTION = "monsters"
+VOICE_SESSIONS_COLLECTION = "voice_sessions"
+AUCTIONS_COLLECTION = "auctions"
+WORLD_BOSSES_COLLECTION = "world_bosses"
+WORLD_BOSS_DAMAGE_COLLECTION = "world_boss_damage"
+MONGO_MAX_POOL_SIZE = 100  # Số kết nối tối đa trong pool
+MONGO_MIN_POOL_SIZE = 5  # Số kết nối luôn giữ sẵn
+MONGO_MAX_IDLE_TIME_MS = 60000  # Đóng kết nối rảnh sau 60 giây
+MONGO_SERVER_SELECTION_TIMEOUT_MS = 5000  # Thời gian chờ tìm server
+MONGO_OPERATION_TIMEOUT_MS = 5000  # Thời gian chờ mặc định cho mỗi truy vấn
+USER_CACHE_MAX_ENTRIES = 5000  # Số người dùng tối đa giữ trong cache
+USER_CACHE_TTL = 60  # Thời gian sống của một mục cache (giây)
+USER_CACHE_MAX_BYTES = 32 * 1024 * 1024  # Dung lượng tối đa của cache (ước lượng theo BSON)
+MIGRATIONS_COLLECTION = "migrations"  # Lưu tiến độ chuyển đổi schema
+MIGRATION_BATCH_SIZE = 500  # Số document mỗi lô khi chuyển đổi schema
 
 # Cấu hình hệ thống Tu Luyện
 EXP_PER_MESSAGE = 1  # Kinh nghiệm nhận được từ mỗi tin nhắn
 EXP_PER_MINUTE_VOICE = 2  # Kinh nghiệm nhận được mỗi phút voice chat
 VOICE_CHECK_INTERVAL = 60  # Kiểm tra voice chat mỗi 60 giây
+EXP_FLUSH_INTERVAL = 15  # Ghi kinh nghiệm tích lũy vào database mỗi 15 giây
+EXP_FLUSH_THRESHOLD = 500  # Ghi ngay khi bộ đệm có từ 500 người dùng trở lên
+EXP_BATCH_HISTORY = 20  # Số mã lô cộng kinh nghiệm gần nhất lưu trong mỗi người dùng (chống cộng trùng khi ghi lại)
+ANNOUNCE_CONCURRENCY = 5  # Số thông báo đột phá được gửi cùng lúc
+CHAT_EXP_USER_RATE = 0.2  # Số tin nhắn được tính kinh nghiệm mỗi giây cho mỗi người (1 tin/5 giây)
+CHAT_EXP_USER_BURST = 5  # Số tin nhắn liên tiếp tối đa được tính cho mỗi người
+CHAT_EXP_CHANNEL_RATE = 5  # Số tin nhắn được tính kinh nghiệm mỗi giây cho mỗi kênh
+CHAT_EXP_CHANNEL_BURST = 30  # Số tin nhắn liên tiếp tối đa được tính cho mỗi kênh
+CHAT_EXP_FILTER_CONTENT = True  # Bỏ qua tin nhắn trùng lặp hoặc vô nghĩa
+CHAT_EXP_DUPLICATE_WINDOW = 5  # Số tin nhắn gần nhất dùng để phát hiện trùng lặp
+CHAT_EXP_MIN_ENTROPY = 1.0  # Entropy tối thiểu (bit/ký tự) của tin nhắn dài
 
 # Cấu hình hệ thống Combat
 COMBAT_COOLDOWN = 1800  # 30 phút (tính bằng giây)
 DANHQUAI_COOLDOWN = 600  # 10 phút (tính bằng giây)
 DANHBOSS_COOLDOWN = 900  # 15 phút (tính bằng giây)
+COMBAT_MAX_ROUNDS = 100  # Số lượt tối đa của một trận đấu
+COMBAT_MAX_FRAMES = 3  # Số lần cập nhật tin nhắn tối đa khi phát lại trận đấu (chưa tính kết quả)
+COMBAT_FRAME_DELAY = 1.5  # Thời gian giữa hai khung hình (giây)
+
+# Cấu hình dịch vụ thời gian hồi
+COOLDOWN_CACHE_MAX_USERS = 50000  # Số người dùng tối đa giữ thời gian hồi trong bộ nhớ
+COOLDOWN_FLUSH_DELAY = 2.0  # Thời gian gom các lần ghi mốc thời gian trước khi ghi xuống database (giây)
+
+# Cấu hình cập nhật tin nhắn trực tiếp (trận đấu, động phủ)
+LIVE_MESSAGE_MAX_EDITS = 4  # Số lần sửa tin nhắn tối đa trong mỗi cửa sổ, theo từng kênh
+LIVE_MESSAGE_WINDOW = 5.0  # Độ dài cửa sổ (giây)
 
 # Cấu hình phần thưởng
 QUAI_MIN_REWARD = 5  # Linh thạch tối thiểu từ đánh quái
@@ -27,6 +64,67 @@ QUAI_MAX_REWARD = 20  # Linh thạch tối đa từ đánh quái
 BOSS_MIN_REWARD = 50  # Linh thạch tối thiểu từ đánh boss
 BOSS_MAX_REWARD = 200  # Linh thạch tối đa từ đánh boss
 COMBAT_WIN_REWARD = 30  # Linh thạch khi thắng PvP
+QUAI_EXP_PER_LEVEL = 20  # Kinh nghiệm theo cấp quái vật
+BOSS_EXP_PER_LEVEL = 50  # Kinh nghiệm theo cấp boss
+
+# Danh sách quái vật của !danhquai
+COMBAT_MONSTERS = [
+    {"name": "Yêu Lang", "level": 1, "health": 100, "attack": 15, "defense": 5},
+    {"name": "Hắc Hổ", "level": 2, "health": 150, "attack": 25, "defense": 10},
+    {"name": "Độc Xà", "level": 3, "health": 200, "attack": 30, "defense": 15},
+    {"name": "Thiết Giáp Thú", "level": 4, "health": 250, "attack": 35, "defense": 25},
+    {"name": "U Linh", "level": 5, "health": 300, "attack": 40, "defense": 20},
+    {"name": "Hỏa Kỳ Lân", "level": 6, "health": 350, "attack": 50, "defense": 30},
+    {"name": "Bạch Cốt Ma", "level": 7, "health": 400, "attack": 60, "defense": 35},
+    {"name": "Thâm Hải Chi Long", "level": 8, "health": 500, "attack": 70, "defense": 40},
+    {"name": "Huyết Yêu", "level": 9, "health": 600, "attack": 80, "defense": 50},
+    {"name": "Thiên Ma", "level": 10, "health": 700, "attack": 90, "defense": 60}
+]
+
+# Danh sách boss của !danhboss
+COMBAT_BOSSES = [
+    {"name": "Hắc Long Vương", "level": 15, "health": 1000, "attack": 120, "defense": 80},
+    {"name": "Cửu Vĩ Yêu Hồ", "level": 18, "health": 1500, "attack": 150, "defense": 100},
+    {"name": "Ma Đế", "level": 20, "health": 2000, "attack": 180, "defense": 120},
+    {"name": "Tà Thần", "level": 25, "health": 3000, "attack": 250, "defense": 150},
+    {"name": "Thiên Ngoại Yêu Thi", "level": 30, "health": 5000, "attack": 350, "defense": 200}
+]
+
+# Tỷ lệ xuất hiện quái vật/boss
+SPAWN_DEFAULT_WEIGHT = 1.0  # Trọng số xuất hiện khi dữ liệu không có spawn_weight
+SPAWN_AREA_BONUS = 3.0  # Hệ số nhân trọng số cho quái vật thuộc khu vực người chơi đang ở
+
+# Vật phẩm rơi trong động phủ (mỗi phòng tối đa một vật phẩm)
+DUNGEON_ITEM_IDS = list(range(1, 11))  # ID các vật phẩm có thể rơi
+DUNGEON_MONSTER_ITEM_CHANCE = 0.3  # Cơ hội rơi vật phẩm khi đánh bại quái vật
+DUNGEON_TREASURE_ITEM_CHANCE = 0.5  # Cơ hội có vật phẩm trong rương (nhân theo chất lượng rương)
+
+# Dữ liệu game (data/*.json)
+GAME_DATA_DIR = "data"  # Thư mục chứa dữ liệu game
+GAME_DATA_CHECK_INTERVAL = 5  # Kiểm tra file dữ liệu thay đổi tối đa mỗi 5 giây
+GAME_DATA_SNAPSHOT = "data/game_data.snapshot"  # Snapshot biên dịch sẵn (python -m utils.game_data build)
+
+# Cấu hình boss thế giới (!bossthegioi, !tancong)
+WORLD_BOSS_HP_MULTIPLIER = 200  # Máu boss thế giới = máu boss trong data/bosses.json × hệ số
+WORLD_BOSS_PHASES = [{"hp_percent": 70, "phase": 2}, {"hp_percent": 30, "phase": 3}]  # Giai đoạn theo % máu
+WORLD_BOSS_PHASE_DEFENSE_BONUS = 0.25  # Phòng thủ của boss tăng thêm mỗi giai đoạn
+WORLD_BOSS_ATTACK_ROUNDS = 5  # Số đòn mỗi lần tấn công
+WORLD_BOSS_ATTACK_COOLDOWN = 60  # Thời gian hồi giữa hai lần tấn công (giây)
+WORLD_BOSS_BATCH_INTERVAL = 0.25  # Thời gian gom sát thương trước khi ghi xuống database (giây)
+WORLD_BOSS_DAMAGE_RETRIES = 3  # Số lần thử lại ghi sát thương người chơi sau khi đã trừ máu boss
+WORLD_BOSS_DAMAGE_BATCH_HISTORY = 20  # Số mã lô gần nhất lưu trong mỗi bản ghi sát thương (chống cộng trùng)
+WORLD_BOSS_EXP_REWARD = 20000  # Tổng kinh nghiệm chia theo sát thương
+WORLD_BOSS_LINH_THACH_REWARD = 10000  # Tổng linh thạch chia theo sát thương
+WORLD_BOSS_LAST_HIT_BONUS = 500  # Linh thạch thưởng thêm cho người ra đòn kết liễu
+WORLD_BOSS_CHECK_INTERVAL = 60  # Kiểm tra hồi sinh boss thế giới mỗi 60 giây
+
+# Chỉ số ban đầu của người chơi mới
+NEW_USER_STATS = {"health": 100, "attack": 10, "defense": 5}
+
+# Cấu hình săn quái hàng loạt (!sanquai)
+HUNT_TICKET_ITEM_ID = "hunt_ticket"  # Phù Săn Yêu, mỗi trận tiêu tốn một phù
+BATCH_HUNT_MAX = 50  # Số trận tối đa mỗi lần săn
+DAILY_HUNT_TICKETS = 3  # Số phù săn yêu nhận được khi điểm danh
 
 # Cấu hình điểm danh hàng ngày
 DAILY_REWARD = 50  # Linh thạch nhận được khi điểm danh
@@ -36,6 +134,7 @@ EMBED_COLOR = 0x3498db  # Màu xanh dương
 EMBED_COLOR_SUCCESS = 0x2ecc71  # Màu xanh lá
 EMBED_COLOR_ERROR = 0xe74c3c  # Màu đỏ
 EMBED_COLOR_WARNING = 0xf39c12  # Màu vàng
+DEFAULT_FOOTER = "Tu Tiên Bot"  # Footer mặc định của embed
 
 # Một số emoji hữu ích
 EMOJI_LINH_THACH = "💎"
@@ -86,24 +185,53 @@ CULTIVATION_REALMS = [
     {"id": 28, "name": "Diễn Chủ Vạn Giới", "exp_required": 15000000}
 ]
 
+# Mức cộng hệ số sức mạnh khi vượt qua mỗi cảnh giới: (id giới hạn, mức cộng)
+REALM_POWER_STEPS = [
+    (10, 0.2),  # Luyện Khí
+    (13, 0.5),  # Trúc Cơ
+    (16, 1.0),  # Kim Đan
+    (19, 2.0),  # Nguyên Anh
+    (22, 3.0),  # Hóa Thần
+    (25, 5.0),  # Luyện Hư
+    (28, 8.0),  # Đại Thừa
+    (None, 15.0)  # Diễn Chủ Vạn Giới
+]
+
+# Đại cảnh giới của mô hình User / Monster (theo thứ tự)
+# base_exp: kinh nghiệm tầng 1 khi lên cảnh giới nhờ tu luyện, breakthrough_exp: khi lên nhờ đột phá
+MAJOR_REALM_LIST = [
+    {"name": "Luyện Khí", "max_level": 9, "base_exp": 200, "breakthrough_exp": 100, "tribulation": False,
+     "stat_multiplier": 1.0, "bonus_stones": 0, "exp_per_minute": 1},
+    {"name": "Trúc Cơ", "max_level": 9, "base_exp": 500, "breakthrough_exp": 200, "tribulation": False,
+     "stat_multiplier": 1.5, "bonus_stones": 1000, "exp_per_minute": 2},
+    {"name": "Kim Đan", "max_level": 9, "base_exp": 1000, "breakthrough_exp": 500, "tribulation": True,
+     "stat_multiplier": 2.0, "bonus_stones": 5000, "exp_per_minute": 4},
+    {"name": "Nguyên Anh", "max_level": 9, "base_exp": 2000, "breakthrough_exp": 1000, "tribulation": True,
+     "stat_multiplier": 3.0, "bonus_stones": 20000, "exp_per_minute": 8},
+    {"name": "Hóa Thần", "max_level": 9, "base_exp": 5000, "breakthrough_exp": 2000, "tribulation": True,
+     "stat_multiplier": 5.0, "bonus_stones": 50000, "exp_per_minute": 16},
+    {"name": "Luyện Hư", "max_level": 9, "base_exp": 10000, "breakthrough_exp": 5000, "tribulation": True,
+     "stat_multiplier": 8.0, "bonus_stones": 100000, "exp_per_minute": 32},
+    {"name": "Hợp Thể", "max_level": 9, "base_exp": 20000, "breakthrough_exp": 10000, "tribulation": True,
+     "stat_multiplier": 12.0, "bonus_stones": 500000, "exp_per_minute": 64},
+    {"name": "Đại Thừa", "max_level": 9, "base_exp": 50000, "breakthrough_exp": 20000, "tribulation": True,
+     "stat_multiplier": 20.0, "bonus_stones": 1000000, "exp_per_minute": 128},
+    {"name": "Độ Kiếp", "max_level": 9, "base_exp": 100000, "breakthrough_exp": 50000, "tribulation": True,
+     "stat_multiplier": 30.0, "bonus_stones": 5000000, "exp_per_minute": 256},
+    {"name": "Tiên Nhân", "max_level": 9, "base_exp": 200000, "breakthrough_exp": 100000, "tribulation": False,
+     "stat_multiplier": 50.0, "bonus_stones": 10000000, "exp_per_minute": 512}
+]
+
+# Bảng tra cảnh giới dựng sẵn (dùng thay cho việc duyệt CULTIVATION_REALMS)
+REALMS = RealmRegistry(CULTIVATION_REALMS, REALM_POWER_STEPS)
+MAJOR_REALMS = MajorRealmTable(MAJOR_REALM_LIST)
+
+
 # Hệ số sức mạnh theo cảnh giới
 def get_power_multiplier(realm_id):
-    base_multiplier = 1.0
-    for i in range(realm_id):
-        if i < 10:  # Luyện Khí
-            base_multiplier += 0.2
-        elif i < 13:  # Trúc Cơ
-            base_multiplier += 0.5
-        elif i < 16:  # Kim Đan
-            base_multiplier += 1.0
-        elif i < 19:  # Nguyên Anh
-            base_multiplier += 2.0
-        elif i < 22:  # Hóa Thần
-            base_multiplier += 3.0
-        elif i < 25:  # Luyện Hư
-            base_multiplier += 5.0
-        elif i < 28:  # Đại Thừa
-            base_multiplier += 8.0
-        else:  # Diễn Chủ Vạn Giới
-            base_multiplier += 15.0
-    return base_multiplier
\ No newline at end of file
+    return REALMS.power_multiplier(realm_id)
+
+
+# Xác định cảnh giới tương ứng với lượng kinh nghiệm
+def get_realm_id_for_exp(experience):
+    return REALMS.id_for_exp(experience)
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import uuid
+from typing import Dict, List, Optional, Set, Tuple
+
+from database.mongo_handler import bulk_inc_user_exp, check_exp_promotions
+
+# Cấu hình logging
+logger = logging.getLogger("tutien-bot.exp_buffer")
+
+
+class ExpBuffer:
+    """Bộ đệm ghi sau (write-behind) cộng dồn kinh nghiệm theo từng người dùng"""
+
+    def __init__(self, flush_threshold: int):
+        self.flush_threshold = flush_threshold
+        self.pending: Dict[int, int] = {}  # {user_id: kinh nghiệm chưa ghi}
+        self.usernames: Dict[int, str] = {}  # {user_id: tên} dùng khi tạo người dùng mới
+        self.unchecked: Set[int] = set()  # Người đã được cộng kinh nghiệm nhưng chưa kiểm tra đột phá
+        # Các lô (batch_id, {user_id: kinh nghiệm}, {user_id: tên}) không rõ đã được ghi hay chưa,
+        # được gửi lại nguyên vẹn với cùng batch_id để server bỏ qua phần đã cộng
+        self.retries: List[Tuple[str, Dict[int, int], Dict[int, str]]] = []
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def add(self, user_id: int, exp_amount: int, username: Optional[str] = None) -> bool:
+        """Cộng dồn kinh nghiệm vào bộ đệm, trả về True nếu đã đến ngưỡng cần ghi"""
+        self.pending[user_id] = self.pending.get(user_id, 0) + exp_amount
+        if username:
+            self.usernames[user_id] = username
+        return len(self.pending) >= self.flush_threshold
+
+    def retry_batch(self, batch_id: str, grants: Dict[int, int], usernames: Optional[Dict[int, str]] = None):
+        """Giữ lại một lô có kết quả ghi không rõ để lần flush sau gửi lại với cùng batch_id"""
+        self.retries.append((batch_id, dict(grants), dict(usernames or {})))
+
+    async def flush(self) -> List[Tuple[int, int, int]]:
+        """Ghi toàn bộ kinh nghiệm đang chờ bằng bulk_write, trả về danh sách đột phá"""
+        async with self._lock:
+            if not self.pending and not self.unchecked and not self.retries:
+                return []
+
+            # Gửi lại các lô chưa rõ kết quả trước, rồi mới đến kinh nghiệm mới
+            batches, self.retries = self.retries, []
+            if self.pending:
+                # Lấy dữ liệu ra khỏi bộ đệm, tin nhắn mới sẽ cộng vào bộ đệm trống
+                batches.append((uuid.uuid4().hex, self.pending, self.usernames))
+                self.pending, self.usernames = {}, {}
+
+            for batch_id, grants, usernames in batches:
+                try:
+                    failed = await bulk_inc_user_exp(grants, usernames, batch_id)
+                except Exception as e:
+                    # Không rõ lô đã được ghi hay chưa (ví dụ hết thời gian chờ sau khi server đã ghi):
+                    # giữ nguyên lô và batch_id để gửi lại, không trộn vào bộ đệm tránh cộng trùng
+                    self.retries.append((batch_id, grants, usernames))
+                    logger.error(f"Lỗi khi ghi {len(grants)} kinh nghiệm tích lũy, sẽ gửi lại lô {batch_id}: {e}")
+                    continue
+
+                # Các thao tác bị từ chối chắc chắn chưa được ghi, trả lại bộ đệm
+                for user_id, exp_amount in failed.items():
+                    self.add(user_id, exp_amount, usernames.get(user_id))
+
+                # Kinh nghiệm đã ghi thì chỉ cần kiểm tra lại đột phá nếu lần này lỗi
+                self.unchecked.update(user_id for user_id in grants if user_id not in failed)
+
+            if not self.unchecked:
+                return []
+
+            checking, self.unchecked = self.unchecked, set()
+            try:
+                return await check_exp_promotions(checking)
+            except Exception as e:
+                self.unchecked |= checking
+                logger.error(f"Lỗi khi kiểm tra đột phá cho {len(checking)} người dùng: {e}")
+                return []
@@ -0,0 +1,120 @@
+import logging
+from typing import Dict, List, Optional, Tuple, Any
+
+from pymongo import IndexModel
+
+# Cấu hình logging
+logger = logging.getLogger("tutien-bot.indexes")
+
+# Danh sách index đã khai báo
+# [{"collection": tên, "keys": [(trường, hướng)], "options": {...}, "probe": {"filter": ..., "sort": ...}}]
+INDEX_REGISTRY: List[Dict[str, Any]] = []
+
+
+def declare_index(collection: str, keys: List[Tuple[str, int]], probe: Optional[Dict[str, Any]] = None,
+                  **options) -> Dict[str, Any]:
+    """
+    Khai báo một index, đặt ngay cạnh truy vấn cần dùng nó
+
+    probe: truy vấn mẫu {"filter": ..., "sort": ...} dùng để kiểm tra bằng explain()
+    options: các tùy chọn của create_index (unique, sparse, name, ...)
+    """
+    spec = {"collection": collection, "keys": list(keys), "options": options, "probe": probe}
+
+    # Bỏ qua khai báo trùng (module được tải lại)
+    for existing in INDEX_REGISTRY:
+        if existing["collection"] == collection and existing["keys"] == spec["keys"]:
+            return existing
+
+    INDEX_REGISTRY.append(spec)
+    return spec
+
+
+def _normalize_keys(keys) -> List[Tuple[str, Any]]:
+    """Chuẩn hóa khóa index để so sánh (1.0 và 1 là như nhau)"""
+    return [(field, int(direction) if isinstance(direction, (int, float)) else direction)
+            for field, direction in keys]
+
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """
+    Đối chiếu index đã khai báo với database: tạo index còn thiếu, báo cáo index thừa
+
+    Trả về {"created": [...], "undeclared": [...], "unused": [...]}
+    """
+    report = {"created": [], "undeclared": [], "unused": []}
+
+    # Gom khai báo theo collection
+    by_collection: Dict[str, List[Dict[str, Any]]] = {}
+    for spec in INDEX_REGISTRY:
+        by_collection.setdefault(spec["collection"], []).append(spec)
+
+    for collection_name, specs in by_collection.items():
+        collection = db[collection_name]
+        existing = await collection.index_information()
+        existing_keys = {name: _normalize_keys(info["key"]) for name, info in existing.items()}
+
+        # Tạo các index còn thiếu
+        missing = [spec for spec in specs if _normalize_keys(spec["keys"]) not in existing_keys.values()]
+        if missing:
+            names = await collection.create_indexes(
+                [IndexModel(spec["keys"], **spec["options"]) for spec in missing]
+            )
+            report["created"].extend(f"{collection_name}.{name}" for name in names)
+            logger.info(f"Đã tạo {len(names)} index cho {collection_name}: {', '.join(names)}")
+
+        # Index có trong database nhưng không được khai báo
+        declared_keys = [_normalize_keys(spec["keys"]) for spec in specs]
+        for name, keys in existing_keys.items():
+            if name != "_id_" and keys not in declared_keys:
+                report["undeclared"].append(f"{collection_name}.{name}")
+                logger.warning(f"Index {collection_name}.{name} không được khai báo trong code")
+
+        # Index chưa từng được dùng kể từ lần khởi động server gần nhất
+        try:
+            async for stats in collection.aggregate([{"$indexStats": {}}]):
+                if stats["name"] != "_id_" and stats.get("accesses", {}).get("ops", 0) == 0:
+                    report["unused"].append(f"{collection_name}.{stats['name']}")
+        except Exception as e:
+            logger.debug(f"Không lấy được $indexStats cho {collection_name}: {e}")
+
+    if report["unused"]:
+        logger.info(f"Index chưa được sử dụng: {', '.join(report['unused'])}")
+
+    return report
+
+
+def _plan_stages(plan: Dict[str, Any]):
+    """Duyệt đệ quy các stage trong query plan"""
+    if not plan:
+        return
+    yield plan.get("stage")
+    if "inputStage" in plan:
+        yield from _plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+
+async def check_query_plans(db) -> List[str]:
+    """Chạy explain() cho các truy vấn mẫu, trả về danh sách truy vấn bị COLLSCAN"""
+    offenders = []
+
+    for spec in INDEX_REGISTRY:
+        probe = spec["probe"]
+        if probe is None:
+            continue
+
+        cursor = db[spec["collection"]].find(probe.get("filter", {})).limit(probe.get("limit", 10))
+        if probe.get("sort"):
+            cursor = cursor.sort(probe["sort"])
+
+        explain = await cursor.explain()
+        winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+        # Engine SBE bọc plan trong "queryPlan"
+        winning_plan = winning_plan.get("queryPlan", winning_plan)
+
+        if "COLLSCAN" in _plan_stages(winning_plan):
+            offenders.append(f"{spec['collection']} {probe}")
+            logger.error(f"Truy vấn {spec['collection']} {probe} đang quét toàn bộ collection (COLLSCAN)")
+
+    return offenders
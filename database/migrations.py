@@ -0,0 +1,248 @@
+"""
+Chuyển đổi schema document người dùng theo phiên bản
+
+Mỗi migration có một số phiên bản; document đã chuyển được đánh dấu `schema_version`.
+Runner đọc theo lô (sắp xếp theo _id), ghi mỗi lô bằng một bulk_write và lưu vị trí đã
+xử lý vào collection `migrations`, nên có thể dừng giữa chừng rồi chạy lại để tiếp tục.
+Chỉ điều kiện `schema_version` quyết định document nào cần chuyển: migration đã hoàn tất
+vẫn được chạy lại để chuyển các người dùng tạo sau đó (create_user vẫn ghi cấu trúc phẳng).
+
+Lưu ý: các module tu luyện, chiến đấu, điểm danh vẫn đọc các trường phẳng; chỉ chạy thật
+migration 1 sau khi các module này đã chuyển sang đọc trường lồng nhau.
+
+Chạy thử (không ghi gì):     python -m database.migrations --dry-run
+Chạy thật:                  python -m database.migrations [--target 1] [--batch-size 500]
+"""
+import argparse
+import asyncio
+import datetime
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Any
+
+from pymongo import UpdateOne
+
+from database.mongo_handler import get_database, user_cache
+from config import USERS_COLLECTION, MIGRATIONS_COLLECTION, MIGRATION_BATCH_SIZE
+
+# Cấu hình logging
+logger = logging.getLogger("tutien-bot.migrations")
+
+
+class Migration:
+    """Một bước chuyển đổi document người dùng lên phiên bản `version`"""
+
+    def __init__(self, version: int, name: str, transform: Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]):
+        self.version = version
+        self.name = name
+        self.transform = transform  # document -> lệnh cập nhật ({"$set": ..., "$unset": ...}) hoặc None
+
+    @property
+    def key(self) -> str:
+        return f"users_v{self.version}_{self.name}"
+
+
+# Danh sách migration theo thứ tự phiên bản
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, name: str):
+    """Đăng ký một hàm chuyển đổi làm migration"""
+
+    def decorator(transform):
+        MIGRATIONS.append(Migration(version, name, transform))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return transform
+
+    return decorator
+
+
+# Vị trí mới của các trường phẳng cũ (do create_user tạo) trong mô hình User
+FLAT_TO_NESTED = {
+    "experience": "cultivation.exp",
+    "realm_id": "cultivation.realm_id",
+    "linh_thach": "resources.spirit_stones",
+    "health": "stats.hp",
+    "attack": "stats.attack",
+    "defense": "stats.defense",
+    "sect_id": "sect.sect_id",
+    "daily_streak": "activities.daily_streak",
+    "last_daily": "activities.last_daily",
+    "last_combat": "activities.cooldowns.pvp",
+    "last_danhquai": "activities.cooldowns.hunt",
+    "last_danhboss": "activities.cooldowns.boss",
+}
+
+
+def _get_path(document: Dict[str, Any], path: str):
+    """Lấy giá trị theo đường dẫn có dấu chấm, trả về (có tồn tại, giá trị)"""
+    value = document
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return False, None
+        value = value[key]
+    return True, value
+
+
+def _set_path(target: Dict[str, Any], path: str, value: Any) -> None:
+    """Gán giá trị theo đường dẫn có dấu chấm, tạo dict trung gian nếu thiếu"""
+    keys = path.split(".")
+    for key in keys[:-1]:
+        target = target.setdefault(key, {})
+    target[keys[-1]] = value
+
+
+@migration(1, "flat_to_nested")
+def flat_to_nested(document: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Chuyển các trường phẳng sang cấu trúc lồng nhau của mô hình User"""
+    set_fields = {}
+    unset_fields = {}
+    # Các nhóm cấp cao nhất chưa tồn tại (hoặc không phải dict) được ghi nguyên khối
+    new_groups: Dict[str, Dict[str, Any]] = {}
+
+    for flat_field, nested_path in FLAT_TO_NESTED.items():
+        if flat_field not in document:
+            continue
+        unset_fields[flat_field] = ""
+
+        # Giá trị lồng nhau đã có thì được giữ nguyên
+        exists, _ = _get_path(document, nested_path)
+        if exists:
+            continue
+
+        group, rest = nested_path.split(".", 1)
+        if isinstance(document.get(group), dict):
+            set_fields[nested_path] = document[flat_field]
+        else:
+            _set_path(new_groups.setdefault(group, {}), rest, document[flat_field])
+
+    set_fields.update(new_groups)
+
+    # Kho đồ cũ là một danh sách, kho đồ mới là dict chứa danh sách items
+    if isinstance(document.get("inventory"), list):
+        set_fields["inventory"] = {"capacity": 50, "items": document["inventory"], "equipped": {}}
+
+    if not set_fields and not unset_fields:
+        return None
+
+    update = {}
+    if set_fields:
+        update["$set"] = set_fields
+    if unset_fields:
+        update["$unset"] = unset_fields
+    return update
+
+
+async def run_migration(db, migration: Migration, batch_size: int = MIGRATION_BATCH_SIZE,
+                        dry_run: bool = False,
+                        progress: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Dict[str, Any]:
+    """
+    Chạy một migration theo lô, tiếp tục từ vị trí đã lưu nếu lần trước bị dừng
+
+    progress: hàm nhận báo cáo tiến độ sau mỗi lô
+    """
+    users = db[USERS_COLLECTION]
+    state_collection = db[MIGRATIONS_COLLECTION]
+
+    state = await state_collection.find_one({"_id": migration.key}) or {}
+
+    # Document chưa lên phiên bản này (kể cả chưa có schema_version)
+    pending = {"schema_version": {"$not": {"$gte": migration.version}}}
+    total = await users.count_documents(pending)
+
+    report = {
+        "migration": migration.key,
+        "dry_run": dry_run,
+        "total": total,
+        "processed": 0,
+        "modified": 0,
+        "sample": None
+    }
+    last_id = None if dry_run else state.get("last_id")
+    start = time.perf_counter()
+
+    while True:
+        query = dict(pending)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = await users.find(query).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            break
+
+        operations = []
+        for document in batch:
+            update = migration.transform(document) or {}
+            update.setdefault("$set", {})["schema_version"] = migration.version
+            if report["sample"] is None:
+                report["sample"] = {"user_id": document.get("user_id"), "update": update}
+            operations.append(UpdateOne({"_id": document["_id"], **pending}, update))
+
+        last_id = batch[-1]["_id"]
+        report["processed"] += len(batch)
+
+        if dry_run:
+            report["modified"] += len(operations)
+        else:
+            result = await users.bulk_write(operations, ordered=False)
+            report["modified"] += result.modified_count
+
+            # Lưu vị trí đã xử lý để có thể tiếp tục
+            await state_collection.update_one(
+                {"_id": migration.key},
+                {
+                    "$set": {"version": migration.version, "last_id": last_id},
+                    "$inc": {"processed": len(batch), "modified": result.modified_count},
+                    "$setOnInsert": {"started_at": datetime.datetime.utcnow()}
+                },
+                upsert=True
+            )
+
+        elapsed = time.perf_counter() - start
+        report["rate"] = report["processed"] / elapsed if elapsed > 0 else 0.0
+        logger.info(f"[{migration.key}] {report['processed']}/{total} document "
+                    f"({report['rate']:.0f}/giây){' (chạy thử)' if dry_run else ''}")
+        if progress:
+            progress(dict(report))
+
+    if not dry_run:
+        # Xóa vị trí đã lưu: lần chạy sau quét lại từ đầu theo điều kiện pending,
+        # vì người dùng mới tạo có thể mang _id nhỏ hơn vị trí cũ
+        await state_collection.update_one(
+            {"_id": migration.key},
+            {"$set": {"completed_at": datetime.datetime.utcnow()}, "$unset": {"last_id": ""}},
+            upsert=True
+        )
+        # Document trong cache vẫn mang cấu trúc cũ
+        user_cache.clear()
+
+    return report
+
+
+async def run_migrations(db, target: Optional[int] = None, batch_size: int = MIGRATION_BATCH_SIZE,
+                         dry_run: bool = False,
+                         progress: Optional[Callable[[Dict[str, Any]], Any]] = None) -> List[Dict[str, Any]]:
+    """Chạy lần lượt các migration đến phiên bản `target` (mặc định là mới nhất)"""
+    reports = []
+    for migration in MIGRATIONS:
+        if target is not None and migration.version > target:
+            break
+        reports.append(await run_migration(db, migration, batch_size, dry_run, progress))
+    return reports
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Chuyển đổi schema document người dùng")
+    parser.add_argument("--dry-run", action="store_true", help="Chỉ đếm và in ví dụ, không ghi vào database")
+    parser.add_argument("--target", type=int, default=None, help="Phiên bản đích (mặc định: mới nhất)")
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE, help="Số document mỗi lô")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    reports = await run_migrations(get_database(), args.target, args.batch_size, args.dry_run)
+    for report in reports:
+        logger.info(f"Kết quả: {report}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,7 +1,6 @@
-from .user_model import UserModel
-from .sect_model import SectModel
-from .item_model import ItemModel
-from .monster_model import MonsterModel
-from .quest_model import QuestModel  # Thêm dòng này
+from .user_model import User
+from .sect_model import Sect
+from .item_model import Item
+from .monster_model import Monster, Boss
 
-__all__ = ['UserModel', 'SectModel', 'ItemModel', 'MonsterModel', 'QuestModel']
\ No newline at end of file
+__all__ = ['User', 'Sect', 'Item', 'Monster', 'Boss']
@@ -2,6 +2,9 @@
 from typing import Dict, List, Optional, Union, Any
 from enum import Enum
 
+from config import MAJOR_REALMS
+from utils.loot_table import LootTable
+
 
 class MonsterType(Enum):
     BEAST = "beast"
@@ -104,6 +107,8 @@ class Monster:
 
         # Phần thưởng
         self.drops = []
+        self._loot_table = None  # Bảng rơi đã biên dịch, tạo lại khi nội dung drops thay đổi
+        self._loot_key = None
 
         # Kinh nghiệm và linh thạch khi đánh bại
         self.exp_reward = 10
@@ -207,16 +212,13 @@ class Monster:
 
     def scale_to_realm(self, target_realm: str, target_realm_level: int = 1) -> None:
         """Điều chỉnh chỉ số theo cảnh giới"""
-        realm_levels = ["Luyện Khí", "Trúc Cơ", "Kim Đan", "Nguyên Anh", "Hóa Thần", "Luyện Hư", "Hợp Thể", "Đại Thừa",
-                        "Độ Kiếp", "Tiên Nhân"]
-
         # Kiểm tra cảnh giới hợp lệ
-        if target_realm not in realm_levels:
+        if target_realm not in MAJOR_REALMS:
             return
 
         # Tính chỉ số tăng dựa trên cảnh giới
-        current_realm_index = realm_levels.index(self.realm)
-        target_realm_index = realm_levels.index(target_realm)
+        current_realm_index = MAJOR_REALMS.index(self.realm, 0)
+        target_realm_index = MAJOR_REALMS.index(target_realm)
 
         # Nếu cùng cảnh giới, chỉ điều chỉnh theo tiểu cảnh giới
         if current_realm_index == target_realm_index:
@@ -272,43 +274,26 @@ class Monster:
         )
 
         # Điều chỉnh theo cấp độ và cảnh giới
-        realm_bonus = {
-            "Luyện Khí": 1,
-            "Trúc Cơ": 2,
-            "Kim Đan": 4,
-            "Nguyên Anh": 8,
-            "Hóa Thần": 16,
-            "Luyện Hư": 32,
-            "Hợp Thể": 64,
-            "Đại Thừa": 128,
-            "Độ Kiếp": 256,
-            "Tiên Nhân": 512
-        }
-
-        power *= realm_bonus.get(self.realm, 1)
+        power *= MAJOR_REALMS.value(self.realm, "power_bonus", 1)
         power *= (0.9 + 0.1 * self.realm_level)
 
         return int(power)
 
-    def get_random_drops(self) -> List[Dict[str, Any]]:
-        """Tính toán vật phẩm rơi ra dựa trên tỷ lệ"""
-        import random
-
-        result = []
-
-        for drop in self.drops:
-            # Kiểm tra xem có rơi ra không
-            if random.random() <= drop["chance"]:
-                # Tính số lượng
-                quantity = random.randint(drop["min_quantity"], drop["max_quantity"])
-
-                if quantity > 0:
-                    result.append({
-                        "item_id": drop["item_id"],
-                        "quantity": quantity
-                    })
+    def get_loot_table(self) -> LootTable:
+        """Bảng rơi đã biên dịch (chỉ biên dịch lại khi nội dung drops thay đổi)"""
+        # Khóa theo nội dung để bắt cả sửa trực tiếp (vd: drops[0]["chance"] = 0.5), không chỉ gán lại danh sách
+        key = repr(self.drops)
+        if self._loot_table is None or self._loot_key != key:
+            self._loot_table = LootTable(self.drops)
+            self._loot_key = key
+        return self._loot_table
 
-        return result
+    def get_random_drops(self, kills: int = 1, pity: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+        """Tính toán vật phẩm rơi ra dựa trên tỷ lệ (cộng dồn cho `kills` lần đánh bại)"""
+        return [
+            {"item_id": item_id, "quantity": quantity}
+            for item_id, quantity in self.get_loot_table().roll(kills, pity).items()
+        ]
 
 
 class Boss(Monster):
@@ -451,7 +436,8 @@ class Boss(Monster):
         """Xác định giai đoạn hiện tại dựa trên phần trăm máu"""
         current_phase = 1
 
-        for trigger in sorted(self.phase_triggers, key=lambda x: x["hp_percent"], reverse=True):
+        # Ngưỡng thấp nhất mà máu đã xuống tới quyết định giai đoạn
+        for trigger in sorted(self.phase_triggers, key=lambda x: x["hp_percent"]):
             if current_hp_percent <= trigger["hp_percent"]:
                 current_phase = trigger["phase"]
                 break
@@ -2,6 +2,8 @@
 import datetime
 from typing import Dict, List, Optional, Union, Any
 
+from config import MAJOR_REALMS
+
 
 class Sect:
     """Mô hình môn phái trong hệ thống Tu Tiên"""
@@ -669,11 +671,8 @@ class Sect:
         requirements = self.settings["join_requirement"]
 
         # Kiểm tra cảnh giới
-        realm_levels = ["Luyện Khí", "Trúc Cơ", "Kim Đan", "Nguyên Anh", "Hóa Thần", "Luyện Hư", "Hợp Thể", "Đại Thừa",
-                        "Độ Kiếp", "Tiên Nhân"]
-        min_realm_index = realm_levels.index(requirements["min_realm"]) if requirements[
-                                                                               "min_realm"] in realm_levels else -1
-        user_realm_index = realm_levels.index(user_realm) if user_realm in realm_levels else -1
+        min_realm_index = MAJOR_REALMS.index(requirements["min_realm"], -1)
+        user_realm_index = MAJOR_REALMS.index(user_realm, -1)
 
         if user_realm_index < min_realm_index:
             return False
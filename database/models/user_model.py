@@ -1,7 +1,11 @@
 # database/models/user_model.py
+import copy
 import datetime
 from typing import Dict, List, Optional, Union, Any
 
+from config import MAJOR_REALMS
+from utils.game_data import game_data
+
 
 class User:
     """Mô hình người dùng trong hệ thống Tu Tiên"""
@@ -253,6 +257,15 @@ class User:
             "sect_invites": True  # Cho phép lời mời môn phái
         }
 
+        # Bản chụp dữ liệu lúc tải từ MongoDB, dùng để tính các trường đã thay đổi
+        # None nghĩa là người dùng mới, chưa có trong database
+        self._original: Optional[Dict[str, Any]] = None
+
+        # Chỉ mục kho đồ trong bộ nhớ (không lưu vào database), dựng lại khi inventory["items"] bị thay thế
+        self._item_index: Dict[tuple, Dict[str, Any]] = {}  # {(item_id, bound): phần tử trong inventory["items"]}
+        self._item_total = 0  # Tổng số lượng vật phẩm trong kho
+        self._item_index_source: Optional[List[Dict[str, Any]]] = None
+
     def to_dict(self) -> Dict[str, Any]:
         """Chuyển đổi đối tượng thành dictionary để lưu vào MongoDB"""
         return {
@@ -290,69 +303,173 @@ class User:
         user.activities = data.get("activities", user.activities)
         user.stats_record = data.get("stats_record", user.stats_record)
         user.settings = data.get("settings", user.settings)
+        user._original = {key: copy.deepcopy(data[key]) for key in user.to_dict() if key in data}
         return user
 
+    def mark_clean(self) -> None:
+        """Đánh dấu dữ liệu hiện tại đã được lưu vào database"""
+        self._original = copy.deepcopy(self.to_dict())
+
+    def get_changes(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Tính lệnh cập nhật tối thiểu cho các trường đã thay đổi kể từ lần tải/lưu gần nhất
+
+        Số nguyên thay đổi được ghi bằng $inc (không ghi đè thay đổi đồng thời của lệnh khác),
+        danh sách chỉ thêm phần tử mới được ghi bằng $push, còn lại dùng $set/$unset.
+        Trả về {} nếu không có gì thay đổi.
+        """
+        current = self.to_dict()
+        if self._original is None:
+            return {"$set": current}
+
+        changes = {"$set": {}, "$inc": {}, "$push": {}, "$unset": {}}
+        for key, value in current.items():
+            if key == "user_id":
+                continue
+            if key not in self._original:
+                changes["$set"][key] = value
+            else:
+                self._diff(key, self._original[key], value, changes)
+
+        return {op: fields for op, fields in changes.items() if fields}
+
+    @classmethod
+    def _diff(cls, path: str, old: Any, new: Any, changes: Dict[str, Dict[str, Any]]) -> None:
+        """So sánh đệ quy một trường và ghi thao tác cập nhật tương ứng vào changes"""
+        if isinstance(old, dict) and isinstance(new, dict):
+            # Khóa có "." hoặc "$" không dùng được trong đường dẫn, ghi lại cả dict
+            if any(not isinstance(key, str) or "." in key or key.startswith("$") for key in new.keys() | old.keys()):
+                if old != new:
+                    changes["$set"][path] = new
+                return
+
+            for key, value in new.items():
+                if key not in old:
+                    changes["$set"][f"{path}.{key}"] = value
+                else:
+                    cls._diff(f"{path}.{key}", old[key], value, changes)
+            for key in old.keys() - new.keys():
+                changes["$unset"][f"{path}.{key}"] = ""
+            return
+
+        if old == new and type(old) is type(new):
+            return
+
+        if type(old) is int and type(new) is int:
+            changes["$inc"][path] = new - old
+        elif isinstance(old, list) and isinstance(new, list) and len(new) > len(old) and new[:len(old)] == old:
+            changes["$push"][path] = {"$each": new[len(old):]}
+        else:
+            changes["$set"][path] = new
+
+    def _inventory_index(self) -> Dict[tuple, Dict[str, Any]]:
+        """
+        Chỉ mục (item_id, bound) -> phần tử trong inventory["items"]
+
+        Danh sách vẫn là dữ liệu gốc (lưu vào database, giữ thứ tự cho các lệnh theo số thứ tự);
+        chỉ mục trỏ tới chính các phần tử đó nên cập nhật số lượng không cần duyệt danh sách.
+        """
+        items = self.inventory["items"]
+        if self._item_index_source is not items:
+            # Dựng lại sau khi tải từ database, gộp các dòng trùng (item_id, bound) vào dòng đầu tiên
+            index = {}
+            total = 0
+            merged = []
+            for item in items:
+                item["bound"] = bool(item.get("bound", False))
+                key = (item["item_id"], item["bound"])
+                total += item["quantity"]
+                if key in index:
+                    index[key]["quantity"] += item["quantity"]
+                else:
+                    index[key] = item
+                    merged.append(item)
+            if len(merged) != len(items):
+                items[:] = merged
+
+            self._item_index = index
+            self._item_total = total
+            self._item_index_source = items
+        return self._item_index
+
+    def _drop_inventory_entry(self, key: tuple) -> None:
+        """Xóa dòng đã hết số lượng khỏi danh sách (giữ thứ tự các dòng còn lại)"""
+        entry = self._item_index.pop(key)
+        items = self.inventory["items"]
+        for i, item in enumerate(items):
+            if item is entry:
+                del items[i]
+                break
+
+    @property
+    def item_count(self) -> int:
+        """Tổng số lượng vật phẩm trong kho đồ"""
+        self._inventory_index()
+        return self._item_total
+
     def add_item(self, item_id: str, quantity: int = 1, bound: bool = False) -> bool:
         """Thêm vật phẩm vào kho đồ"""
+        index = self._inventory_index()
+
         # Kiểm tra sức chứa kho đồ
-        current_items = sum(item["quantity"] for item in self.inventory["items"])
-        if current_items + quantity > self.inventory["capacity"]:
+        if self._item_total + quantity > self.inventory["capacity"]:
             return False
 
-        # Kiểm tra xem đã có vật phẩm này chưa và có cùng trạng thái khóa không
-        for item in self.inventory["items"]:
-            if item["item_id"] == item_id and item["bound"] == bound:
-                item["quantity"] += quantity
-                return True
+        # Cộng vào dòng có cùng vật phẩm và trạng thái khóa, nếu chưa có thì thêm mới
+        key = (item_id, bool(bound))
+        item = index.get(key)
+        if item is not None:
+            item["quantity"] += quantity
+        else:
+            item = {"item_id": item_id, "quantity": quantity, "bound": bool(bound)}
+            self.inventory["items"].append(item)
+            index[key] = item
 
-        # Nếu chưa có, thêm mới
-        self.inventory["items"].append({"item_id": item_id, "quantity": quantity, "bound": bound})
+        self._item_total += quantity
+        return True
+
+    def add_items(self, items: Dict[str, int], bound: bool = False) -> bool:
+        """Thêm nhiều vật phẩm ({item_id: số lượng}), không thêm gì nếu kho đồ không đủ chỗ"""
+        self._inventory_index()
+        if self._item_total + sum(items.values()) > self.inventory["capacity"]:
+            return False
+
+        for item_id, quantity in items.items():
+            self.add_item(item_id, quantity, bound)
         return True
 
     def remove_item(self, item_id: str, quantity: int = 1, bound: bool = None) -> bool:
         """Xóa vật phẩm khỏi kho đồ"""
-        # Nếu không chỉ định bound, ưu tiên xóa vật phẩm không khóa trước
-        if bound is None:
-            # Tìm vật phẩm không khóa
-            for i, item in enumerate(self.inventory["items"]):
-                if item["item_id"] == item_id and not item["bound"]:
-                    if item["quantity"] > quantity:
-                        item["quantity"] -= quantity
-                        return True
-                    elif item["quantity"] == quantity:
-                        self.inventory["items"].pop(i)
-                        return True
-                    else:
-                        remaining = quantity - item["quantity"]
-                        self.inventory["items"].pop(i)
-                        return self.remove_item(item_id, remaining, True)
-
-            # Nếu không có vật phẩm không khóa, xóa vật phẩm khóa
-            return self.remove_item(item_id, quantity, True)
-
-        # Xóa vật phẩm với trạng thái khóa cụ thể
-        for i, item in enumerate(self.inventory["items"]):
-            if item["item_id"] == item_id and item["bound"] == bound:
-                if item["quantity"] > quantity:
-                    item["quantity"] -= quantity
-                    return True
-                elif item["quantity"] == quantity:
-                    self.inventory["items"].pop(i)
-                    return True
-                else:
-                    return False
+        # Không đủ số lượng thì không xóa gì
+        if self.get_item_quantity(item_id, bound) < quantity:
+            return False
 
-        return False
+        # Nếu không chỉ định bound, ưu tiên xóa vật phẩm không khóa trước
+        index = self._item_index
+        keys = [(item_id, False), (item_id, True)] if bound is None else [(item_id, bool(bound))]
+        remaining = quantity
+        for key in keys:
+            item = index.get(key)
+            if item is None or remaining <= 0:
+                continue
+            taken = min(item["quantity"], remaining)
+            item["quantity"] -= taken
+            remaining -= taken
+            if item["quantity"] <= 0:
+                self._drop_inventory_entry(key)
+
+        self._item_total -= quantity
+        return True
 
     def has_item(self, item_id: str, quantity: int = 1, bound: bool = None) -> bool:
         """Kiểm tra xem có đủ vật phẩm không"""
-        total = 0
-        for item in self.inventory["items"]:
-            if item["item_id"] == item_id:
-                if bound is None or item["bound"] == bound:
-                    total += item["quantity"]
+        return self.get_item_quantity(item_id, bound) >= quantity
 
-        return total >= quantity
+    def get_item_quantity(self, item_id: str, bound: bool = None) -> int:
+        """Số lượng vật phẩm trong kho đồ (cả khóa và không khóa nếu không chỉ định bound)"""
+        index = self._inventory_index()
+        keys = [(item_id, False), (item_id, True)] if bound is None else [(item_id, bool(bound))]
+        return sum(index[key]["quantity"] for key in keys if key in index)
 
     def equip_item(self, item_id: str, slot: str) -> bool:
         """Trang bị vật phẩm"""
@@ -512,20 +629,7 @@ class User:
     def _update_stats_after_realm_advancement(self, new_realm: str) -> None:
         """Cập nhật chỉ số sau khi chuyển cảnh giới"""
         # Tăng mạnh các chỉ số khi chuyển cảnh giới
-        realm_multipliers = {
-            "Luyện Khí": 1.0,
-            "Trúc Cơ": 1.5,
-            "Kim Đan": 2.0,
-            "Nguyên Anh": 3.0,
-            "Hóa Thần": 5.0,
-            "Luyện Hư": 8.0,
-            "Hợp Thể": 12.0,
-            "Đại Thừa": 20.0,
-            "Độ Kiếp": 30.0,
-            "Tiên Nhân": 50.0
-        }
-
-        multiplier = realm_multipliers.get(new_realm, 1.0)
+        multiplier = MAJOR_REALMS.value(new_realm, "stat_multiplier", 1.0)
 
         # Tăng máu và linh lực tối đa
         self.stats["max_hp"] = int(self.stats["max_hp"] * multiplier)
@@ -544,49 +648,25 @@ class User:
         self.cultivation["dantian"]["capacity"] = int(self.cultivation["dantian"]["capacity"] * multiplier)
 
         # Tăng tài nguyên khi đạt cảnh giới mới
-        bonus_stones = {
-            "Trúc Cơ": 1000,
-            "Kim Đan": 5000,
-            "Nguyên Anh": 20000,
-            "Hóa Thần": 50000,
-            "Luyện Hư": 100000,
-            "Hợp Thể": 500000,
-            "Đại Thừa": 1000000,
-            "Độ Kiếp": 5000000,
-            "Tiên Nhân": 10000000
-        }
-
-        if new_realm in bonus_stones:
-            self.add_spirit_stones(bonus_stones[new_realm])
+        bonus_stones = MAJOR_REALMS.value(new_realm, "bonus_stones", 0)
+        if bonus_stones:
+            self.add_spirit_stones(bonus_stones)
 
     def _check_realm_advancement(self) -> Optional[Dict[str, Any]]:
         """Kiểm tra điều kiện chuyển cảnh giới"""
-        realm_data = {
-            "Luyện Khí": {"max_level": 9, "next": "Trúc Cơ", "base_exp": 200},
-            "Trúc Cơ": {"max_level": 9, "next": "Kim Đan", "base_exp": 500},
-            "Kim Đan": {"max_level": 9, "next": "Nguyên Anh", "base_exp": 1000},
-            "Nguyên Anh": {"max_level": 9, "next": "Hóa Thần", "base_exp": 2000},
-            "Hóa Thần": {"max_level": 9, "next": "Luyện Hư", "base_exp": 5000},
-            "Luyện Hư": {"max_level": 9, "next": "Hợp Thể", "base_exp": 10000},
-            "Hợp Thể": {"max_level": 9, "next": "Đại Thừa", "base_exp": 20000},
-            "Đại Thừa": {"max_level": 9, "next": "Độ Kiếp", "base_exp": 50000},
-            "Độ Kiếp": {"max_level": 9, "next": "Tiên Nhân", "base_exp": 100000},
-            "Tiên Nhân": {"max_level": 9, "next": None, "base_exp": 200000},
-        }
-
-        current_realm = self.cultivation["realm"]
+        realm = MAJOR_REALMS.get(self.cultivation["realm"])
         current_level = self.cultivation["realm_level"]
 
         # Kiểm tra xem có phải cảnh giới cao nhất không
-        if current_realm not in realm_data or realm_data[current_realm]["next"] is None:
+        if realm is None or realm["next"] is None:
             return None
 
         # Kiểm tra xem đã đạt đến tầng cao nhất của cảnh giới chưa
-        if current_level > realm_data[current_realm]["max_level"]:
-            next_realm = realm_data[current_realm]["next"]
+        if current_level > realm["max_level"]:
+            next_realm = realm["next"]
             return {
                 "name": next_realm,
-                "base_exp": realm_data[next_realm]["base_exp"]
+                "base_exp": MAJOR_REALMS.value(next_realm, "base_exp")
             }
 
         return None
@@ -608,29 +688,16 @@ class User:
             return result
 
         # Kiểm tra xem có đang ở cấp cao nhất của cảnh giới không
-        realm_data = {
-            "Luyện Khí": {"max_level": 9, "next": "Trúc Cơ", "tribulation": False},
-            "Trúc Cơ": {"max_level": 9, "next": "Kim Đan", "tribulation": False},
-            "Kim Đan": {"max_level": 9, "next": "Nguyên Anh", "tribulation": True},
-            "Nguyên Anh": {"max_level": 9, "next": "Hóa Thần", "tribulation": True},
-            "Hóa Thần": {"max_level": 9, "next": "Luyện Hư", "tribulation": True},
-            "Luyện Hư": {"max_level": 9, "next": "Hợp Thể", "tribulation": True},
-            "Hợp Thể": {"max_level": 9, "next": "Đại Thừa", "tribulation": True},
-            "Đại Thừa": {"max_level": 9, "next": "Độ Kiếp", "tribulation": True},
-            "Độ Kiếp": {"max_level": 9, "next": "Tiên Nhân", "tribulation": True},
-            "Tiên Nhân": {"max_level": 9, "next": None, "tribulation": False},
-        }
-
-        current_realm = self.cultivation["realm"]
+        realm = MAJOR_REALMS.get(self.cultivation["realm"])
         current_level = self.cultivation["realm_level"]
 
         # Cập nhật thời gian đột phá gần nhất
         self.cultivation["breakthrough"]["last_attempt"] = datetime.datetime.utcnow()
 
         # Nếu đang ở cấp cao nhất của cảnh giới, cần vượt qua thiên kiếp
-        if current_level >= realm_data[current_realm]["max_level"] and realm_data[current_realm]["next"] is not None:
+        if realm and current_level >= realm["max_level"] and realm["next"] is not None:
             # Kiểm tra xem cần vượt qua thiên kiếp không
-            if realm_data[current_realm]["tribulation"]:
+            if realm["tribulation"]:
                 result["tribulation"] = True
 
                 # Tính tỷ lệ thành công dựa trên căn cơ và kinh mạch
@@ -672,26 +739,13 @@ class User:
                     self.cultivation["breakthrough"]["tribulation"] += 1
 
                     # Chuyển cảnh giới
-                    next_realm = realm_data[current_realm]["next"]
+                    next_realm = realm["next"]
                     self.cultivation["realm"] = next_realm
                     self.cultivation["realm_level"] = 1
                     self.cultivation["exp"] = 0
 
                     # Cập nhật max_exp cho cảnh giới mới
-                    new_base_exp = {
-                        "Luyện Khí": 100,
-                        "Trúc Cơ": 200,
-                        "Kim Đan": 500,
-                        "Nguyên Anh": 1000,
-                        "Hóa Thần": 2000,
-                        "Luyện Hư": 5000,
-                        "Hợp Thể": 10000,
-                        "Đại Thừa": 20000,
-                        "Độ Kiếp": 50000,
-                        "Tiên Nhân": 100000,
-                    }
-
-                    self.cultivation["max_exp"] = new_base_exp.get(next_realm, 100)
+                    self.cultivation["max_exp"] = MAJOR_REALMS.value(next_realm, "breakthrough_exp", 100)
 
                     # Cập nhật chỉ số
                     self._update_stats_after_realm_advancement(next_realm)
@@ -715,26 +769,13 @@ class User:
                     result["message"] = "Bạn đã thất bại khi vượt qua thiên kiếp và bị thương nặng!"
             else:
                 # Không cần thiên kiếp, chuyển cảnh giới trực tiếp
-                next_realm = realm_data[current_realm]["next"]
+                next_realm = realm["next"]
                 self.cultivation["realm"] = next_realm
                 self.cultivation["realm_level"] = 1
                 self.cultivation["exp"] = 0
 
                 # Cập nhật max_exp cho cảnh giới mới
-                new_base_exp = {
-                    "Luyện Khí": 100,
-                    "Trúc Cơ": 200,
-                    "Kim Đan": 500,
-                    "Nguyên Anh": 1000,
-                    "Hóa Thần": 2000,
-                    "Luyện Hư": 5000,
-                    "Hợp Thể": 10000,
-                    "Đại Thừa": 20000,
-                    "Độ Kiếp": 50000,
-                    "Tiên Nhân": 100000,
-                }
-
-                self.cultivation["max_exp"] = new_base_exp.get(next_realm, 100)
+                self.cultivation["max_exp"] = MAJOR_REALMS.value(next_realm, "breakthrough_exp", 100)
 
                 # Cập nhật chỉ số
                 self._update_stats_after_realm_advancement(next_realm)
@@ -782,21 +823,8 @@ class User:
             return result
 
         # Tính toán kinh nghiệm nhận được
-        base_exp_per_minute = {
-            "Luyện Khí": 1,
-            "Trúc Cơ": 2,
-            "Kim Đan": 4,
-            "Nguyên Anh": 8,
-            "Hóa Thần": 16,
-            "Luyện Hư": 32,
-            "Hợp Thể": 64,
-            "Đại Thừa": 128,
-            "Độ Kiếp": 256,
-            "Tiên Nhân": 512,
-        }
-
         # Lấy kinh nghiệm cơ bản theo cảnh giới
-        base_exp = base_exp_per_minute.get(self.cultivation["realm"], 1)
+        base_exp = MAJOR_REALMS.value(self.cultivation["realm"], "exp_per_minute", 1)
 
         # Điều chỉnh theo công pháp tu luyện
         technique_bonus = 1.0
@@ -911,9 +939,7 @@ class User:
 
                 elif selected_event["type"] == "resource":
                     # Nhận linh thạch ngẫu nhiên
-                    stones = random.randint(10, 100) * (10 ** (
-                                ["Luyện Khí", "Trúc Cơ", "Kim Đan", "Nguyên Anh", "Hóa Thần", "Luyện Hư", "Hợp Thể",
-                                 "Đại Thừa", "Độ Kiếp", "Tiên Nhân"].index(self.cultivation["realm"]) // 2))
+                    stones = random.randint(10, 100) * (10 ** (MAJOR_REALMS.index(self.cultivation["realm"]) // 2))
                     self.add_spirit_stones(stones)
                     result["events"].append(f"Nhận được {stones} linh thạch!")
 
@@ -1190,15 +1216,12 @@ class User:
                     return result
 
         # Kiểm tra yêu cầu cảnh giới
-        realm_levels = ["Luyện Khí", "Trúc Cơ", "Kim Đan", "Nguyên Anh", "Hóa Thần", "Luyện Hư", "Hợp Thể", "Đại Thừa",
-                        "Độ Kiếp", "Tiên Nhân"]
         required_realm_index = technique_info["level"] - 1
-        current_realm_index = realm_levels.index(self.cultivation["realm"]) if self.cultivation[
-                                                                                   "realm"] in realm_levels else -1
+        current_realm_index = MAJOR_REALMS.index(self.cultivation["realm"], -1)
 
         if current_realm_index < required_realm_index:
             result[
-                "message"] = f"Cảnh giới không đủ để học công pháp này! Yêu cầu: {realm_levels[required_realm_index]}"
+                "message"] = f"Cảnh giới không đủ để học công pháp này! Yêu cầu: {MAJOR_REALMS.names[required_realm_index]}"
             return result
 
         # Xác định loại công pháp
@@ -1752,12 +1775,8 @@ class User:
 
         # Kiểm tra yêu cầu cảnh giới
         if "required_realm" in item_data and item_data["required_realm"]:
-            realm_levels = ["Luyện Khí", "Trúc Cơ", "Kim Đan", "Nguyên Anh", "Hóa Thần", "Luyện Hư", "Hợp Thể",
-                            "Đại Thừa", "Độ Kiếp", "Tiên Nhân"]
-            required_realm_index = realm_levels.index(item_data["required_realm"]) if item_data[
-                                                                                          "required_realm"] in realm_levels else -1
-            current_realm_index = realm_levels.index(self.cultivation["realm"]) if self.cultivation[
-                                                                                       "realm"] in realm_levels else -1
+            required_realm_index = MAJOR_REALMS.index(item_data["required_realm"], -1)
+            current_realm_index = MAJOR_REALMS.index(self.cultivation["realm"], -1)
 
             if current_realm_index < required_realm_index:
                 result[
@@ -1895,18 +1914,5 @@ class User:
         return result
 
     def _get_item_info(self, item_id: str) -> Optional[Dict[str, Any]]:
-        """Lấy thông tin vật phẩm (giả định)"""
-        # Trong thực tế, bạn sẽ truy vấn từ cơ sở dữ liệu hoặc từ một bộ dữ liệu tĩnh
-        # Đây chỉ là một ví dụ đơn giản
-        import json
-        import os
-
-        try:
-            with open(os.path.join("data", "items.json"), "r", encoding="utf-8") as f:
-                items_data = json.load(f)
-                if item_id in items_data:
-                    return items_data[item_id]
-        except Exception:
-            pass
-
-        return None
+        """Lấy thông tin vật phẩm từ dữ liệu game dùng chung"""
+        return game_data.items.get(item_id)
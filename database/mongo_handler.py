@@ -1,8 +1,24 @@
 import motor.motor_asyncio
+import datetime
 import os
 from dotenv import load_dotenv
 import logging
+import pymongo
+from pymongo import UpdateOne, ReturnDocument
+from typing import Dict, List, Optional, Any, AsyncIterator
 from config import MONGO_DB_NAME, USERS_COLLECTION, SECTS_COLLECTION, ITEMS_COLLECTION, MONSTERS_COLLECTION
+from config import VOICE_SESSIONS_COLLECTION, AUCTIONS_COLLECTION
+from config import WORLD_BOSSES_COLLECTION, WORLD_BOSS_DAMAGE_COLLECTION, WORLD_BOSS_DAMAGE_BATCH_HISTORY
+from config import EXP_BATCH_HISTORY
+from config import (
+    MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_OPERATION_TIMEOUT_MS,
+    USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL, USER_CACHE_MAX_BYTES
+)
+from config import REALMS, NEW_USER_STATS, HUNT_TICKET_ITEM_ID, get_realm_id_for_exp
+from database.indexes import declare_index, ensure_indexes, check_query_plans
+from database.user_cache import UserCache
+from database.user_views import view_projection, to_view
 
 # Cấu hình logging
 logger = logging.getLogger("tutien-bot.database")
@@ -20,19 +36,27 @@ users_collection = None
 sects_collection = None
 items_collection = None
 monsters_collection = None
+world_bosses_collection = None
+world_boss_damage_collection = None
 
+# Cache document người dùng, mọi hàm ghi vào users_collection đều phải cập nhật/xóa cache
+user_cache = UserCache(USER_CACHE_MAX_ENTRIES, USER_CACHE_TTL, USER_CACHE_MAX_BYTES)
 
-async def connect_to_mongodb():
-    """Kết nối đến MongoDB"""
-    global client, db, users_collection, sects_collection, items_collection, monsters_collection
 
-    try:
-        # Tạo client MongoDB
-        client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URI)
+def get_database():
+    """Lấy database dùng chung, tạo client (và pool kết nối) ở lần gọi đầu tiên"""
+    global client, db, users_collection, sects_collection, items_collection, monsters_collection
+    global world_bosses_collection, world_boss_damage_collection
 
-        # Kiểm tra kết nối
-        await client.admin.command('ping')
-        logger.info("Kết nối đến MongoDB thành công!")
+    if db is None:
+        # Motor chỉ mở kết nối khi có truy vấn đầu tiên nên có thể tạo client sớm
+        client = motor.motor_asyncio.AsyncIOMotorClient(
+            MONGO_URI,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+            serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS
+        )
 
         # Tạo/lấy database
         db = client[MONGO_DB_NAME]
@@ -42,10 +66,20 @@ async def connect_to_mongodb():
         sects_collection = db[SECTS_COLLECTION]
         items_collection = db[ITEMS_COLLECTION]
         monsters_collection = db[MONSTERS_COLLECTION]
+        world_bosses_collection = db[WORLD_BOSSES_COLLECTION]
+        world_boss_damage_collection = db[WORLD_BOSS_DAMAGE_COLLECTION]
+
+    return db
+
+
+async def connect_to_mongodb():
+    """Kết nối đến MongoDB"""
+    try:
+        get_database()
 
-        # Tạo index cho các collection
-        await users_collection.create_index("user_id", unique=True)
-        await sects_collection.create_index("sect_id", unique=True)
+        # Kiểm tra kết nối
+        await client.admin.command('ping')
+        logger.info("Kết nối đến MongoDB thành công!")
 
         return True
     except Exception as e:
@@ -53,23 +87,123 @@ async def connect_to_mongodb():
         return False
 
 
+async def sync_indexes():
+    """
+    Đồng bộ index đã khai báo (mọi khai báo nằm trong module này nên gọi được ngay sau khi kết nối)
+
+    Tạo index còn thiếu, báo cáo index thừa và kiểm tra bằng explain()
+    rằng không truy vấn mẫu nào phải quét toàn bộ collection.
+    """
+    try:
+        report = await ensure_indexes(get_database())
+        offenders = await check_query_plans(get_database())
+        return report, offenders
+    except Exception as e:
+        logger.error(f"Lỗi khi đồng bộ index: {e}")
+        return None, []
+
+
 # USERS COLLECTION OPERATIONS
+declare_index(USERS_COLLECTION, [("user_id", 1)], unique=True)
+
+# Index cho các bảng xếp hạng và tìm kiếm của các cog (khai báo tại đây để luôn được đăng ký,
+# kể cả khi cog tương ứng không tải được)
+# !xephang
+declare_index(USERS_COLLECTION, [("experience", -1)], probe={"sort": [("experience", -1)]})
+# !timkiem
+declare_index(USERS_COLLECTION, [("realm_id", 1), ("experience", -1)],
+              probe={"filter": {"realm_id": 0}, "sort": [("experience", -1)]})
+# !bangdiemdanh
+declare_index(USERS_COLLECTION, [("daily_streak", -1)], probe={"sort": [("daily_streak", -1)]})
+# !leaderboard
+declare_index(USERS_COLLECTION, [("resources.spirit_stones", -1)], probe={"sort": [("resources.spirit_stones", -1)]})
+declare_index(USERS_COLLECTION, [("resources.contribution", -1)], probe={"sort": [("resources.contribution", -1)]})
+declare_index(USERS_COLLECTION, [("resources.reputation", -1)], probe={"sort": [("resources.reputation", -1)]})
+declare_index(USERS_COLLECTION, [("social.pvp.points", -1)], probe={"sort": [("social.pvp.points", -1)]})
+
+# Phiên voice đang theo dõi (CultivationCog)
+declare_index(VOICE_SESSIONS_COLLECTION, [("user_id", 1)], unique=True)
+
+# Đấu giá (AuctionCog)
+declare_index(AUCTIONS_COLLECTION, [("auction_id", 1)], unique=True)
+declare_index(AUCTIONS_COLLECTION, [("status", 1), ("end_time", 1)],
+              probe={"filter": {"status": "active"}, "sort": [("end_time", 1)]})
+declare_index(AUCTIONS_COLLECTION, [("end_time", 1)], probe={"filter": {"end_time": {"$gt": datetime.datetime.min}}})
+declare_index(AUCTIONS_COLLECTION, [("seller_id", 1), ("end_time", -1)],
+              probe={"filter": {"seller_id": 0}, "sort": [("end_time", -1)]})
+declare_index(AUCTIONS_COLLECTION, [("bids.bidder_id", 1), ("end_time", -1)])
+
+
 async def get_user(user_id):
-    """Lấy thông tin người dùng từ database"""
-    return await users_collection.find_one({"user_id": user_id})
+    """Lấy thông tin người dùng (ưu tiên từ cache)"""
+    return await user_cache.get_or_load(user_id, lambda: users_collection.find_one({"user_id": user_id}))
 
 
-async def create_user(user_id, username):
-    """Tạo người dùng mới trong database"""
-    user_data = {
+async def get_users(user_ids, projection=None):
+    """Lấy nhiều người dùng bằng một truy vấn $in, trả về {user_id: document}"""
+    users = {}
+    missing = []
+    for user_id in dict.fromkeys(user_ids):
+        # Document đầy đủ trong cache chứa mọi trường của projection
+        cached = user_cache.get(user_id)
+        if cached is not None:
+            users[user_id] = cached
+        else:
+            missing.append(user_id)
+
+    if missing:
+        if projection is not None:
+            projection = {**projection, "user_id": 1}
+        async for user in users_collection.find({"user_id": {"$in": missing}}, projection):
+            users[user["user_id"]] = user
+
+    return users
+
+
+async def get_user_view(user_id, view):
+    """Lấy người dùng dưới dạng view, chỉ đọc các trường view cần (None nếu không tồn tại)"""
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return to_view(view, cached)
+    return to_view(view, await users_collection.find_one({"user_id": user_id}, view_projection(view)))
+
+
+async def find_user_views(view, filter=None, sort=None, limit=0):
+    """Lấy danh sách người dùng dưới dạng view (dùng cho bảng xếp hạng)"""
+    cursor = users_collection.find(filter or {}, view_projection(view), limit=limit)
+    if sort:
+        cursor = cursor.sort(sort)
+    return [to_view(view, user) async for user in cursor]
+
+
+def invalidate_user(user_id):
+    """Xóa người dùng khỏi cache sau khi ghi trực tiếp vào users_collection"""
+    user_cache.invalidate(user_id)
+
+
+def get_user_cache_stats():
+    """Thống kê cache người dùng"""
+    return user_cache.stats()
+
+
+async def delete_user(user_id):
+    """Xóa người dùng khỏi database"""
+    result = await users_collection.delete_one({"user_id": user_id})
+    user_cache.invalidate(user_id)
+    return result.deleted_count > 0
+
+
+def new_user_document(user_id, username):
+    """Tạo dữ liệu mặc định cho người dùng mới"""
+    return {
         "user_id": user_id,
         "username": username,
         "realm_id": 0,  # Phàm Nhân
         "experience": 0,
         "linh_thach": 100,  # Số linh thạch ban đầu
-        "health": 100,
-        "attack": 10,
-        "defense": 5,
+        "health": NEW_USER_STATS["health"],
+        "attack": NEW_USER_STATS["attack"],
+        "defense": NEW_USER_STATS["defense"],
         "sect_id": None,
         "inventory": [],
         "last_daily": None,
@@ -80,8 +214,14 @@ async def create_user(user_id, username):
         "updated_at": None  # Sẽ được MongoDB tự động thêm
     }
 
+
+async def create_user(user_id, username):
+    """Tạo người dùng mới trong database"""
+    user_data = new_user_document(user_id, username)
+
     # Thêm người dùng vào database
     result = await users_collection.insert_one(user_data)
+    user_cache.invalidate(user_id)
 
     # Trả về dữ liệu người dùng
     return await get_user(user_id)
@@ -93,6 +233,7 @@ async def update_user(user_id, update_data):
         {"user_id": user_id},
         {"$set": update_data}
     )
+    user_cache.invalidate(user_id)
     return result.modified_count > 0
 
 
@@ -102,15 +243,370 @@ async def add_user_exp(user_id, exp_amount):
         {"user_id": user_id},
         {"$inc": {"experience": exp_amount}}
     )
+    user_cache.invalidate(user_id)
     return result.modified_count > 0
 
 
+def realm_id_expression(exp_expression):
+    """Biểu thức aggregation tính realm_id từ kinh nghiệm (giống get_realm_id_for_exp)"""
+    return {
+        "$subtract": [
+            {"$size": {"$filter": {"input": REALMS.thresholds, "cond": {"$lte": ["$$this", exp_expression]}}}},
+            1
+        ]
+    }
+
+
+async def grant_user_exp(user_id, exp_amount, username=None):
+    """
+    Cộng kinh nghiệm và tính lại cảnh giới trong một lần find_one_and_update
+
+    Cảnh giới được tính ngay trên server nên hai lần cộng đồng thời không thể
+    cùng thấy cảnh giới cũ. Người dùng chưa tồn tại sẽ được tạo với dữ liệu mặc định.
+
+    Trả về: (realm_id cũ, realm_id mới)
+    """
+    pipeline = [
+        {"$set": {"experience": {"$add": [{"$ifNull": ["$experience", 0]}, exp_amount]}}},
+        # Chỉ thăng cảnh giới, không bao giờ hạ
+        {"$set": {"realm_id": {"$max": [{"$ifNull": ["$realm_id", 0]}, realm_id_expression("$experience")]}}}
+    ]
+
+    before = await users_collection.find_one_and_update(
+        {"user_id": user_id},
+        pipeline,
+        projection={"_id": 0, "experience": 1, "realm_id": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+
+    if before is None:
+        # Người dùng chưa tồn tại: upsert kèm các trường mặc định, chỉ chạy ở lần cộng đầu tiên
+        # ($literal để tên bắt đầu bằng "$" không bị hiểu sai, $$ROOT thắng nếu có lần tạo khác chen vào)
+        defaults = new_user_document(user_id, username or str(user_id))
+        before = await users_collection.find_one_and_update(
+            {"user_id": user_id},
+            [
+                {"$replaceRoot": {"newRoot": {"$mergeObjects": [
+                    {key: {"$literal": value} for key, value in defaults.items()},
+                    "$$ROOT"
+                ]}}}
+            ] + pipeline,
+            projection={"_id": 0, "experience": 1, "realm_id": 1},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+
+    # Tài liệu trước khi cập nhật, None nếu vừa được tạo mới
+    if before is None:
+        user_cache.invalidate(user_id)
+        before = {}
+    old_realm_id = before.get("realm_id", 0)
+    new_exp = before.get("experience", 0) + exp_amount
+    new_realm_id = max(old_realm_id, get_realm_id_for_exp(new_exp))
+
+    # Giá trị mới đã biết chắc nên cập nhật thẳng vào cache
+    user_cache.update_fields(user_id, {"experience": new_exp, "realm_id": new_realm_id})
+
+    return old_realm_id, new_realm_id
+
+
+def _slot_delta_expression(slots, item_id, delta, bound_field):
+    """
+    Biểu thức cộng/trừ số lượng một vật phẩm trên danh sách ô [{"item_id", "quantity"}]
+
+    Duyệt các ô không khóa theo thứ tự: số dương chỉ cộng vào ô đầu tiên, số âm trừ dần qua
+    từng ô cho đến khi đủ; không có ô nào thì thêm ô mới (bound_field: thêm "bound": False).
+    """
+    matches = {"$and": [
+        {"$eq": ["$$this.item_id", item_id]},
+        {"$ne": ["$$this.bound", True]},
+        {"$ne": ["$$value.remaining", 0]}
+    ]}
+    # Phần thay đổi của ô này: toàn bộ nếu cộng, không trừ quá số lượng đang có nếu trừ
+    change = {"$max": ["$$value.remaining", {"$multiply": [{"$ifNull": ["$$this.quantity", 0]}, -1]}]}
+    applied = {"$reduce": {
+        "input": slots,
+        "initialValue": {"slots": [], "remaining": delta},
+        "in": {"$cond": [
+            matches,
+            {
+                "slots": {"$concatArrays": ["$$value.slots", [{"$mergeObjects": [
+                    "$$this", {"quantity": {"$add": [{"$ifNull": ["$$this.quantity", 0]}, change]}}
+                ]}]]},
+                "remaining": {"$subtract": ["$$value.remaining", change]}
+            },
+            {"slots": {"$concatArrays": ["$$value.slots", ["$$this"]]}, "remaining": "$$value.remaining"}
+        ]}
+    }}
+
+    if delta <= 0:
+        return {"$let": {"vars": {"result": applied}, "in": "$$result.slots"}}
+
+    slot = {"item_id": item_id, "quantity": delta}
+    if bound_field:
+        slot["bound"] = False
+    return {"$let": {"vars": {"result": applied}, "in": {"$cond": [
+        {"$gt": ["$$result.remaining", 0]},
+        {"$concatArrays": ["$$result.slots", [slot]]},
+        "$$result.slots"
+    ]}}}
+
+
+def _slots_update_expression(slots, deltas, bound_field):
+    """
+    Biểu thức cộng/trừ số lượng trên một danh sách ô vật phẩm [{"item_id", "quantity"}]
+
+    Chỉ tác động lên các ô không khóa; bound_field: thêm "bound": False vào ô mới (kho đồ dạng User)
+    """
+    updated = {"$ifNull": [slots, []]}
+    for item_id, delta in deltas.items():
+        if delta:
+            updated = _slot_delta_expression(updated, item_id, delta, bound_field)
+
+    return {"$filter": {"input": updated, "cond": {"$gt": ["$$this.quantity", 0]}}}
+
+
+def inventory_update_expression(deltas):
+    """
+    Biểu thức aggregation cộng/trừ số lượng vật phẩm trong kho đồ
+
+    Hỗ trợ cả kho đồ dạng danh sách [{"item_id", "quantity"}] (document cũ) lẫn dạng
+    {"capacity", "items", "equipped"} của User/document đã chuyển đổi (ghi vào inventory.items).
+    deltas: {item_id: số lượng thay đổi}. Ô chưa có được thêm mới, ô về 0 bị xóa.
+    """
+    if not deltas:
+        return "$inventory"
+
+    return {"$cond": [
+        {"$eq": [{"$type": "$inventory"}, "object"]},
+        {"$mergeObjects": ["$inventory", {"items": _slots_update_expression("$inventory.items", deltas, True)}]},
+        _slots_update_expression("$inventory", deltas, False)
+    ]}
+
+
+def has_items_filter(item_id, quantity):
+    """
+    Bộ lọc người dùng có ít nhất quantity vật phẩm không khóa, cho cả hai dạng kho đồ
+
+    Cộng dồn mọi ô của vật phẩm như count_user_item, không đòi hỏi một ô đủ số lượng
+    """
+    slots = {"$cond": [{"$eq": [{"$type": "$inventory"}, "object"]}, "$inventory.items", "$inventory"]}
+    matching = {"$filter": {"input": {"$ifNull": [slots, []]}, "as": "slot", "cond": {"$and": [
+        {"$eq": ["$$slot.item_id", item_id]},
+        {"$ne": ["$$slot.bound", True]}
+    ]}}}
+    return {"$expr": {"$gte": [{"$sum": {"$map": {"input": matching, "in": "$$this.quantity"}}}, quantity]}}
+
+
+async def add_user_items(user_id, items, linh_thach=0):
+    """
+    Thêm vật phẩm vào kho đồ: items = {item_id: số lượng}
+
+    linh_thach: cộng thêm linh thạch trong cùng lần cập nhật
+    """
+    update = {"inventory": inventory_update_expression(items)}
+    if linh_thach:
+        update["linh_thach"] = {"$add": [{"$ifNull": ["$linh_thach", 0]}, linh_thach]}
+
+    result = await users_collection.update_one({"user_id": user_id}, [{"$set": update}])
+    user_cache.invalidate(user_id)
+    return result.modified_count > 0
+
+
+def count_user_item(user, item_id):
+    """Số lượng một vật phẩm không khóa trong kho đồ của document người dùng (cả hai dạng)"""
+    inventory = user.get("inventory")
+    if isinstance(inventory, dict):
+        inventory = inventory.get("items")
+    if not isinstance(inventory, list):
+        return 0
+    return sum(
+        slot.get("quantity", 0) for slot in inventory
+        if slot.get("item_id") == item_id and not slot.get("bound", False)
+    )
+
+
+async def apply_batch_hunt(user_id, tickets, exp_amount, linh_thach, drops, loot_pity=None):
+    """
+    Ghi kết quả săn quái hàng loạt trong một find_one_and_update
+
+    Trừ phù săn yêu, cộng kinh nghiệm, linh thạch, vật phẩm rơi và tính lại cảnh giới cùng lúc;
+    bộ lọc chỉ khớp khi người dùng còn đủ phù nên không thể dùng một phù hai lần.
+    loot_pity: số lần trượt liên tiếp của các vật phẩm có bảo hiểm {item_id: số lần}
+
+    Trả về: (realm_id cũ, realm_id mới), None nếu không còn đủ phù săn yêu
+    """
+    deltas = dict(drops)
+    deltas[HUNT_TICKET_ITEM_ID] = deltas.get(HUNT_TICKET_ITEM_ID, 0) - tickets
+
+    update = {
+        "experience": {"$add": [{"$ifNull": ["$experience", 0]}, exp_amount]},
+        "linh_thach": {"$add": [{"$ifNull": ["$linh_thach", 0]}, linh_thach]},
+        "inventory": inventory_update_expression(deltas)
+    }
+    if loot_pity is not None:
+        update["loot_pity"] = {"$literal": loot_pity}
+
+    before = await users_collection.find_one_and_update(
+        {"user_id": user_id, **has_items_filter(HUNT_TICKET_ITEM_ID, tickets)},
+        [
+            {"$set": update},
+            # Chỉ thăng cảnh giới, không bao giờ hạ
+            {"$set": {"realm_id": {"$max": [{"$ifNull": ["$realm_id", 0]}, realm_id_expression("$experience")]}}}
+        ],
+        projection={"_id": 0, "experience": 1, "realm_id": 1},
+        return_document=ReturnDocument.BEFORE
+    )
+    user_cache.invalidate(user_id)
+
+    if before is None:
+        return None
+
+    old_realm_id = before.get("realm_id", 0)
+    new_realm_id = max(old_realm_id, get_realm_id_for_exp(before.get("experience", 0) + exp_amount))
+    return old_realm_id, new_realm_id
+
+
+async def bulk_set_user_fields(updates):
+    """
+    Ghi các trường của nhiều người dùng bằng một lần bulk_write
+
+    updates: {user_id: {trường: giá trị}}
+    """
+    if not updates:
+        return
+
+    await users_collection.bulk_write(
+        [UpdateOne({"user_id": user_id}, {"$set": fields}) for user_id, fields in updates.items()],
+        ordered=False
+    )
+    for user_id in updates:
+        user_cache.invalidate(user_id)
+
+
+async def bulk_add_user_exp(exp_grants, usernames=None):
+    """
+    Cộng kinh nghiệm cho nhiều người dùng bằng một lần bulk_write
+
+    exp_grants: {user_id: kinh nghiệm}
+    usernames: {user_id: tên} dùng khi phải tạo người dùng mới
+
+    Trả về danh sách đột phá [(user_id, realm_id cũ, realm_id mới)]
+    """
+    failed = await bulk_inc_user_exp(exp_grants, usernames)
+    if failed:
+        logger.error(f"Không cộng được kinh nghiệm cho {len(failed)} người dùng: {failed}")
+    return await check_exp_promotions([user_id for user_id in exp_grants if user_id not in failed])
+
+
+async def bulk_inc_user_exp(exp_grants, usernames=None, batch_id=None):
+    """
+    Chỉ cộng kinh nghiệm (không kiểm tra đột phá) bằng một lần bulk_write
+
+    batch_id: mã lô được lưu vào người dùng, ghi lại cùng một lô nhiều lần chỉ được cộng một lần
+    nên có thể thử lại an toàn khi không rõ lần ghi trước đã thành công hay chưa.
+
+    Trả về {user_id: kinh nghiệm} của các thao tác bị lỗi, các thao tác còn lại đã được ghi
+    """
+    if not exp_grants:
+        return {}
+
+    usernames = usernames or {}
+
+    # Cộng kinh nghiệm, tạo người dùng mới nếu chưa tồn tại
+    remaining = dict(exp_grants)
+    for _ in range(2):
+        if not remaining:
+            return {}
+
+        user_ids = list(remaining)
+        operations = []
+        for user_id in user_ids:
+            defaults = new_user_document(user_id, usernames.get(user_id, str(user_id)))
+            del defaults["experience"]
+            query = {"user_id": user_id}
+            update = {"$inc": {"experience": remaining[user_id]}, "$setOnInsert": defaults}
+            if batch_id is not None:
+                query["exp_batches"] = {"$ne": batch_id}
+                update["$push"] = {"exp_batches": {"$each": [batch_id], "$slice": -EXP_BATCH_HISTORY}}
+            operations.append(UpdateOne(query, update, upsert=True))
+
+        try:
+            await users_collection.bulk_write(operations, ordered=False)
+            return {}
+        except pymongo.errors.BulkWriteError as e:
+            # ordered=False: các thao tác không nằm trong writeErrors đều đã được ghi
+            errors = e.details.get("writeErrors", [])
+            failed = {user_ids[error["index"]]: remaining[user_ids[error["index"]]]
+                      for error in errors if error.get("code") != 11000}
+            if failed:
+                logger.error(f"{len(failed)}/{len(operations)} thao tác cộng kinh nghiệm bị lỗi")
+                return failed
+            # Trùng khóa: lô đã được ghi, hoặc một tiến trình khác vừa tạo người dùng -> thử lại các thao tác này
+            remaining = {user_ids[error["index"]]: remaining[user_ids[error["index"]]] for error in errors}
+
+    if batch_id is None:
+        # Không có mã lô thì không phân biệt được, coi như chưa ghi
+        logger.error(f"{len(remaining)} thao tác cộng kinh nghiệm vẫn trùng khóa sau khi thử lại")
+        return remaining
+
+    # Vẫn trùng khóa khi người dùng đã tồn tại: người dùng đã chứa batch_id, lô này đã được cộng
+    return {}
+
+
+async def check_exp_promotions(user_ids):
+    """Kiểm tra và ghi đột phá cảnh giới cho các người dùng, trả về [(user_id, realm_id cũ, realm_id mới)]"""
+    if not user_ids:
+        return []
+
+    cursor = users_collection.find(
+        {"user_id": {"$in": list(user_ids)}},
+        {"_id": 0, "user_id": 1, "experience": 1, "realm_id": 1}
+    )
+
+    promotions = []
+    promote_operations = []
+    async for user in cursor:
+        old_realm_id = user.get("realm_id", 0)
+        new_realm_id = get_realm_id_for_exp(user.get("experience", 0))
+        user_cache.update_fields(user["user_id"], {
+            "experience": user.get("experience", 0),
+            "realm_id": max(old_realm_id, new_realm_id)
+        })
+        if new_realm_id > old_realm_id:
+            promotions.append((user["user_id"], old_realm_id, new_realm_id))
+            # Điều kiện $lt tránh hạ cảnh giới nếu có lần cập nhật khác chen vào
+            promote_operations.append(UpdateOne(
+                {"user_id": user["user_id"], "realm_id": {"$lt": new_realm_id}},
+                {"$set": {"realm_id": new_realm_id}}
+            ))
+
+    if promote_operations:
+        await users_collection.bulk_write(promote_operations, ordered=False)
+
+    return promotions
+
+
+async def bulk_add_user_linh_thach(grants):
+    """Cộng linh thạch cho nhiều người dùng bằng một lần bulk_write, grants: {user_id: linh thạch}"""
+    if not grants:
+        return
+
+    await users_collection.bulk_write(
+        [UpdateOne({"user_id": user_id}, {"$inc": {"linh_thach": amount}}) for user_id, amount in grants.items()],
+        ordered=False
+    )
+    for user_id in grants:
+        user_cache.invalidate(user_id)
+
+
 async def add_user_linh_thach(user_id, amount):
     """Thêm linh thạch cho người dùng"""
     result = await users_collection.update_one(
         {"user_id": user_id},
         {"$inc": {"linh_thach": amount}}
     )
+    user_cache.invalidate(user_id)
     return result.modified_count > 0
 
 
@@ -123,6 +619,9 @@ async def get_user_or_create(user_id, username):
 
 
 # SECTS COLLECTION OPERATIONS
+declare_index(SECTS_COLLECTION, [("sect_id", 1)], unique=True)
+
+
 async def get_sect(sect_id):
     """Lấy thông tin môn phái từ database"""
     return await sects_collection.find_one({"sect_id": sect_id})
@@ -182,4 +681,344 @@ async def remove_member_from_sect(sect_id, user_id):
         return True
     return False
 
-# Các hàm truy vấn khác có thể được thêm vào đây
\ No newline at end of file
+
+# WORLD BOSS COLLECTION OPERATIONS
+declare_index(WORLD_BOSSES_COLLECTION, [("raid_id", 1)], unique=True)
+declare_index(WORLD_BOSSES_COLLECTION, [("spawned_at", -1)], probe={"sort": [("spawned_at", -1)]})
+declare_index(WORLD_BOSS_DAMAGE_COLLECTION, [("raid_id", 1), ("user_id", 1)], unique=True)
+declare_index(WORLD_BOSS_DAMAGE_COLLECTION, [("raid_id", 1), ("damage", -1)],
+              probe={"filter": {"raid_id": "probe"}, "sort": [("damage", -1)]})
+
+
+async def create_world_boss(boss_document):
+    """Tạo boss thế giới mới, None nếu raid_id đã tồn tại (tiến trình khác vừa tạo)"""
+    try:
+        await world_bosses_collection.insert_one(boss_document)
+    except pymongo.errors.DuplicateKeyError:
+        return None
+    boss_document.pop("_id", None)
+    return boss_document
+
+
+async def get_latest_world_boss():
+    """Boss thế giới xuất hiện gần nhất (còn sống hoặc đã bị đánh bại)"""
+    return await world_bosses_collection.find_one({}, {"_id": 0}, sort=[("spawned_at", -1)])
+
+
+async def apply_world_boss_damage(raid_id, damage, hits):
+    """
+    Trừ máu boss thế giới bằng $inc (một lần cho cả lô sát thương)
+
+    Trả về {"stats.hp", "stats.max_hp", "phase"} sau khi trừ, None nếu boss đã bị đánh bại
+    """
+    return await world_bosses_collection.find_one_and_update(
+        {"raid_id": raid_id, "last_defeat": None},
+        {"$inc": {"stats.hp": -damage, "hits": hits}},
+        projection={"_id": 0, "stats.hp": 1, "stats.max_hp": 1, "phase": 1},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def advance_world_boss_phase(raid_id, phase):
+    """Chuyển boss sang giai đoạn mới; chỉ một lần gọi thành công cho mỗi giai đoạn"""
+    result = await world_bosses_collection.update_one(
+        {"raid_id": raid_id, "phase": {"$lt": phase}},
+        {"$set": {"phase": phase}}
+    )
+    return result.modified_count > 0
+
+
+async def mark_world_boss_defeated(raid_id, last_hit_user_id, defeated_at):
+    """Đánh dấu boss bị đánh bại; chỉ một lần gọi thành công (người gọi đó chia phần thưởng)"""
+    result = await world_bosses_collection.update_one(
+        {"raid_id": raid_id, "last_defeat": None, "stats.hp": {"$lte": 0}},
+        {"$set": {"last_defeat": defeated_at, "last_hit": last_hit_user_id}, "$inc": {"defeat_count": 1}}
+    )
+    return result.modified_count > 0
+
+
+async def add_world_boss_damage(raid_id, damages, batch_id):
+    """
+    Cộng dồn sát thương của từng người chơi, damages: {user_id: sát thương}
+
+    batch_id: mã lô được lưu vào bản ghi, ghi lại cùng một lô nhiều lần chỉ được cộng một lần
+    nên có thể thử lại an toàn khi không rõ lần ghi trước đã thành công hay chưa.
+    """
+    remaining = dict(damages)
+    for _ in range(2):
+        if not remaining:
+            return
+
+        user_ids = list(remaining)
+        try:
+            await world_boss_damage_collection.bulk_write(
+                [UpdateOne(
+                    {"raid_id": raid_id, "user_id": user_id, "batches": {"$ne": batch_id}},
+                    {"$inc": {"damage": remaining[user_id]},
+                     "$push": {"batches": {"$each": [batch_id], "$slice": -WORLD_BOSS_DAMAGE_BATCH_HISTORY}}},
+                    upsert=True
+                ) for user_id in user_ids],
+                ordered=False
+            )
+            return
+        except pymongo.errors.BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != 11000 for error in errors):
+                raise
+            # Trùng khóa: lô đã được ghi, hoặc một tiến trình khác vừa tạo bản ghi -> thử lại các thao tác này
+            remaining = {user_ids[error["index"]]: remaining[user_ids[error["index"]]] for error in errors}
+
+    # Vẫn trùng khóa khi bản ghi đã tồn tại: bản ghi đã chứa batch_id, lô này đã được cộng
+
+
+async def get_world_boss_damage(raid_id):
+    """Sát thương của mọi người chơi trong trận, giảm dần: [(user_id, sát thương)]"""
+    cursor = world_boss_damage_collection.find(
+        {"raid_id": raid_id}, {"_id": 0, "user_id": 1, "damage": 1}
+    ).sort([("damage", -1)])
+    return [(entry["user_id"], entry["damage"]) async for entry in cursor]
+
+
+class MongoHandler:
+    """
+    Lớp truy cập dữ liệu bất đồng bộ cho các cog
+
+    Mọi instance dùng chung một client motor (và pool kết nối) của module này,
+    nên mỗi cog có thể tạo MongoHandler() riêng mà không mở thêm kết nối.
+    Mỗi hàm nhận timeout_ms để giới hạn thời gian truy vấn, mặc định là
+    MONGO_OPERATION_TIMEOUT_MS.
+    """
+
+    def __init__(self, timeout_ms: int = MONGO_OPERATION_TIMEOUT_MS):
+        self.timeout_ms = timeout_ms
+
+    @property
+    def db(self):
+        return get_database()
+
+    def collection(self, name: str):
+        """Lấy collection theo tên"""
+        return self.db[name]
+
+    def _timeout(self, timeout_ms: Optional[int]):
+        """Ngữ cảnh giới hạn thời gian cho một thao tác (pymongo.timeout)"""
+        return pymongo.timeout((timeout_ms or self.timeout_ms) / 1000)
+
+    @staticmethod
+    def _filter_user_ids(filter: Optional[Dict[str, Any]]) -> Optional[List[int]]:
+        """Các user_id mà bộ lọc (hoặc document) có thể khớp, None nếu không xác định được"""
+        user_id = (filter or {}).get("user_id")
+        if isinstance(user_id, dict) and len(user_id) == 1:
+            if "$eq" in user_id:
+                user_id = user_id["$eq"]
+            elif "$in" in user_id and all(isinstance(value, int) for value in user_id["$in"]):
+                return list(user_id["$in"])
+        if isinstance(user_id, int):
+            return [user_id]
+        return None
+
+    @classmethod
+    def _invalidate(cls, collection: str, *filters: Optional[Dict[str, Any]]):
+        """Cập nhật cache người dùng sau khi ghi vào collection users"""
+        if collection != USERS_COLLECTION:
+            return
+        user_ids = []
+        for filter in filters or (None,):
+            ids = cls._filter_user_ids(filter)
+            if ids is None:
+                # Không biết chính xác người dùng nào bị ảnh hưởng
+                user_cache.clear()
+                return
+            user_ids.extend(ids)
+        for user_id in user_ids:
+            user_cache.invalidate(user_id)
+
+    # TRUY VẤN CƠ BẢN
+    async def find_one_async(self, collection: str, filter: Dict[str, Any], projection: Dict[str, Any] = None,
+                             timeout_ms: int = None, **kwargs) -> Optional[Dict[str, Any]]:
+        """Lấy một document"""
+        # Tra cứu người dùng theo user_id được phục vụ từ cache
+        if collection == USERS_COLLECTION and projection is None and not kwargs and list(filter) == ["user_id"]:
+            return await get_user(filter["user_id"])
+
+        with self._timeout(timeout_ms):
+            return await self.collection(collection).find_one(filter, projection, **kwargs)
+
+    async def find_async(self, collection: str, filter: Dict[str, Any] = None, projection: Dict[str, Any] = None,
+                         sort: List = None, limit: int = 0, skip: int = 0, batch_size: int = None,
+                         timeout_ms: int = None):
+        """Tạo cursor truy vấn, dùng `async for` hoặc `to_list` để đọc kết quả"""
+        cursor = self.collection(collection).find(filter or {}, projection, skip=skip, limit=limit)
+        if sort:
+            cursor = cursor.sort(sort)
+        if batch_size:
+            cursor = cursor.batch_size(batch_size)
+        return cursor.max_time_ms(timeout_ms or self.timeout_ms)
+
+    async def stream_async(self, collection: str, filter: Dict[str, Any] = None, projection: Dict[str, Any] = None,
+                           sort: List = None, batch_size: int = 500,
+                           timeout_ms: int = None) -> AsyncIterator[Dict[str, Any]]:
+        """Duyệt lần lượt từng document theo lô, không giữ toàn bộ kết quả trong bộ nhớ"""
+        cursor = await self.find_async(collection, filter, projection, sort=sort, batch_size=batch_size,
+                                       timeout_ms=timeout_ms)
+        async for document in cursor:
+            yield document
+
+    async def aggregate_async(self, collection: str, pipeline: List[Dict[str, Any]], allow_disk_use: bool = False,
+                              timeout_ms: int = None):
+        """Tạo cursor aggregation"""
+        return self.collection(collection).aggregate(
+            pipeline,
+            allowDiskUse=allow_disk_use,
+            maxTimeMS=timeout_ms or self.timeout_ms
+        )
+
+    async def count_documents_async(self, collection: str, filter: Dict[str, Any] = None,
+                                    timeout_ms: int = None) -> int:
+        """Đếm số document thỏa điều kiện"""
+        with self._timeout(timeout_ms):
+            return await self.collection(collection).count_documents(filter or {})
+
+    # GHI DỮ LIỆU
+    async def insert_one_async(self, collection: str, document: Dict[str, Any], timeout_ms: int = None):
+        """Thêm một document"""
+        with self._timeout(timeout_ms):
+            result = await self.collection(collection).insert_one(document)
+        self._invalidate(collection, document)
+        return result
+
+    async def insert_many_async(self, collection: str, documents: List[Dict[str, Any]], ordered: bool = False,
+                                timeout_ms: int = None):
+        """Thêm nhiều document"""
+        with self._timeout(timeout_ms):
+            result = await self.collection(collection).insert_many(documents, ordered=ordered)
+        self._invalidate(collection, *documents)
+        return result
+
+    async def update_one_async(self, collection: str, filter: Dict[str, Any], update, upsert: bool = False,
+                               array_filters: List[Dict[str, Any]] = None, timeout_ms: int = None):
+        """Cập nhật một document"""
+        with self._timeout(timeout_ms):
+            result = await self.collection(collection).update_one(filter, update, upsert=upsert,
+                                                                  array_filters=array_filters)
+        self._invalidate(collection, filter)
+        return result
+
+    async def update_many_async(self, collection: str, filter: Dict[str, Any], update, upsert: bool = False,
+                                timeout_ms: int = None):
+        """Cập nhật nhiều document"""
+        with self._timeout(timeout_ms):
+            result = await self.collection(collection).update_many(filter, update, upsert=upsert)
+        self._invalidate(collection, filter)
+        return result
+
+    async def find_one_and_update_async(self, collection: str, filter: Dict[str, Any], update,
+                                        projection: Dict[str, Any] = None, upsert: bool = False,
+                                        return_after: bool = True, timeout_ms: int = None):
+        """Cập nhật một document và trả về document (sau khi cập nhật nếu return_after)"""
+        with self._timeout(timeout_ms):
+            result = await self.collection(collection).find_one_and_update(
+                filter, update,
+                projection=projection,
+                upsert=upsert,
+                return_document=ReturnDocument.AFTER if return_after else ReturnDocument.BEFORE
+            )
+        self._invalidate(collection, filter)
+        return result
+
+    async def delete_one_async(self, collection: str, filter: Dict[str, Any], timeout_ms: int = None):
+        """Xóa một document"""
+        with self._timeout(timeout_ms):
+            result = await self.collection(collection).delete_one(filter)
+        self._invalidate(collection, filter)
+        return result
+
+    async def bulk_write_async(self, collection: str, operations: List, ordered: bool = False,
+                               user_ids: Optional[List[int]] = None, timeout_ms: int = None):
+        """
+        Thực hiện nhiều thao tác ghi trong một lần gửi, bỏ qua nếu danh sách rỗng
+
+        user_ids: các người dùng bị ảnh hưởng (collection users), không truyền thì xóa toàn bộ cache
+        """
+        if not operations:
+            return None
+        with self._timeout(timeout_ms):
+            result = await self.collection(collection).bulk_write(operations, ordered=ordered)
+        if user_ids is None:
+            self._invalidate(collection)
+        else:
+            self._invalidate(collection, {"user_id": {"$in": list(user_ids)}})
+        return result
+
+    # TIỆN ÍCH CHO CÁC COG
+    async def get_user(self, user_id: int, projection: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        """Lấy thông tin người dùng"""
+        return await self.find_one_async(USERS_COLLECTION, {"user_id": user_id}, projection)
+
+    async def get_user_view(self, user_id: int, view):
+        """Lấy người dùng dưới dạng view (xem database.user_views)"""
+        return await get_user_view(user_id, view)
+
+    async def get_all_users(self, filter: Dict[str, Any] = None,
+                            projection: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Lấy danh sách người dùng"""
+        return [user async for user in self.stream_async(USERS_COLLECTION, filter, projection)]
+
+    async def get_all_sects(self, projection: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        """Lấy danh sách môn phái"""
+        return [sect async for sect in self.stream_async(SECTS_COLLECTION, {}, projection)]
+
+    async def get_item(self, item_id) -> Optional[Dict[str, Any]]:
+        """Lấy thông tin vật phẩm"""
+        return await self.find_one_async(ITEMS_COLLECTION, {"item_id": item_id})
+
+    async def add_exp(self, user_id: int, amount: int):
+        """Cộng kinh nghiệm, trả về (realm_id cũ, realm_id mới)"""
+        return await grant_user_exp(user_id, amount)
+
+    async def update_spirit_stones(self, user_id: int, amount: int) -> bool:
+        """Cộng (hoặc trừ nếu âm) linh thạch"""
+        result = await self.update_one_async(
+            USERS_COLLECTION,
+            {"user_id": user_id},
+            {"$inc": {"resources.spirit_stones": amount}}
+        )
+        return result.modified_count > 0
+
+    async def add_item(self, user_id: int, item_id, quantity: int = 1, bound: bool = False) -> bool:
+        """Thêm vật phẩm vào kho đồ"""
+        # Cộng dồn nếu đã có vật phẩm cùng trạng thái khóa
+        result = await self.update_one_async(
+            USERS_COLLECTION,
+            {"user_id": user_id, "inventory.items": {"$elemMatch": {"item_id": item_id, "bound": bound}}},
+            {"$inc": {"inventory.items.$.quantity": quantity}}
+        )
+        if result.matched_count > 0:
+            return True
+
+        # Nếu chưa có, thêm mới
+        result = await self.update_one_async(
+            USERS_COLLECTION,
+            {"user_id": user_id},
+            {"$push": {"inventory.items": {"item_id": item_id, "quantity": quantity, "bound": bound}}}
+        )
+        return result.modified_count > 0
+
+    async def remove_item(self, user_id: int, item_id, quantity: int = 1) -> bool:
+        """Xóa vật phẩm khỏi kho đồ, chỉ trừ khi còn đủ số lượng"""
+        result = await self.update_one_async(
+            USERS_COLLECTION,
+            {"user_id": user_id,
+             "inventory.items": {"$elemMatch": {"item_id": item_id, "quantity": {"$gte": quantity}}}},
+            {"$inc": {"inventory.items.$.quantity": -quantity}}
+        )
+        if result.modified_count == 0:
+            return False
+
+        # Dọn các vật phẩm đã hết
+        await self.update_one_async(
+            USERS_COLLECTION,
+            {"user_id": user_id},
+            {"$pull": {"inventory.items": {"item_id": item_id, "quantity": {"$lte": 0}}}}
+        )
+        return True
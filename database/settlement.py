@@ -0,0 +1,221 @@
+import asyncio
+import time
+import logging
+from typing import Dict, List, Optional, Any
+
+import pymongo
+from pymongo import UpdateOne
+
+from database.mongo_handler import invalidate_user
+from config import USERS_COLLECTION, MONGO_OPERATION_TIMEOUT_MS
+
+# Cấu hình logging
+logger = logging.getLogger("tutien-bot.settlement")
+
+
+class SettlementError(Exception):
+    """Giao dịch không thể thực hiện (không đủ linh thạch hoặc vật phẩm)"""
+    pass
+
+
+def _merge_items(items: List[Dict[str, Any]]) -> Dict[Any, int]:
+    """Gộp số lượng các vật phẩm trùng item_id"""
+    merged = {}
+    for item in items:
+        merged[item["item_id"]] = merged.get(item["item_id"], 0) + item["quantity"]
+    return merged
+
+
+def build_debit(user_id: int, spirit_stones: int, items: Dict[Any, int]) -> Optional[Dict[str, Any]]:
+    """
+    Lệnh trừ tài sản của người đưa ra: {"filter", "update", "array_filters"}
+
+    Bộ lọc chỉ khớp khi người dùng còn đủ linh thạch và đủ từng vật phẩm (không khóa),
+    nên lệnh không khớp nghĩa là giao dịch không hợp lệ.
+    """
+    if not spirit_stones and not items:
+        return None
+
+    filter = {"user_id": user_id}
+    update = {"$inc": {}}
+    array_filters = []
+
+    if spirit_stones:
+        filter["resources.spirit_stones"] = {"$gte": spirit_stones}
+        update["$inc"]["resources.spirit_stones"] = -spirit_stones
+
+    if items:
+        filter["inventory.items"] = {"$all": [
+            {"$elemMatch": {"item_id": item_id, "bound": {"$ne": True}, "quantity": {"$gte": quantity}}}
+            for item_id, quantity in items.items()
+        ]}
+        for index, (item_id, quantity) in enumerate(items.items()):
+            update["$inc"][f"inventory.items.$[d{index}].quantity"] = -quantity
+            array_filters.append({f"d{index}.item_id": item_id, f"d{index}.bound": {"$ne": True}})
+
+    return {"filter": filter, "update": update, "array_filters": array_filters or None}
+
+
+def build_credit(user_id: int, spirit_stones: int, items: Dict[Any, int]) -> List[UpdateOne]:
+    """Các lệnh cộng tài sản cho người nhận (tạo ô vật phẩm còn thiếu rồi cộng số lượng)"""
+    if not spirit_stones and not items:
+        return []
+
+    operations = []
+    update = {"$inc": {}}
+    array_filters = []
+
+    if spirit_stones:
+        update["$inc"]["resources.spirit_stones"] = spirit_stones
+
+    for index, (item_id, quantity) in enumerate(items.items()):
+        # Chỉ khớp khi người nhận chưa có vật phẩm này (lệnh chạy theo thứ tự trong bulk_write)
+        operations.append(UpdateOne(
+            {"user_id": user_id,
+             "inventory.items": {"$not": {"$elemMatch": {"item_id": item_id, "bound": {"$ne": True}}}}},
+            {"$push": {"inventory.items": {"item_id": item_id, "quantity": 0, "bound": False}}}
+        ))
+        update["$inc"][f"inventory.items.$[c{index}].quantity"] = quantity
+        array_filters.append({f"c{index}.item_id": item_id, f"c{index}.bound": {"$ne": True}})
+
+    operations.append(UpdateOne({"user_id": user_id}, update, array_filters=array_filters or None))
+    return operations
+
+
+def build_cleanup(user_id: int) -> UpdateOne:
+    """Lệnh dọn các vật phẩm đã hết số lượng"""
+    return UpdateOne({"user_id": user_id}, {"$pull": {"inventory.items": {"quantity": {"$lte": 0}}}})
+
+
+class TradeSettlement:
+    """
+    Thực hiện hoán đổi tài sản giữa hai người chơi với số lượt truy vấn cố định
+
+    Khi MongoDB chạy replica set, toàn bộ giao dịch nằm trong một transaction.
+    Nếu không, hai lệnh trừ có điều kiện chạy song song, lệnh trừ đã thành công được
+    hoàn lại khi bên kia thất bại, sau đó toàn bộ phần cộng được ghi bằng một bulk_write.
+    """
+
+    def __init__(self, mongo_handler):
+        self.mongo_handler = mongo_handler
+        self._supports_transactions = None
+
+        # Thống kê độ trễ (mili giây)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+
+    async def supports_transactions(self) -> bool:
+        """Kiểm tra (một lần) server có hỗ trợ transaction không (replica set hoặc mongos)"""
+        if self._supports_transactions is None:
+            try:
+                hello = await self.mongo_handler.db.client.admin.command("hello")
+                self._supports_transactions = "setName" in hello or hello.get("msg") == "isdbgrid"
+            except Exception as e:
+                logger.warning(f"Không kiểm tra được chế độ replica set: {e}")
+                self._supports_transactions = False
+        return self._supports_transactions
+
+    async def settle(self, user1_id: int, user1_offer: Dict[str, Any],
+                     user2_id: int, user2_offer: Dict[str, Any]) -> float:
+        """
+        Hoán đổi tài sản giữa hai người chơi
+
+        offer: {"spirit_stones": số lượng, "items": [{"item_id": id, "quantity": số lượng}]}
+        Trả về độ trễ (mili giây), raise SettlementError nếu một bên không đủ tài sản.
+        """
+        start = time.perf_counter()
+
+        user1_stones, user1_items = user1_offer.get("spirit_stones", 0), _merge_items(user1_offer.get("items", []))
+        user2_stones, user2_items = user2_offer.get("spirit_stones", 0), _merge_items(user2_offer.get("items", []))
+
+        # (người đưa, linh thạch, vật phẩm, lệnh trừ)
+        debits = [
+            (user_id, stones, items, build_debit(user_id, stones, items))
+            for user_id, stones, items in ((user1_id, user1_stones, user1_items), (user2_id, user2_stones, user2_items))
+        ]
+        debits = [debit for debit in debits if debit[3] is not None]
+        credits = build_credit(user2_id, user1_stones, user1_items) + build_credit(user1_id, user2_stones, user2_items)
+        if user1_items:
+            credits.append(build_cleanup(user1_id))
+        if user2_items:
+            credits.append(build_cleanup(user2_id))
+
+        try:
+            if await self.supports_transactions():
+                await self._settle_in_transaction(debits, credits)
+            else:
+                await self._settle_with_compensation(debits, credits)
+        finally:
+            invalidate_user(user1_id)
+            invalidate_user(user2_id)
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.last_ms = elapsed_ms
+        logger.info(f"Giao dịch {user1_id} <-> {user2_id} hoàn tất trong {elapsed_ms:.1f}ms")
+
+        return elapsed_ms
+
+    async def _settle_in_transaction(self, debits, credits):
+        """Trừ và cộng tài sản trong một transaction"""
+        collection = self.mongo_handler.collection(USERS_COLLECTION)
+        client = self.mongo_handler.db.client
+
+        with pymongo.timeout(MONGO_OPERATION_TIMEOUT_MS / 1000):
+            async with await client.start_session() as session:
+                async with session.start_transaction():
+                    if debits:
+                        operations = [UpdateOne(**debit) for _, _, _, debit in debits]
+                        result = await collection.bulk_write(operations, ordered=True, session=session)
+                        if result.matched_count != len(operations):
+                            # Thoát khỏi khối start_transaction sẽ hủy transaction
+                            raise SettlementError("Một trong hai người chơi không còn đủ tài sản để giao dịch.")
+
+                    if credits:
+                        await collection.bulk_write(credits, ordered=True, session=session)
+
+    async def _settle_with_compensation(self, debits, credits):
+        """Trừ tài sản song song, hoàn lại nếu một bên thất bại, rồi cộng bằng một bulk_write"""
+        collection = self.mongo_handler.collection(USERS_COLLECTION)
+
+        with pymongo.timeout(MONGO_OPERATION_TIMEOUT_MS / 1000):
+            results = await asyncio.gather(
+                *(collection.update_one(debit["filter"], debit["update"], array_filters=debit["array_filters"])
+                  for _, _, _, debit in debits),
+                return_exceptions=True
+            )
+
+            failed = [result for result in results if isinstance(result, Exception) or result.matched_count == 0]
+            if failed:
+                # Hoàn lại các lệnh trừ đã thành công
+                refunds = []
+                for (user_id, stones, items, _), result in zip(debits, results):
+                    if not isinstance(result, Exception) and result.matched_count > 0:
+                        refunds.extend(build_credit(user_id, stones, items))
+                if refunds:
+                    await collection.bulk_write(refunds, ordered=True)
+
+                errors = [result for result in failed if isinstance(result, Exception)]
+                if errors:
+                    raise errors[0]
+                raise SettlementError("Một trong hai người chơi không còn đủ tài sản để giao dịch.")
+
+            if credits:
+                try:
+                    await collection.bulk_write(credits, ordered=True)
+                except Exception:
+                    logger.critical(f"Giao dịch bị gián đoạn sau khi trừ tài sản: {[debit[0] for debit in debits]}")
+                    raise
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê độ trễ giao dịch"""
+        return {
+            "count": self.count,
+            "avg_ms": self.total_ms / self.count if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "last_ms": self.last_ms
+        }
@@ -0,0 +1,148 @@
+import asyncio
+import copy
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Any, Callable, Awaitable
+
+import bson
+
+# Cấu hình logging
+logger = logging.getLogger("tutien-bot.user_cache")
+
+
+class UserCache:
+    """
+    Bộ nhớ đệm document người dùng theo user_id
+
+    Mỗi mục hết hạn sau `ttl` giây; khi vượt quá `max_entries` mục hoặc
+    `max_bytes` (ước lượng theo kích thước BSON) thì mục ít dùng nhất bị loại.
+    Các lần đọc trùng user_id đang chờ database sẽ dùng chung một truy vấn.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, max_bytes: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()  # {user_id: (hết hạn, kích thước, document)}
+        self._loading: Dict[int, asyncio.Future] = {}
+        self.total_bytes = 0
+
+        # Thống kê
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Lấy bản sao document trong cache, None nếu không có hoặc đã hết hạn"""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+
+        expires_at, size, document = entry
+        if expires_at < time.monotonic():
+            self._remove(user_id)
+            return None
+
+        self._entries.move_to_end(user_id)
+        return copy.deepcopy(document)
+
+    def put(self, user_id: int, document: Dict[str, Any]) -> None:
+        """Lưu document vào cache"""
+        self._remove(user_id)
+
+        size = len(bson.encode(document))
+        if size > self.max_bytes:
+            return
+
+        self._entries[user_id] = (time.monotonic() + self.ttl, size, copy.deepcopy(document))
+        self.total_bytes += size
+
+        # Loại các mục ít dùng nhất khi vượt giới hạn
+        while len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            oldest_id = next(iter(self._entries))
+            self._remove(oldest_id)
+            self.evictions += 1
+
+    def update_fields(self, user_id: int, fields: Dict[str, Any]) -> None:
+        """Cập nhật một số trường cấp cao nhất của document đang có trong cache"""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return
+        document = entry[2]
+        document.update(fields)
+        self.put(user_id, document)
+
+    def invalidate(self, user_id: int) -> None:
+        """Xóa một người dùng khỏi cache (kể cả kết quả của truy vấn đang chạy)"""
+        self._loading.pop(user_id, None)
+        if self._remove(user_id):
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        """Xóa toàn bộ cache"""
+        self._loading.clear()
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+        self.total_bytes = 0
+
+    def _remove(self, user_id: int) -> bool:
+        entry = self._entries.pop(user_id, None)
+        if entry is None:
+            return False
+        self.total_bytes -= entry[1]
+        return True
+
+    async def get_or_load(self, user_id: int,
+                          loader: Callable[[], Awaitable[Optional[Dict[str, Any]]]]) -> Optional[Dict[str, Any]]:
+        """Lấy document từ cache, nếu không có thì gọi loader (dùng chung cho các lần gọi đồng thời)"""
+        document = self.get(user_id)
+        if document is not None:
+            self.hits += 1
+            return document
+
+        self.misses += 1
+
+        # Đã có truy vấn cho người dùng này đang chạy
+        if user_id in self._loading:
+            document = await asyncio.shield(self._loading[user_id])
+            return copy.deepcopy(document)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[user_id] = future
+        try:
+            document = await loader()
+            # Chỉ lưu nếu không bị vô hiệu hóa trong lúc đang tải
+            if document is not None and self._loading.get(user_id) is future:
+                self.put(user_id, document)
+            future.set_result(document)
+            return document
+        except Exception as e:
+            future.set_exception(e)
+            # Tránh cảnh báo "exception was never retrieved" khi không ai chờ
+            future.exception()
+            raise
+        finally:
+            # Truy vấn bị hủy giữa chừng
+            if not future.done():
+                future.cancel()
+            if self._loading.get(user_id) is future:
+                del self._loading[user_id]
+
+    def stats(self) -> Dict[str, Any]:
+        """Thống kê hit/miss của cache"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
@@ -0,0 +1,60 @@
+import asyncio
+from typing import Dict, List, Optional, Any, Iterable
+
+from database.mongo_handler import get_users
+
+
+class UserLoader:
+    """
+    Gom các lần lấy người dùng trong cùng một lệnh thành một truy vấn $in
+
+    Các lời gọi load() trong cùng một vòng lặp sự kiện được gửi chung một lần,
+    mỗi user_id chỉ được truy vấn một lần trong suốt vòng đời của loader.
+    Tạo loader mới cho mỗi lệnh để không giữ dữ liệu cũ.
+    """
+
+    def __init__(self, projection: Optional[Dict[str, Any]] = None):
+        self.projection = projection
+        self._futures: Dict[int, asyncio.Future] = {}
+        self._queue: List[int] = []
+
+    def load(self, user_id: int) -> "asyncio.Future[Optional[Dict[str, Any]]]":
+        """Đăng ký lấy một người dùng, kết quả có sau lần gửi truy vấn kế tiếp"""
+        future = self._futures.get(user_id)
+        if future is not None:
+            return future
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._futures[user_id] = future
+
+        # Lên lịch gửi truy vấn khi hàng đợi chuyển từ rỗng sang có phần tử
+        if not self._queue:
+            loop.call_soon(lambda: asyncio.ensure_future(self._dispatch()))
+        self._queue.append(user_id)
+
+        return future
+
+    async def load_many(self, user_ids: Iterable[int]) -> List[Optional[Dict[str, Any]]]:
+        """Lấy nhiều người dùng, giữ nguyên thứ tự (None nếu không tồn tại)"""
+        return list(await asyncio.gather(*(self.load(user_id) for user_id in user_ids)))
+
+    async def _dispatch(self):
+        """Gửi một truy vấn $in cho toàn bộ user_id đang chờ"""
+        user_ids, self._queue = self._queue, []
+        if not user_ids:
+            return
+
+        try:
+            users = await get_users(user_ids, self.projection)
+        except Exception as e:
+            for user_id in user_ids:
+                if not self._futures[user_id].done():
+                    self._futures[user_id].set_exception(e)
+                # Cho phép thử lại ở lần load() sau
+                del self._futures[user_id]
+            return
+
+        for user_id in user_ids:
+            if not self._futures[user_id].done():
+                self._futures[user_id].set_result(users.get(user_id))
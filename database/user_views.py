@@ -0,0 +1,46 @@
+from typing import Dict, List, Optional, Any, NamedTuple, Type, TypeVar
+
+# Mỗi view khai báo đúng các trường cấp cao nhất mà lệnh cần đọc.
+# Truy vấn chỉ lấy các trường đó (projection), kết quả là một NamedTuple nhẹ, chỉ đọc.
+
+
+class RealmView(NamedTuple):
+    """Cảnh giới và kinh nghiệm (!canhgioi, !xephang)"""
+    user_id: int
+    username: str = "Không rõ"
+    realm_id: int = 0
+    experience: int = 0
+
+
+class ResourcesView(NamedTuple):
+    """Tài nguyên của mô hình User (!balance)"""
+    user_id: int
+    resources: Optional[Dict[str, Any]] = None
+
+
+class InventoryView(NamedTuple):
+    """Kho đồ của mô hình User (!inventory)"""
+    user_id: int
+    inventory: Optional[Dict[str, Any]] = None
+
+
+View = TypeVar("View", bound=tuple)
+
+
+def view_projection(view: Type[View]) -> Dict[str, int]:
+    """Projection MongoDB chỉ gồm các trường của view"""
+    projection = {field: 1 for field in view._fields}
+    projection["_id"] = 0
+    return projection
+
+
+def to_view(view: Type[View], document: Optional[Dict[str, Any]]) -> Optional[View]:
+    """Tạo view từ document (bỏ qua các trường thừa, dùng giá trị mặc định cho trường thiếu)"""
+    if document is None:
+        return None
+    return view(**{field: document[field] for field in view._fields if field in document})
+
+
+def to_views(view: Type[View], documents: List[Dict[str, Any]]) -> List[View]:
+    """Tạo danh sách view từ danh sách document"""
+    return [to_view(view, document) for document in documents]
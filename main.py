@@ -6,6 +6,12 @@ import os
 import logging
 from dotenv import load_dotenv
 
+from config import (
+    CHAT_EXP_USER_RATE, CHAT_EXP_USER_BURST, CHAT_EXP_CHANNEL_RATE, CHAT_EXP_CHANNEL_BURST,
+    CHAT_EXP_FILTER_CONTENT, CHAT_EXP_DUPLICATE_WINDOW, CHAT_EXP_MIN_ENTROPY
+)
+from utils.rate_limit import ChatExpLimiter
+
 # Cấu hình logging
 logging.basicConfig(
     level=logging.INFO,
@@ -25,26 +31,63 @@ TOKEN = os.getenv('DISCORD_TOKEN')
 intents = discord.Intents.all()
 bot = commands.Bot(command_prefix='!', intents=intents)
 
+# Giới hạn kinh nghiệm chat, kiểm tra hoàn toàn trong bộ nhớ trước khi cộng kinh nghiệm
+bot.chat_limiter = ChatExpLimiter(
+    CHAT_EXP_USER_RATE, CHAT_EXP_USER_BURST,
+    CHAT_EXP_CHANNEL_RATE, CHAT_EXP_CHANNEL_BURST,
+    filter_content=CHAT_EXP_FILTER_CONTENT,
+    duplicate_window=CHAT_EXP_DUPLICATE_WINDOW,
+    min_entropy=CHAT_EXP_MIN_ENTROPY
+)
+
 
-# Tải các module
-async def load_modules():
+# Các module được tải khi khởi động
+EXTENSIONS = [
     # Core modules
-    await bot.load_extension("modules.core.cultivation")
-    await bot.load_extension("modules.core.combat")
-    await bot.load_extension("modules.core.monster")
-    await bot.load_extension("modules.core.inventory")
+    "modules.core.cultivation",
+    "modules.core.combat",
+    "modules.core.monster",
+    "modules.core.inventory",
+
+    # Economy modules
+    "modules.economy.economy",
+    "modules.economy.shop",
+    "modules.economy.auction",
 
     # Social modules
-    await bot.load_extension("modules.social.sect")
+    "modules.social.sect",
+    "modules.social.friends",
+    "modules.social.ranking",
+    "modules.social.trading",
 
     # Activities modules
-    await bot.load_extension("modules.activities.daily")
+    "modules.activities.daily",
+    "modules.activities.dungeons",
+    "modules.activities.world_boss",
 
     # Utility modules
-    await bot.load_extension("modules.utility.help")
-    await bot.load_extension("modules.utility.error_handler")
+    "modules.utility.help",
+    "modules.utility.error_handler",
+    "modules.utility.commands",
+    "modules.utility.utility",
+]
+
+
+# Tải các module
+async def load_modules():
+    failed = []
+    for extension in EXTENSIONS:
+        # Một module lỗi không làm dừng việc tải các module còn lại
+        try:
+            await bot.load_extension(extension)
+        except Exception as e:
+            failed.append(extension)
+            logger.error(f"Không thể tải module {extension}: {e}")
 
-    logger.info("Đã tải xong tất cả các module")
+    if failed:
+        logger.warning(f"Đã tải {len(EXTENSIONS) - len(failed)}/{len(EXTENSIONS)} module, lỗi: {', '.join(failed)}")
+    else:
+        logger.info("Đã tải xong tất cả các module")
 
 
 @bot.event
@@ -53,14 +96,25 @@ async def on_ready():
     # Tạo activity cho bot
     await bot.change_presence(activity=discord.Game(name="Tu Tiên | !help"))
 
-    # Tải modules
-    await load_modules()
-
-    # Ensure database connection
+    # Kết nối database trước để các module dùng chung client
     from database.mongo_handler import connect_to_mongodb
     await connect_to_mongodb()
     logger.info("Đã kết nối đến MongoDB")
 
+    # Đồng bộ index (khai báo trong database.mongo_handler), không phụ thuộc việc tải các module
+    from database.mongo_handler import sync_indexes
+    await sync_indexes()
+
+    # Nạp dữ liệu game dùng chung (snapshot nếu còn mới, ngược lại JSON)
+    from utils.game_data import game_data
+    game_data.load_all()
+
+    # Tải modules
+    await load_modules()
+
+    # Theo dõi thay đổi của dữ liệu game (data/*.json)
+    game_data.start_watching()
+
 
 @bot.event
 async def on_message(message):
@@ -68,8 +122,9 @@ async def on_message(message):
     if message.author.bot:
         return
 
-    # Sử lý kinh nghiệm từ chat
-    if message.content and not message.content.startswith('!'):
+    # Sử lý kinh nghiệm từ chat (bỏ qua spam trước khi cộng)
+    if (message.content and not message.content.startswith('!')
+            and bot.chat_limiter.check(message.author.id, message.channel.id, message.content)):
         from modules.core.cultivation import add_chat_exp
         await add_chat_exp(bot, message)
 
@@ -83,15 +138,9 @@ async def on_voice_state_update(member, before, after):
     if member.bot:
         return
 
-    # Nếu người dùng tham gia voice chat
-    if before.channel is None and after.channel is not None:
-        from modules.core.cultivation import start_voice_tracking
-        await start_voice_tracking(bot, member, after.channel)
-
-    # Nếu người dùng rời voice chat
-    elif before.channel is not None and after.channel is None:
-        from modules.core.cultivation import end_voice_tracking
-        await end_voice_tracking(bot, member, before.channel)
+    # Tham gia, rời, chuyển kênh, tắt nghe hoặc vào kênh AFK
+    from modules.core.cultivation import update_voice_tracking
+    await update_voice_tracking(bot, member, before, after)
 
 @bot.event
 async def on_monster_kill(user_id, monster_level):
@@ -6,9 +6,10 @@ import random
 import logging
 from typing import Dict, List
 
-from database.mongo_handler import get_user_or_create, update_user, add_user_linh_thach, add_user_exp
+from database.mongo_handler import get_user_or_create, update_user, add_user_linh_thach, add_user_exp, add_user_items
+from utils.cooldowns import cooldowns
 from config import (
-    CULTIVATION_REALMS, DAILY_REWARD, EMBED_COLOR, EMBED_COLOR_SUCCESS,
+    CULTIVATION_REALMS, DAILY_REWARD, DAILY_HUNT_TICKETS, HUNT_TICKET_ITEM_ID, EMBED_COLOR, EMBED_COLOR_SUCCESS,
     EMBED_COLOR_ERROR, EMOJI_LINH_THACH, EMOJI_EXP, EMOJI_LEVEL_UP
 )
 
@@ -23,41 +24,36 @@ class DailyCog(commands.Cog):
     @commands.command(name="diemdanh", aliases=["daily", "nhandiemdanh", "dd"])
     async def daily_reward(self, ctx):
         """Nhận phần thưởng điểm danh hàng ngày"""
-        # Lấy thông tin người dùng
-        user = await get_user_or_create(ctx.author.id, ctx.author.name)
+        # Kiểm tra thời gian điểm danh gần nhất (đã điểm danh thì trả lời ngay, không đọc database)
+        time_left = await cooldowns.remaining(ctx.author.id, "daily")
+        if time_left:
+            hours, remainder = divmod(time_left, 3600)
+            minutes, seconds = divmod(remainder, 60)
+
+            embed = discord.Embed(
+                title="❌ Đã Điểm Danh",
+                description=(
+                    f"Bạn đã điểm danh hôm nay rồi!\n"
+                    f"Vui lòng quay lại sau: **{hours} giờ {minutes} phút {seconds} giây**"
+                ),
+                color=EMBED_COLOR_ERROR
+            )
 
-        # Kiểm tra thời gian điểm danh gần nhất
-        now = datetime.datetime.now()
-        last_daily = user.get("last_daily")
+            return await ctx.send(embed=embed)
 
-        if last_daily:
-            last_daily = datetime.datetime.fromisoformat(last_daily)
+        # Ghi nhận ngay để hai lệnh cùng lúc không cùng nhận thưởng (last_daily được ghi cùng chuỗi điểm danh)
+        now = datetime.datetime.now()
+        cooldowns.start(ctx.author.id, "daily", now, persist=False)
 
-            # Kiểm tra xem đã qua ngày mới chưa
-            if last_daily.date() == now.date():
-                # Tính thời gian còn lại đến ngày tiếp theo
-                tomorrow = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time())
-                time_left = tomorrow - now
-                hours, remainder = divmod(int(time_left.total_seconds()), 3600)
-                minutes, seconds = divmod(remainder, 60)
-
-                embed = discord.Embed(
-                    title="❌ Đã Điểm Danh",
-                    description=(
-                        f"Bạn đã điểm danh hôm nay rồi!\n"
-                        f"Vui lòng quay lại sau: **{hours} giờ {minutes} phút {seconds} giây**"
-                    ),
-                    color=EMBED_COLOR_ERROR
-                )
-
-                return await ctx.send(embed=embed)
+        # Lấy thông tin người dùng
+        user = await get_user_or_create(ctx.author.id, ctx.author.name)
 
         # Tính phần thưởng điểm danh
         linh_thach_reward = DAILY_REWARD
         exp_reward = 20
 
-        # Thêm phần thưởng
-        await add_user_linh_thach(ctx.author.id, linh_thach_reward)
+        # Thêm phần thưởng (linh thạch và phù săn yêu trong cùng một lần cập nhật)
+        await add_user_items(ctx.author.id, {HUNT_TICKET_ITEM_ID: DAILY_HUNT_TICKETS}, linh_thach=linh_thach_reward)
 
         # Cộng kinh nghiệm và kiểm tra đột phá
         cultivation_cog = self.bot.get_cog("CultivationCog")
@@ -95,6 +91,7 @@ class DailyCog(commands.Cog):
             name="Phần Thưởng",
             value=(
                 f"{EMOJI_LINH_THACH} **+{linh_thach_reward}** linh thạch\n"
+                f"🎫 **+{DAILY_HUNT_TICKETS}** Phù Săn Yêu\n"
                 f"{EMOJI_EXP} **+{exp_reward}** kinh nghiệm{breakthrough_text}"
             ),
             inline=False
@@ -252,41 +249,36 @@ class DailyCog(commands.Cog):
     @commands.command(name="diemdanh", aliases=["daily", "nhandiemdanh", "dd"])
     async def daily_reward(self, ctx):
         """Nhận phần thưởng điểm danh hàng ngày"""
-        # Lấy thông tin người dùng
-        user = await get_user_or_create(ctx.author.id, ctx.author.name)
+        # Kiểm tra thời gian điểm danh gần nhất (đã điểm danh thì trả lời ngay, không đọc database)
+        time_left = await cooldowns.remaining(ctx.author.id, "daily")
+        if time_left:
+            hours, remainder = divmod(time_left, 3600)
+            minutes, seconds = divmod(remainder, 60)
+
+            embed = discord.Embed(
+                title="❌ Đã Điểm Danh",
+                description=(
+                    f"Bạn đã điểm danh hôm nay rồi!\n"
+                    f"Vui lòng quay lại sau: **{hours} giờ {minutes} phút {seconds} giây**"
+                ),
+                color=EMBED_COLOR_ERROR
+            )
 
-        # Kiểm tra thời gian điểm danh gần nhất
-        now = datetime.datetime.now()
-        last_daily = user.get("last_daily")
+            return await ctx.send(embed=embed)
 
-        if last_daily:
-            last_daily = datetime.datetime.fromisoformat(last_daily)
+        # Ghi nhận ngay để hai lệnh cùng lúc không cùng nhận thưởng (last_daily được ghi cùng chuỗi điểm danh)
+        now = datetime.datetime.now()
+        cooldowns.start(ctx.author.id, "daily", now, persist=False)
 
-            # Kiểm tra xem đã qua ngày mới chưa
-            if last_daily.date() == now.date():
-                # Tính thời gian còn lại đến ngày tiếp theo
-                tomorrow = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time())
-                time_left = tomorrow - now
-                hours, remainder = divmod(int(time_left.total_seconds()), 3600)
-                minutes, seconds = divmod(remainder, 60)
-
-                embed = discord.Embed(
-                    title="❌ Đã Điểm Danh",
-                    description=(
-                        f"Bạn đã điểm danh hôm nay rồi!\n"
-                        f"Vui lòng quay lại sau: **{hours} giờ {minutes} phút {seconds} giây**"
-                    ),
-                    color=EMBED_COLOR_ERROR
-                )
-
-                return await ctx.send(embed=embed)
+        # Lấy thông tin người dùng
+        user = await get_user_or_create(ctx.author.id, ctx.author.name)
 
         # Tính phần thưởng điểm danh
         linh_thach_reward = DAILY_REWARD
         exp_reward = 20
 
-        # Thêm phần thưởng
-        await add_user_linh_thach(ctx.author.id, linh_thach_reward)
+        # Thêm phần thưởng (linh thạch và phù săn yêu trong cùng một lần cập nhật)
+        await add_user_items(ctx.author.id, {HUNT_TICKET_ITEM_ID: DAILY_HUNT_TICKETS}, linh_thach=linh_thach_reward)
 
         # Cộng kinh nghiệm và kiểm tra đột phá
         cultivation_cog = self.bot.get_cog("CultivationCog")
@@ -324,6 +316,7 @@ class DailyCog(commands.Cog):
             name="Phần Thưởng",
             value=(
                 f"{EMOJI_LINH_THACH} **+{linh_thach_reward}** linh thạch\n"
+                f"🎫 **+{DAILY_HUNT_TICKETS}** Phù Săn Yêu\n"
                 f"{EMOJI_EXP} **+{exp_reward}** kinh nghiệm{breakthrough_text}"
             ),
             inline=False
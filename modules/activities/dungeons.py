@@ -3,10 +3,37 @@ from discord.ext import commands
 import random
 import asyncio
 from database.mongo_handler import MongoHandler
-from utils.embed_utils import create_embed, create_progress_bar
+from utils.embed import create_embed, create_progress_bar
 from utils.text_utils import format_number
+from utils.live_message import LiveMessage
+from utils.loot_table import LootTable
 import config
 
+# Hệ số phần thưởng theo chất lượng rương
+TREASURE_MULTIPLIERS = {
+    "common": 1,
+    "uncommon": 2,
+    "rare": 3,
+    "epic": 5
+}
+
+
+def _dungeon_loot_table(chance, max_quantity):
+    """Bảng rơi của động phủ: tối đa một vật phẩm, tổng cơ hội `chance` chia đều cho các vật phẩm"""
+    item_chance = min(1.0, chance) / len(config.DUNGEON_ITEM_IDS)
+    return LootTable(
+        [{"item_id": item_id, "chance": item_chance, "min_quantity": 1, "max_quantity": max_quantity}
+         for item_id in config.DUNGEON_ITEM_IDS],
+        exclusive=True
+    )
+
+
+MONSTER_LOOT = _dungeon_loot_table(config.DUNGEON_MONSTER_ITEM_CHANCE, 1)
+TREASURE_LOOT = {
+    quality: _dungeon_loot_table(config.DUNGEON_TREASURE_ITEM_CHANCE * multiplier, 3)
+    for quality, multiplier in TREASURE_MULTIPLIERS.items()
+}
+
 
 class Dungeons(commands.Cog):
     def __init__(self, bot):
@@ -126,13 +153,6 @@ class Dungeons(commands.Cog):
                     "spirit_stones": monster_level * 50 * random.uniform(0.8, 1.2)
                 }
 
-                # Cơ hội rơi vật phẩm
-                if random.random() < 0.3:  # 30% cơ hội rơi vật phẩm
-                    room["rewards"]["items"] = [{
-                        "item_id": random.randint(1, 10),  # ID vật phẩm ngẫu nhiên
-                        "quantity": 1
-                    }]
-
             elif room_type == "treasure":
                 # Tạo kho báu ngẫu nhiên
                 treasure_quality = random.choices(
@@ -141,12 +161,7 @@ class Dungeons(commands.Cog):
                     k=1
                 )[0]
 
-                multiplier = {
-                    "common": 1,
-                    "uncommon": 2,
-                    "rare": 3,
-                    "epic": 5
-                }[treasure_quality]
+                multiplier = TREASURE_MULTIPLIERS[treasure_quality]
 
                 room["treasure"] = {
                     "quality": treasure_quality,
@@ -158,13 +173,6 @@ class Dungeons(commands.Cog):
                     "exp": level * 10 * multiplier * random.uniform(0.8, 1.2)
                 }
 
-                # Cơ hội có vật phẩm trong kho báu
-                if random.random() < 0.5 * multiplier:  # Cơ hội tăng theo chất lượng kho báu
-                    room["rewards"]["items"] = [{
-                        "item_id": random.randint(1, 10),  # ID vật phẩm ngẫu nhiên
-                        "quantity": random.randint(1, 3)
-                    }]
-
             elif room_type == "trap":
                 # Tạo bẫy ngẫu nhiên
                 trap_difficulty = random.choices(
@@ -195,8 +203,25 @@ class Dungeons(commands.Cog):
 
             rooms.append(room)
 
+        # Tung vật phẩm rơi của tất cả các phòng cùng lúc (mỗi bảng rơi một lần)
+        self._roll_room_items([room for room in rooms if room["type"] == "monster"], MONSTER_LOOT)
+        for quality, loot_table in TREASURE_LOOT.items():
+            self._roll_room_items(
+                [room for room in rooms if room["type"] == "treasure" and room["treasure"]["quality"] == quality],
+                loot_table
+            )
+
         return {"rooms": rooms}
 
+    @staticmethod
+    def _roll_room_items(rooms, loot_table):
+        """Gán vật phẩm rơi cho các phòng dùng chung một bảng rơi"""
+        for room, drops in zip(rooms, loot_table.roll_each(len(rooms))):
+            if drops:
+                room["rewards"]["items"] = [
+                    {"item_id": item_id, "quantity": quantity} for item_id, quantity in drops.items()
+                ]
+
     async def _explore_room(self, ctx, interaction, dungeon_msg):
         """Xử lý khám phá phòng trong động phủ"""
         await interaction.response.defer()
@@ -307,7 +332,8 @@ class Dungeons(commands.Cog):
         view.add_item(attack_button)
         view.add_item(flee_button)
 
-        await dungeon_msg.edit(embed=embed, view=view)
+        live = LiveMessage(dungeon_msg)
+        await live.edit(embed=embed, view=view)
 
         # Xử lý chiến đấu
         while monster["health"] > 0 and self.active_dungeons[ctx.author.id]["health"] > 0:
@@ -406,7 +432,7 @@ class Dungeons(commands.Cog):
                         view = discord.ui.View()
                         view.add_item(continue_button)
 
-                        await dungeon_msg.edit(embed=embed, view=view)
+                        await live.edit(embed=embed, view=view)
 
                         # Chờ người chơi nhấn nút tiếp tục
                         def continue_check(interaction):
@@ -417,10 +443,11 @@ class Dungeons(commands.Cog):
 
                     elif self.active_dungeons[ctx.author.id]["health"] <= 0:
                         # Người chơi thua
+                        await live.flush()
                         await self._handle_death(ctx, battle_interaction, dungeon_msg)
                         return
 
-                    await dungeon_msg.edit(embed=embed, view=view)
+                    live.update(embed=embed, view=view)
 
                 elif battle_interaction.data["custom_id"] == "flee":
                     await battle_interaction.response.defer()
@@ -443,7 +470,7 @@ class Dungeons(commands.Cog):
                         view = discord.ui.View()
                         view.add_item(continue_button)
 
-                        await dungeon_msg.edit(embed=embed, view=view)
+                        await live.edit(embed=embed, view=view)
 
                         # Chờ người chơi nhấn nút tiếp tục
                         def continue_check(interaction):
@@ -488,10 +515,11 @@ class Dungeons(commands.Cog):
 
                         # Kiểm tra xem người chơi còn sống không
                         if self.active_dungeons[ctx.author.id]["health"] <= 0:
+                            await live.flush()
                             await self._handle_death(ctx, battle_interaction, dungeon_msg)
                             return
 
-                        await dungeon_msg.edit(embed=embed, view=view)
+                        live.update(embed=embed, view=view)
 
             except asyncio.TimeoutError:
                 # Tự động tấn công nếu người chơi không phản hồi
@@ -569,15 +597,19 @@ class Dungeons(commands.Cog):
                     view = discord.ui.View()
                     view.add_item(continue_button)
 
-                    await dungeon_msg.edit(embed=embed, view=view)
+                    await live.edit(embed=embed, view=view)
                     break
 
                 elif self.active_dungeons[ctx.author.id]["health"] <= 0:
                     # Người chơi thua
+                    await live.flush()
                     await self._handle_death(ctx, interaction, dungeon_msg)
                     return
 
-                await dungeon_msg.edit(embed=embed, view=view)
+                live.update(embed=embed, view=view)
+
+        # Đảm bảo khung hình cuối đã được gửi trước khi sang phòng khác
+        await live.flush()
 
     async def _handle_treasure_room(self, ctx, interaction, dungeon_msg, room_data):
         """Xử lý phòng có kho báu"""
@@ -844,5 +876,5 @@ class Dungeons(commands.Cog):
             await self.db.add_item(user_id, item["item_id"], item["quantity"])
 
 
-def setup(bot):
-    bot.add_cog(Dungeons(bot))
+async def setup(bot):
+    await bot.add_cog(Dungeons(bot))
@@ -4,9 +4,7 @@ import asyncio
 import datetime
 import random
 import logging
-import json
-import os
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Sequence, Union
 
 from database.mongo_handler import get_user_or_create, update_user, add_user_linh_thach, add_user_exp
 from config import (
@@ -15,6 +13,7 @@ from config import (
 )
 from utils.text_utils import format_number, generate_random_quote
 from utils.time_utils import format_seconds
+from utils.game_data import game_data
 
 # Cấu hình logging
 logger = logging.getLogger("tutien-bot.events")
@@ -24,35 +23,17 @@ class EventsCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.active_events = {}  # {event_id: event_data}
-        self.load_events()
+        self.default_events = self.create_default_events()["events"]
         self.event_check.start()
 
     def cog_unload(self):
         """Hủy task khi unload cog"""
         self.event_check.cancel()
 
-    def load_events(self):
-        """Tải danh sách sự kiện từ JSON"""
-        try:
-            if os.path.exists("data/events.json"):
-                with open("data/events.json", "r", encoding="utf-8") as f:
-                    self.event_templates = json.load(f)
-                logger.info(f"Đã tải {len(self.event_templates.get('events', []))} mẫu sự kiện từ JSON")
-            else:
-                logger.warning("Không tìm thấy file data/events.json")
-                # Tạo dữ liệu mặc định
-                self.event_templates = self.create_default_events()
-
-                # Lưu vào file
-                os.makedirs("data", exist_ok=True)
-                with open("data/events.json", "w", encoding="utf-8") as f:
-                    json.dump(self.event_templates, f, ensure_ascii=False, indent=4)
-
-                logger.info(
-                    f"Đã tạo file events.json với {len(self.event_templates.get('events', []))} sự kiện mặc định")
-        except Exception as e:
-            logger.error(f"Lỗi khi tải dữ liệu sự kiện: {e}")
-            self.event_templates = self.create_default_events()
+    @property
+    def event_templates(self) -> Sequence[Dict[str, Any]]:
+        """Các mẫu sự kiện trong dữ liệu game dùng chung (mẫu mặc định nếu chưa có data/events.json)"""
+        return game_data.events.entries or self.default_events
 
     def create_default_events(self) -> Dict[str, List[Dict[str, Any]]]:
         """Tạo danh sách sự kiện mặc định"""
@@ -262,7 +243,7 @@ class EventsCog(commands.Cog):
         """Tạo một sự kiện ngẫu nhiên"""
         try:
             # Kiểm tra có sự kiện nào có sẵn không
-            available_events = self.event_templates.get("events", [])
+            available_events = self.event_templates
             if not available_events:
                 return
 
@@ -862,7 +843,7 @@ class EventsCog(commands.Cog):
         """Tạo một sự kiện mới (chỉ dành cho quản trị viên)"""
         # Tìm mẫu sự kiện
         template = None
-        for event_template in self.event_templates["events"]:
+        for event_template in self.event_templates:
             if event_template["id"] == template_id:
                 template = event_template
                 break
@@ -970,7 +951,7 @@ class EventsCog(commands.Cog):
     @event.command(name="danhsach", aliases=["list", "ds"])
     async def list_event_templates(self, ctx):
         """Hiển thị danh sách các mẫu sự kiện có sẵn"""
-        templates = self.event_templates.get("events", [])
+        templates = self.event_templates
 
         if not templates:
             embed = discord.Embed(
@@ -0,0 +1,252 @@
+import discord
+from discord.ext import commands, tasks
+import logging
+
+from database.mongo_handler import (
+    get_user_or_create, get_latest_world_boss, create_world_boss,
+    bulk_add_user_exp, bulk_add_user_linh_thach
+)
+from database.models.monster_model import Boss
+from utils.combat_engine import prepare_fighter, calculate_damage
+from utils.cooldowns import cooldowns
+from utils.game_data import game_data
+from utils.text_utils import format_time, progress_bar
+from utils.world_boss import WorldBossRaid, build_world_boss
+from config import (
+    EMBED_COLOR, EMBED_COLOR_SUCCESS, EMBED_COLOR_ERROR, EMBED_COLOR_WARNING,
+    EMOJI_LINH_THACH, EMOJI_EXP, EMOJI_ATTACK,
+    WORLD_BOSS_PHASE_DEFENSE_BONUS, WORLD_BOSS_ATTACK_ROUNDS, WORLD_BOSS_EXP_REWARD,
+    WORLD_BOSS_LINH_THACH_REWARD, WORLD_BOSS_LAST_HIT_BONUS, WORLD_BOSS_CHECK_INTERVAL
+)
+
+# Cấu hình logging
+logger = logging.getLogger("tutien-bot.world_boss")
+
+
+class WorldBossCog(commands.Cog):
+    """Boss thế giới: cả server cùng đánh một boss có máu chung"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.raid = None
+        self.respawn_check.start()
+
+    def cog_unload(self):
+        self.respawn_check.cancel()
+
+    async def load_raid(self, document):
+        """Nạp trận từ document nếu khác trận đang giữ trong bộ nhớ"""
+        if self.raid is None or self.raid.raid_id != document["raid_id"]:
+            self.raid = await WorldBossRaid.load(document, on_phase=self.on_phase, on_defeat=self.on_defeat)
+        return self.raid
+
+    async def current_raid(self):
+        """Trận boss thế giới gần nhất (còn sống hoặc đã bị đánh bại)"""
+        if self.raid is not None and not self.raid.defeated:
+            return self.raid
+        document = await get_latest_world_boss()
+        if document is None:
+            return None
+        return await self.load_raid(document)
+
+    async def spawn(self, channel_id, boss_id=None):
+        """Triệu hồi boss thế giới tiếp theo, None nếu tiến trình khác vừa triệu hồi"""
+        bosses = game_data.bosses
+        if not bosses:
+            return None
+
+        latest = await get_latest_world_boss()
+        raid_id = latest["raid_id"] + 1 if latest else 1
+
+        if boss_id is not None:
+            entry = bosses.get(boss_id)
+            if entry is None:
+                return None
+        else:
+            # Lần lượt từng boss trong danh sách
+            entry = bosses.entries[(raid_id - 1) % len(bosses)]
+
+        document = await create_world_boss(build_world_boss(entry, raid_id, channel_id))
+        if document is None:
+            return None
+        return await self.load_raid(document)
+
+    def get_channel(self, raid):
+        return self.bot.get_channel(raid.channel_id) if raid.channel_id else None
+
+    def status_embed(self, raid):
+        """Embed trạng thái boss thế giới"""
+        if raid.defeated:
+            respawn = Boss.from_dict(raid.document).get_time_until_respawn() if raid.boss.last_defeat else 0
+            description = "Boss đã bị đánh bại."
+            if respawn:
+                description += f" Xuất hiện trở lại sau **{format_time(respawn)}**."
+            color = EMBED_COLOR_SUCCESS
+        else:
+            description = raid.boss.description
+            color = EMBED_COLOR_WARNING if raid.phase > 1 else EMBED_COLOR
+
+        embed = discord.Embed(title=f"🐉 Boss Thế Giới: {raid.boss.name}", description=description, color=color)
+        embed.add_field(
+            name="Máu",
+            value=f"{progress_bar(raid.hp, raid.max_hp, 15)}\n{raid.hp:,} / {raid.max_hp:,}",
+            inline=False
+        )
+        embed.add_field(name="Giai đoạn", value=f"{raid.phase} / {raid.boss.phases}", inline=True)
+        embed.add_field(name="Người tham gia", value=f"{len(raid.leaderboard):,}", inline=True)
+
+        top = raid.leaderboard.top(10)
+        if top:
+            embed.add_field(
+                name="Bảng Sát Thương",
+                value="\n".join(f"**{rank}.** <@{user_id}> - {damage:,}" for rank, (user_id, damage) in enumerate(top, 1)),
+                inline=False
+            )
+        return embed
+
+    async def on_phase(self, raid, phase):
+        """Thông báo boss chuyển giai đoạn"""
+        channel = self.get_channel(raid)
+        if channel is None:
+            return
+        embed = discord.Embed(
+            title=f"🔥 {raid.boss.name} bước vào giai đoạn {phase}!",
+            description=f"Phòng thủ của boss tăng **{int(WORLD_BOSS_PHASE_DEFENSE_BONUS * (phase - 1) * 100)}%**.",
+            color=EMBED_COLOR_WARNING
+        )
+        await channel.send(embed=embed)
+
+    async def on_defeat(self, raid, last_hit_user_id):
+        """Chia phần thưởng theo sát thương (chỉ tiến trình xác nhận kết liễu mới gọi)"""
+        try:
+            leaderboard = await raid.final_leaderboard()
+            exp_grants = leaderboard.shares(WORLD_BOSS_EXP_REWARD)
+            stone_grants = leaderboard.shares(WORLD_BOSS_LINH_THACH_REWARD)
+            if last_hit_user_id is not None:
+                stone_grants[last_hit_user_id] = stone_grants.get(last_hit_user_id, 0) + WORLD_BOSS_LAST_HIT_BONUS
+
+            await bulk_add_user_linh_thach(stone_grants)
+            promotions = await bulk_add_user_exp(exp_grants)
+        except Exception as e:
+            logger.error(f"Lỗi khi chia phần thưởng boss thế giới {raid.raid_id}: {e}")
+            return
+
+        channel = self.get_channel(raid)
+        if channel is not None:
+            embed = discord.Embed(
+                title=f"🏆 {raid.boss.name} đã bị đánh bại!",
+                description=f"<@{last_hit_user_id}> ra đòn kết liễu và nhận thêm {EMOJI_LINH_THACH} {WORLD_BOSS_LAST_HIT_BONUS:,} linh thạch.",
+                color=EMBED_COLOR_SUCCESS
+            )
+            embed.add_field(
+                name="Phần thưởng",
+                value="\n".join(
+                    f"**{rank}.** <@{user_id}> - {damage:,} sát thương: "
+                    f"{EMOJI_EXP} {exp_grants[user_id]:,} | {EMOJI_LINH_THACH} {stone_grants[user_id]:,}"
+                    for rank, (user_id, damage) in enumerate(leaderboard.top(10), 1)
+                ),
+                inline=False
+            )
+            embed.set_footer(text=f"{len(leaderboard):,} người tham gia, tổng {leaderboard.total:,} sát thương")
+            await channel.send(embed=embed)
+
+        cultivation_cog = self.bot.get_cog("CultivationCog")
+        if promotions and cultivation_cog:
+            await cultivation_cog.announce_promotions(promotions)
+
+    @tasks.loop(seconds=WORLD_BOSS_CHECK_INTERVAL)
+    async def respawn_check(self):
+        """Triệu hồi lại boss khi hết thời gian hồi sinh"""
+        try:
+            document = await get_latest_world_boss()
+            if document is None or document.get("last_defeat") is None:
+                if document is not None:
+                    await self.load_raid(document)
+                return
+            if not Boss.from_dict(document).is_available():
+                return
+
+            raid = await self.spawn(document.get("channel_id"))
+            channel = self.get_channel(raid) if raid else None
+            if channel is not None:
+                await channel.send("⚠️ Boss thế giới đã xuất hiện! Dùng `!tancong` để tấn công.",
+                                   embed=self.status_embed(raid))
+        except Exception as e:
+            logger.error(f"Lỗi khi kiểm tra boss thế giới: {e}")
+
+    @respawn_check.before_loop
+    async def before_respawn_check(self):
+        await self.bot.wait_until_ready()
+
+    @commands.command(name="bossthegioi", aliases=["worldboss", "btg"])
+    async def world_boss_status(self, ctx):
+        """Xem trạng thái boss thế giới và bảng sát thương"""
+        raid = await self.current_raid()
+        if raid is None:
+            return await ctx.send("Hiện chưa có boss thế giới nào xuất hiện.")
+        await ctx.send(embed=self.status_embed(raid))
+
+    @commands.command(name="tancong", aliases=["raid"])
+    async def attack(self, ctx):
+        """Tấn công boss thế giới"""
+        raid = await self.current_raid()
+        if raid is None or raid.defeated:
+            return await ctx.send("Hiện không có boss thế giới nào để tấn công. Xem `!bossthegioi`.")
+
+        # Kiểm tra và bắt đầu cooldown (đang hồi thì trả lời ngay, không đọc database)
+        remaining = await cooldowns.try_start(ctx.author.id, "raid")
+        if remaining:
+            embed = discord.Embed(
+                title="⏳ Cooldown",
+                description=f"Bạn cần điều tức **{format_time(remaining)}** nữa mới có thể tấn công tiếp!",
+                color=EMBED_COLOR_ERROR
+            )
+            return await ctx.send(embed=embed)
+
+        user = await get_user_or_create(ctx.author.id, ctx.author.name)
+        player = prepare_fighter(ctx.author.display_name, user, user["realm_id"])
+
+        # Phòng thủ của boss tăng theo giai đoạn
+        boss = {"defense": int(raid.boss.stats["defense"] * (1 + WORLD_BOSS_PHASE_DEFENSE_BONUS * (raid.phase - 1)))}
+        hits = [calculate_damage(player, boss) for _ in range(WORLD_BOSS_ATTACK_ROUNDS)]
+        damage = sum(hit for hit, _ in hits)
+        crits = sum(1 for _, is_crit in hits if is_crit)
+
+        update = await raid.hit(ctx.author.id, damage)
+        if not update.landed:
+            return await ctx.send("Boss thế giới đã bị đánh bại trước khi đòn tấn công của bạn kịp tới!")
+
+        crit_text = f" ({crits} đòn chí mạng)" if crits else ""
+        embed = discord.Embed(
+            title=f"{EMOJI_ATTACK} {ctx.author.display_name} tấn công {raid.boss.name}",
+            description=f"Gây ra **{damage:,}** sát thương sau {WORLD_BOSS_ATTACK_ROUNDS} đòn{crit_text}.",
+            color=EMBED_COLOR_SUCCESS if update.defeated else EMBED_COLOR
+        )
+        embed.add_field(name="Máu boss", value=f"{progress_bar(update.hp, update.max_hp, 15)}", inline=False)
+        rank = raid.leaderboard.rank(ctx.author.id)
+        if rank:
+            embed.add_field(
+                name="Xếp hạng",
+                value=f"#{rank} với {raid.leaderboard.damage[ctx.author.id]:,} sát thương",
+                inline=True
+            )
+        if update.last_hit == ctx.author.id:
+            embed.add_field(name="Kết liễu", value="Bạn đã ra đòn kết liễu boss! 🎉", inline=True)
+        await ctx.send(embed=embed)
+
+    @commands.command(name="trieuhoiboss", aliases=["spawnworldboss"])
+    @commands.has_permissions(administrator=True)
+    async def spawn_boss(self, ctx, boss_id: int = None):
+        """Triệu hồi boss thế giới tại kênh hiện tại (quản trị viên)"""
+        raid = await self.current_raid()
+        if raid is not None and not raid.defeated:
+            return await ctx.send(f"**{raid.boss.name}** vẫn đang xuất hiện!")
+
+        raid = await self.spawn(ctx.channel.id, boss_id)
+        if raid is None:
+            return await ctx.send("Không thể triệu hồi boss thế giới (sai id boss hoặc boss vừa được triệu hồi).")
+        await ctx.send("⚠️ Boss thế giới đã xuất hiện! Dùng `!tancong` để tấn công.", embed=self.status_embed(raid))
+
+
+async def setup(bot):
+    await bot.add_cog(WorldBossCog(bot))
@@ -7,13 +7,14 @@ import json
 import os
 from typing import List, Dict, Any, Optional, Union
 
-from database.mongo_handler import get_user_or_create, update_user, users_collection, sects_collection
+from database.mongo_handler import get_user_or_create, update_user, delete_user, sects_collection
 from config import (
-    CULTIVATION_REALMS, EMBED_COLOR, EMBED_COLOR_SUCCESS,
+    CULTIVATION_REALMS, REALMS, EMBED_COLOR, EMBED_COLOR_SUCCESS,
     EMBED_COLOR_ERROR, EMOJI_LINH_THACH, EMOJI_EXP
 )
 from utils.text_utils import format_number
-from utils.embed_utils import create_embed, create_success_embed, create_error_embed
+from utils.embed import create_embed, create_success_embed, create_error_embed
+from utils.cooldowns import cooldowns
 
 # Cấu hình logging
 logger = logging.getLogger("tutien-bot.admin")
@@ -51,16 +52,7 @@ class AdminCog(commands.Cog):
         await update_user(member.id, {"experience": amount})
 
         # Xác định cảnh giới mới
-        new_realm_id = old_realm_id
-        for realm in CULTIVATION_REALMS:
-            if realm["id"] > old_realm_id and amount >= realm["exp_required"]:
-                new_realm_id = realm["id"]
-            elif realm["id"] <= old_realm_id and amount < realm["exp_required"]:
-                new_realm_id = realm["id"] - 1
-                break
-
-        # Đảm bảo cảnh giới hợp lệ
-        new_realm_id = max(0, min(new_realm_id, len(CULTIVATION_REALMS) - 1))
+        new_realm_id = REALMS.id_for_exp(amount)
 
         # Cập nhật cảnh giới nếu có thay đổi
         if new_realm_id != old_realm_id:
@@ -123,10 +115,7 @@ class AdminCog(commands.Cog):
         await update_user(member.id, {"experience": new_exp})
 
         # Xác định cảnh giới mới
-        new_realm_id = old_realm_id
-        for realm in CULTIVATION_REALMS:
-            if realm["id"] > old_realm_id and new_exp >= realm["exp_required"]:
-                new_realm_id = realm["id"]
+        new_realm_id = max(old_realm_id, REALMS.id_for_exp(new_exp))
 
         # Cập nhật cảnh giới nếu có thay đổi
         if new_realm_id != old_realm_id:
@@ -311,8 +300,9 @@ class AdminCog(commands.Cog):
                         {"$pull": {"members": member.id}}
                     )
 
-            # Xóa dữ liệu người dùng
-            await users_collection.delete_one({"user_id": member.id})
+            # Xóa dữ liệu người dùng và thời gian hồi còn giữ trong bộ nhớ
+            await delete_user(member.id)
+            cooldowns.reset(member.id)
 
             # Tạo người dùng mới
             await get_user_or_create(member.id, member.name)
@@ -6,7 +6,7 @@ import logging
 import re
 from typing import Optional, Union
 
-from utils.embed_utils import create_embed, create_success_embed, create_error_embed
+from utils.embed import create_embed, create_success_embed, create_error_embed
 
 # Cấu hình logging
 logger = logging.getLogger("tutien-bot.moderation")
@@ -909,5 +909,5 @@ class ModerationCog(commands.Cog):
             await ctx.send(embed=embed)
 
 
-def setup(bot):
-    bot.add_cog(ModerationCog(bot))
+async def setup(bot):
+    await bot.add_cog(ModerationCog(bot))
@@ -1,200 +1,147 @@
 import discord
 from discord.ext import commands
 import asyncio
-import datetime
 import random
 import logging
 import math
 from typing import Dict, List
 
-from database.mongo_handler import get_user_or_create, update_user, add_user_linh_thach, add_user_exp
+from database.mongo_handler import (
+    get_user_or_create, add_user_linh_thach, add_user_exp, apply_batch_hunt, count_user_item
+)
+from utils.combat_engine import (
+    prepare_fighter, calculate_damage, resolve_combat, key_frames, log_lines,
+    resolve_many, monster_level_range, boss_level_range, combat_rewards
+)
+from utils.spawn_table import SpawnTable, current_area
+from utils.loot_table import compile_loot_tables
+from utils.cooldowns import cooldowns
+from utils.live_message import LiveMessage
+from utils.game_data import game_data
 from config import (
-    CULTIVATION_REALMS, COMBAT_COOLDOWN, DANHQUAI_COOLDOWN, DANHBOSS_COOLDOWN,
-    QUAI_MIN_REWARD, QUAI_MAX_REWARD, BOSS_MIN_REWARD, BOSS_MAX_REWARD,
-    COMBAT_WIN_REWARD, EMBED_COLOR, EMBED_COLOR_SUCCESS, EMBED_COLOR_ERROR,
-    EMOJI_ATTACK, EMOJI_DEFENSE, EMOJI_HEALTH, EMOJI_LINH_THACH, EMOJI_EXP,
-    get_power_multiplier
+    CULTIVATION_REALMS, COMBAT_MONSTERS, COMBAT_BOSSES, COMBAT_WIN_REWARD, COMBAT_MAX_FRAMES, COMBAT_FRAME_DELAY, EMBED_COLOR, EMBED_COLOR_SUCCESS, EMBED_COLOR_ERROR,
+    EMOJI_ATTACK, EMOJI_DEFENSE, EMOJI_HEALTH, EMOJI_LINH_THACH, EMOJI_EXP, EMOJI_LEVEL_UP,
+    HUNT_TICKET_ITEM_ID, BATCH_HUNT_MAX, SPAWN_DEFAULT_WEIGHT
 )
 
 # Cấu hình logging
 logger = logging.getLogger("tutien-bot.combat")
 
 
-class CombatCog(commands.Cog):
-    def __init__(self, bot):
-        self.bot = bot
-
-        # Danh sách quái vật
-        self.monsters = [
-            {"name": "Yêu Lang", "level": 1, "health": 100, "attack": 15, "defense": 5},
-            {"name": "Hắc Hổ", "level": 2, "health": 150, "attack": 25, "defense": 10},
-            {"name": "Độc Xà", "level": 3, "health": 200, "attack": 30, "defense": 15},
-            {"name": "Thiết Giáp Thú", "level": 4, "health": 250, "attack": 35, "defense": 25},
-            {"name": "U Linh", "level": 5, "health": 300, "attack": 40, "defense": 20},
-            {"name": "Hỏa Kỳ Lân", "level": 6, "health": 350, "attack": 50, "defense": 30},
-            {"name": "Bạch Cốt Ma", "level": 7, "health": 400, "attack": 60, "defense": 35},
-            {"name": "Thâm Hải Chi Long", "level": 8, "health": 500, "attack": 70, "defense": 40},
-            {"name": "Huyết Yêu", "level": 9, "health": 600, "attack": 80, "defense": 50},
-            {"name": "Thiên Ma", "level": 10, "health": 700, "attack": 90, "defense": 60},
-        ]
+def set_fighter_fields(embed, fighters, labels, hp):
+    """Ghi (hoặc cập nhật) hai ô thông tin của hai bên trong embed"""
+    for index, (fighter, label) in enumerate(zip(fighters, labels)):
+        name = f"{fighter['name']} [{label}]"
+        value = (f"{EMOJI_HEALTH} HP: {hp[index]}/{fighter['health']}\n"
+                 f"{EMOJI_ATTACK} Tấn công: {fighter['attack']}\n"
+                 f"{EMOJI_DEFENSE} Phòng thủ: {fighter['defense']}")
+        if len(embed.fields) > index:
+            embed.set_field_at(index, name=name, value=value, inline=True)
+        else:
+            embed.add_field(name=name, value=value, inline=True)
 
-        # Danh sách boss
-        self.bosses = [
-            {"name": "Hắc Long Vương", "level": 15, "health": 1000, "attack": 120, "defense": 80},
-            {"name": "Cửu Vĩ Yêu Hồ", "level": 18, "health": 1500, "attack": 150, "defense": 100},
-            {"name": "Ma Đế", "level": 20, "health": 2000, "attack": 180, "defense": 120},
-            {"name": "Tà Thần", "level": 25, "health": 3000, "attack": 250, "defense": 150},
-            {"name": "Thiên Ngoại Yêu Thi", "level": 30, "health": 5000, "attack": 350, "defense": 200},
-        ]
 
-    def get_random_monster(self, user_realm_id):
-        """Lấy một quái vật ngẫu nhiên dựa trên cảnh giới của người dùng"""
-        # Xác định phạm vi cấp độ quái vật
-        min_level = max(1, user_realm_id // 3)
-        max_level = min(len(self.monsters), min_level + 3)
+async def replay_combat(live, embed, fighters, labels, result,
+                        max_frames=COMBAT_MAX_FRAMES, delay=COMBAT_FRAME_DELAY):
+    """
+    Phát lại trận đấu đã giải xong bằng tối đa max_frames lần sửa tin nhắn
 
-        # Lọc quái vật trong phạm vi
-        suitable_monsters = [m for m in self.monsters if min_level <= m["level"] <= max_level]
+    live: LiveMessage của tin nhắn trận đấu. Khung hình cuối (kết quả, phần thưởng)
+    do nơi gọi tự gửi bằng live.edit() sau khi hàm này trả về.
+    """
+    for round_num in key_frames(result, max_frames):
+        await asyncio.sleep(delay)
+        if live.closed:
+            break
+        embed.description = "\n".join(log_lines(result, fighters, round_num, 5))  # Chỉ hiển thị 5 đòn gần nhất
+        set_fighter_fields(embed, fighters, labels, result.hp_after(round_num))
+        live.update(embed=embed.copy())
 
-        # Nếu không có quái vật phù hợp, lấy con yếu nhất
-        if not suitable_monsters:
-            return self.monsters[0]
+    await asyncio.sleep(delay)
+    set_fighter_fields(embed, fighters, labels, result.hp)
 
-        # Trả về quái vật ngẫu nhiên
-        return random.choice(suitable_monsters)
 
-    def get_random_boss(self, user_realm_id):
-        """Lấy một boss ngẫu nhiên dựa trên cảnh giới của người dùng"""
-        # Xác định phạm vi cấp độ boss
-        min_level = max(15, (user_realm_id * 2) // 3)
+class CombatCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
 
-        # Lọc boss trong phạm vi
-        suitable_bosses = [b for b in self.bosses if b["level"] >= min_level]
+        # Danh sách quái vật và boss
+        self.monsters = COMBAT_MONSTERS
+        self.bosses = COMBAT_BOSSES
 
-        # Nếu không có boss phù hợp, lấy con yếu nhất
-        if not suitable_bosses:
-            return self.bosses[0]
+        # Vật phẩm rơi, trọng số xuất hiện và khu vực theo tên quái vật (từ dữ liệu game dùng chung)
+        self.loot_tables = {}
+        self.spawn_data = {}
+        self.load_drop_tables()
 
-        # Trả về boss ngẫu nhiên
-        return random.choice(suitable_bosses)
+        # Cập nhật khi dữ liệu game được tải lại
+        game_data.subscribe("monsters", self.reload_drop_tables)
+        game_data.subscribe("bosses", self.reload_drop_tables)
 
-    def calculate_damage(self, attacker, defender):
-        """Tính toán sát thương"""
-        base_damage = max(1, attacker["attack"] - (defender["defense"] // 2))
+    async def cog_unload(self):
+        game_data.unsubscribe("monsters", self.reload_drop_tables)
+        game_data.unsubscribe("bosses", self.reload_drop_tables)
 
-        # Thêm yếu tố ngẫu nhiên (+-20%)
-        random_factor = random.uniform(0.8, 1.2)
+        # Ghi nốt các mốc thời gian hồi còn chờ
+        await cooldowns.flush()
 
-        # Tính toán sát thương cuối cùng
-        damage = int(base_damage * random_factor)
+    def load_drop_tables(self):
+        """Dựng bảng vật phẩm rơi và bảng chọn quái vật/boss theo cảnh giới từ dữ liệu quái vật, boss"""
+        monsters = game_data.monsters
+        self.loot_tables = compile_loot_tables(monsters)
+        self.spawn_data = {entry["name"]: entry for catalog in (monsters, game_data.bosses) for entry in catalog}
 
-        # Crit (10% cơ hội)
-        is_crit = random.random() < 0.1
-        if is_crit:
-            damage = int(damage * 1.5)
-
-        return damage, is_crit
-
-    async def simulate_combat(self, ctx, user, enemy, is_boss=False):
-        """Mô phỏng chiến đấu giữa người dùng và quái vật/boss"""
-        # Tạo embed cho trận đấu
-        embed = discord.Embed(
-            title=f"⚔️ {ctx.author.display_name} đối đầu với {enemy['name']}",
-            description=f"Trận chiến bắt đầu!",
-            color=EMBED_COLOR
+        self.monster_spawns = SpawnTable(
+            self.monsters, lambda realm_id: monster_level_range(realm_id, len(self.monsters)),
+            weight_of=self.spawn_weight, area_of=self.spawn_area
         )
+        self.boss_spawns = SpawnTable(self.bosses, boss_level_range,
+                                      weight_of=self.spawn_weight, area_of=self.spawn_area)
 
-        # Thông tin người chơi
-        player = {
-            "name": ctx.author.display_name,
-            "health": user["health"],
-            "attack": user["attack"],
-            "defense": user["defense"],
-            "realm_id": user["realm_id"]
-        }
-
-        # Áp dụng hệ số sức mạnh theo cảnh giới
-        power_multiplier = get_power_multiplier(player["realm_id"])
-        player["attack"] = int(player["attack"] * power_multiplier)
-        player["defense"] = int(player["defense"] * power_multiplier)
-        player["health"] = int(player["health"] * power_multiplier)
-
-        # Thêm thông tin người chơi và quái vật
-        embed.add_field(
-            name=f"{player['name']} [{CULTIVATION_REALMS[player['realm_id']]['name']}]",
-            value=f"{EMOJI_HEALTH} HP: {player['health']}\n{EMOJI_ATTACK} Tấn công: {player['attack']}\n{EMOJI_DEFENSE} Phòng thủ: {player['defense']}",
-            inline=True
-        )
+    def reload_drop_tables(self, catalog):
+        self.load_drop_tables()
 
-        embed.add_field(
-            name=f"{enemy['name']} [Cấp {enemy['level']}]",
-            value=f"{EMOJI_HEALTH} HP: {enemy['health']}\n{EMOJI_ATTACK} Tấn công: {enemy['attack']}\n{EMOJI_DEFENSE} Phòng thủ: {enemy['defense']}",
-            inline=True
-        )
+    def spawn_weight(self, enemy):
+        """Trọng số xuất hiện của quái vật theo dữ liệu JSON"""
+        return self.spawn_data.get(enemy["name"], enemy).get("spawn_weight", SPAWN_DEFAULT_WEIGHT)
 
-        # Gửi thông tin ban đầu
-        message = await ctx.send(embed=embed)
+    def spawn_area(self, enemy):
+        """Khu vực của quái vật theo dữ liệu JSON"""
+        data = self.spawn_data.get(enemy["name"], enemy)
+        return data.get("zone") or data.get("location")
 
-        # Mô phỏng chiến đấu
-        round_num = 1
-        player_hp = player["health"]
-        enemy_hp = enemy["health"]
-        battle_log = []
-
-        while player_hp > 0 and enemy_hp > 0:
-            # Người chơi tấn công trước
-            damage, is_crit = self.calculate_damage(player, enemy)
-            enemy_hp = max(0, enemy_hp - damage)
-
-            # Tạo log
-            crit_text = " (Chí mạng!)" if is_crit else ""
-            battle_log.append(
-                f"🔶 **Lượt {round_num}:** {player['name']} gây ra {damage} sát thương{crit_text}. {enemy['name']} còn {enemy_hp} HP.")
+    def get_random_monster(self, user_realm_id, area=None):
+        """Lấy một quái vật ngẫu nhiên dựa trên cảnh giới của người dùng"""
+        return self.monster_spawns.pick(user_realm_id, area)
 
-            # Nếu quái vật chết, kết thúc
-            if enemy_hp <= 0:
-                break
+    def get_random_boss(self, user_realm_id, area=None):
+        """Lấy một boss ngẫu nhiên dựa trên cảnh giới của người dùng"""
+        return self.boss_spawns.pick(user_realm_id, area)
 
-            # Quái vật tấn công
-            damage, is_crit = self.calculate_damage(enemy, player)
-            player_hp = max(0, player_hp - damage)
+    def calculate_damage(self, attacker, defender):
+        """Tính toán sát thương"""
+        return calculate_damage(attacker, defender)
 
-            # Tạo log
-            crit_text = " (Chí mạng!)" if is_crit else ""
-            battle_log.append(
-                f"🔷 **Lượt {round_num}:** {enemy['name']} gây ra {damage} sát thương{crit_text}. {player['name']} còn {player_hp} HP.")
+    async def simulate_combat(self, ctx, user, enemy, is_boss=False):
+        """Giải trận đấu giữa người dùng và quái vật/boss, ghi phần thưởng rồi phát lại trận đấu"""
+        # Thông tin hai bên (áp dụng hệ số sức mạnh theo cảnh giới cho người chơi)
+        fighters = [
+            prepare_fighter(ctx.author.display_name, user, user["realm_id"]),
+            prepare_fighter(enemy["name"], enemy, level=enemy["level"])
+        ]
+        labels = [CULTIVATION_REALMS[user["realm_id"]]["name"], f"Cấp {enemy['level']}"]
+        player, enemy_fighter = fighters
 
-            # Tăng số lượt
-            round_num += 1
+        # Giải toàn bộ trận đấu trước khi hiển thị
+        result = resolve_combat(fighters)
+        won = result.winner == 0
 
-            # Cập nhật embed
-            embed.description = "\n".join(battle_log[-5:])  # Chỉ hiển thị 5 lượt gần nhất
-            embed.set_field_at(0,
-                               name=f"{player['name']} [{CULTIVATION_REALMS[player['realm_id']]['name']}]",
-                               value=f"{EMOJI_HEALTH} HP: {player_hp}/{player['health']}\n{EMOJI_ATTACK} Tấn công: {player['attack']}\n{EMOJI_DEFENSE} Phòng thủ: {player['defense']}",
-                               inline=True
-                               )
-            embed.set_field_at(1,
-                               name=f"{enemy['name']} [Cấp {enemy['level']}]",
-                               value=f"{EMOJI_HEALTH} HP: {enemy_hp}/{enemy['health']}\n{EMOJI_ATTACK} Tấn công: {enemy['attack']}\n{EMOJI_DEFENSE} Phòng thủ: {enemy['defense']}",
-                               inline=True
-                               )
-
-            # Cập nhật tin nhắn
-            await message.edit(embed=embed)
-
-            # Tạm dừng để tạo hiệu ứng
-            await asyncio.sleep(1)
-
-        # Xác định người thắng
-        if player_hp > 0:
+        # Ghi phần thưởng ngay khi biết kết quả, không chờ phần phát lại
+        breakthrough_text = ""
+        if won:
             # Tính toán phần thưởng
-            if is_boss:
-                linh_thach = random.randint(BOSS_MIN_REWARD, BOSS_MAX_REWARD)
-                exp = enemy["level"] * 50
-            else:
-                linh_thach = random.randint(QUAI_MIN_REWARD, QUAI_MAX_REWARD)
-                exp = enemy["level"] * 20
+            stones_min, stones_max, exp = combat_rewards(enemy, is_boss)
+            linh_thach = random.randint(stones_min, stones_max)
 
             # Cộng phần thưởng
             await add_user_linh_thach(ctx.author.id, linh_thach)
@@ -207,16 +154,26 @@ class CombatCog(commands.Cog):
                 # Thông báo đột phá nếu có
                 if success:
                     breakthrough_text = f"\n{EMOJI_LEVEL_UP} Chúc mừng! Bạn đã đột phá lên **{new_realm}**!"
-                else:
-                    breakthrough_text = ""
             else:
-                breakthrough_text = ""
                 await add_user_exp(ctx.author.id, exp)
 
+        # Tạo embed cho trận đấu
+        embed = discord.Embed(
+            title=f"⚔️ {ctx.author.display_name} đối đầu với {enemy['name']}",
+            description=f"Trận chiến bắt đầu!",
+            color=EMBED_COLOR
+        )
+        set_fighter_fields(embed, fighters, labels, result.max_hp)
+
+        # Gửi thông tin ban đầu rồi phát lại các khung hình chính
+        live = LiveMessage(await ctx.send(embed=embed))
+        await replay_combat(live, embed, fighters, labels, result)
+
+        last_lines = "\n".join(log_lines(result, fighters, result.rounds, 3))
+        if won:
             # Cập nhật embed
             embed.color = EMBED_COLOR_SUCCESS
-            embed.description = f"**{player['name']} đã chiến thắng {enemy['name']} sau {round_num} lượt!**\n\n" + "\n".join(
-                battle_log[-3:])
+            embed.description = f"**{player['name']} đã chiến thắng {enemy_fighter['name']} sau {result.rounds} lượt!**\n\n" + last_lines
             embed.add_field(
                 name="Phần thưởng",
                 value=f"{EMOJI_LINH_THACH} **+{linh_thach}** linh thạch\n{EMOJI_EXP} **+{exp}** kinh nghiệm{breakthrough_text}",
@@ -225,84 +182,166 @@ class CombatCog(commands.Cog):
         else:
             # Cập nhật embed khi thua
             embed.color = EMBED_COLOR_ERROR
-            embed.description = f"**{player['name']} đã thất bại trước {enemy['name']} sau {round_num} lượt!**\n\n" + "\n".join(
-                battle_log[-3:])
+            embed.description = f"**{player['name']} đã thất bại trước {enemy_fighter['name']} sau {result.rounds} lượt!**\n\n" + last_lines
 
         # Cập nhật tin nhắn cuối cùng
-        await message.edit(embed=embed)
+        await live.edit(embed=embed)
 
         # Trả về kết quả
-        return player_hp > 0
+        return won
 
     @commands.command(name="danhquai", aliases=["dq", "hunt"])
     async def hunt_monster(self, ctx):
         """Đánh quái vật để nhận linh thạch và kinh nghiệm"""
+        # Kiểm tra và bắt đầu cooldown (đang hồi thì trả lời ngay, không đọc database)
+        remaining = await cooldowns.try_start(ctx.author.id, "danhquai")
+        if remaining:
+            minutes, seconds = divmod(remaining, 60)
+
+            embed = discord.Embed(
+                title="⏳ Cooldown",
+                description=f"Bạn cần nghỉ ngơi **{minutes} phút {seconds} giây** nữa mới có thể đánh quái tiếp!",
+                color=EMBED_COLOR_ERROR
+            )
+
+            return await ctx.send(embed=embed)
+
         # Lấy thông tin người dùng
         user = await get_user_or_create(ctx.author.id, ctx.author.name)
 
-        # Kiểm tra cooldown
-        now = datetime.datetime.now()
-        last_hunt = user.get("last_danhquai")
+        # Lấy quái vật ngẫu nhiên
+        monster = self.get_random_monster(user["realm_id"], current_area(user))
 
-        if last_hunt:
-            last_hunt = datetime.datetime.fromisoformat(last_hunt)
-            time_diff = (now - last_hunt).total_seconds()
+        # Mô phỏng chiến đấu
+        result = await self.simulate_combat(ctx, user, monster)
 
-            if time_diff < DANHQUAI_COOLDOWN:
-                remaining = DANHQUAI_COOLDOWN - time_diff
-                minutes, seconds = divmod(int(remaining), 60)
+    @commands.command(name="danhboss", aliases=["db"])
+    async def hunt_boss(self, ctx):
+        """Đánh boss để nhận nhiều linh thạch và kinh nghiệm hơn"""
+        # Kiểm tra và bắt đầu cooldown (đang hồi thì trả lời ngay, không đọc database)
+        remaining = await cooldowns.try_start(ctx.author.id, "danhboss")
+        if remaining:
+            minutes, seconds = divmod(remaining, 60)
 
-                embed = discord.Embed(
-                    title="⏳ Cooldown",
-                    description=f"Bạn cần nghỉ ngơi **{minutes} phút {seconds} giây** nữa mới có thể đánh quái tiếp!",
-                    color=EMBED_COLOR_ERROR
-                )
+            embed = discord.Embed(
+                title="⏳ Cooldown",
+                description=f"Bạn cần nghỉ ngơi **{minutes} phút {seconds} giây** nữa mới có thể đánh boss tiếp!",
+                color=EMBED_COLOR_ERROR
+            )
 
-                return await ctx.send(embed=embed)
+            return await ctx.send(embed=embed)
 
-        # Lấy quái vật ngẫu nhiên
-        monster = self.get_random_monster(user["realm_id"])
+        # Lấy thông tin người dùng
+        user = await get_user_or_create(ctx.author.id, ctx.author.name)
+
+        # Lấy boss ngẫu nhiên
+        boss = self.get_random_boss(user["realm_id"], current_area(user))
 
         # Mô phỏng chiến đấu
-        result = await self.simulate_combat(ctx, user, monster)
+        result = await self.simulate_combat(ctx, user, boss, is_boss=True)
 
-        # Cập nhật thời gian đánh quái
-        await update_user(ctx.author.id, {"last_danhquai": now.isoformat()})
+    @commands.command(name="sanquai", aliases=["autohunt", "sq"])
+    async def batch_hunt(self, ctx, so_tran: int = 10):
+        """Dùng Phù Săn Yêu để đánh nhanh nhiều trận với quái vật (mỗi trận một phù)"""
+        so_tran = max(1, min(so_tran, BATCH_HUNT_MAX))
 
-    @commands.command(name="danhboss", aliases=["db", "boss"])
-    async def hunt_boss(self, ctx):
-        """Đánh boss để nhận nhiều linh thạch và kinh nghiệm hơn"""
         # Lấy thông tin người dùng
         user = await get_user_or_create(ctx.author.id, ctx.author.name)
 
-        # Kiểm tra cooldown
-        now = datetime.datetime.now()
-        last_boss = user.get("last_danhboss")
+        # Kiểm tra số phù săn yêu
+        tickets = count_user_item(user, HUNT_TICKET_ITEM_ID)
+        if tickets < so_tran:
+            embed = discord.Embed(
+                title="❌ Không Đủ Phù Săn Yêu",
+                description=f"Bạn cần **{so_tran}** Phù Săn Yêu nhưng chỉ có **{tickets}**.\n"
+                            f"Nhận thêm phù khi điểm danh hàng ngày (`!diemdanh`).",
+                color=EMBED_COLOR_ERROR
+            )
+            return await ctx.send(embed=embed)
 
-        if last_boss:
-            last_boss = datetime.datetime.fromisoformat(last_boss)
-            time_diff = (now - last_boss).total_seconds()
+        # Giải toàn bộ các trận cùng lúc
+        player = prepare_fighter(ctx.author.display_name, user, user["realm_id"])
+        monsters = self.monster_spawns.pick_many(user["realm_id"], so_tran, current_area(user))
+        results = resolve_many([(player, monster) for monster in monsters])
+
+        # Cộng dồn phần thưởng của các trận thắng
+        wins = 0
+        total_exp = 0
+        total_linh_thach = 0
+        drops = {}
+        kills = {}
+        for monster, result in zip(monsters, results):
+            if result.winner != 0:
+                continue
+            wins += 1
+            kills[monster["name"]] = kills.get(monster["name"], 0) + 1
+
+            stones_min, stones_max, exp = combat_rewards(monster)
+            total_linh_thach += random.randint(stones_min, stones_max)
+            total_exp += exp
+
+        # Tung vật phẩm rơi một lần cho mỗi loại quái vật (kèm bảo hiểm vật phẩm hiếm)
+        pity = dict(user.get("loot_pity", {}))
+        for name, count in kills.items():
+            loot_table = self.loot_tables.get(name)
+            if loot_table is None:
+                continue
+            for item_id, quantity in loot_table.roll(count, pity).items():
+                drops[item_id] = drops.get(item_id, 0) + quantity
+
+        # Ghi toàn bộ kết quả (trừ phù, phần thưởng, vật phẩm, cảnh giới) trong một lần cập nhật
+        realms = await apply_batch_hunt(ctx.author.id, so_tran, total_exp, total_linh_thach, drops, pity)
+        if realms is None:
+            embed = discord.Embed(
+                title="❌ Không Đủ Phù Săn Yêu",
+                description="Số Phù Săn Yêu của bạn đã thay đổi, vui lòng thử lại.",
+                color=EMBED_COLOR_ERROR
+            )
+            return await ctx.send(embed=embed)
 
-            if time_diff < DANHBOSS_COOLDOWN:
-                remaining = DANHBOSS_COOLDOWN - time_diff
-                minutes, seconds = divmod(int(remaining), 60)
+        old_realm_id, new_realm_id = realms
 
-                embed = discord.Embed(
-                    title="⏳ Cooldown",
-                    description=f"Bạn cần nghỉ ngơi **{minutes} phút {seconds} giây** nữa mới có thể đánh boss tiếp!",
-                    color=EMBED_COLOR_ERROR
-                )
+        # Tạo embed tổng kết
+        embed = discord.Embed(
+            title=f"⚔️ {ctx.author.display_name} săn quái {so_tran} trận",
+            description=f"Thắng **{wins}** / Thua **{so_tran - wins}** (đã dùng {so_tran} Phù Săn Yêu)",
+            color=EMBED_COLOR_SUCCESS if wins else EMBED_COLOR_ERROR
+        )
 
-                return await ctx.send(embed=embed)
+        if kills:
+            embed.add_field(
+                name="Quái vật bị hạ",
+                value="\n".join(f"{name} ×{count}" for name, count in sorted(kills.items(), key=lambda k: -k[1])),
+                inline=True
+            )
 
-        # Lấy boss ngẫu nhiên
-        boss = self.get_random_boss(user["realm_id"])
+        embed.add_field(
+            name="Phần thưởng",
+            value=f"{EMOJI_LINH_THACH} **+{total_linh_thach:,}** linh thạch\n{EMOJI_EXP} **+{total_exp:,}** kinh nghiệm",
+            inline=True
+        )
 
-        # Mô phỏng chiến đấu
-        result = await self.simulate_combat(ctx, user, boss, is_boss=True)
+        if drops:
+            embed.add_field(
+                name="Vật phẩm rơi",
+                value="\n".join(f"{game_data.items.name_of(item_id)} ×{quantity}"
+                                 for item_id, quantity in sorted(drops.items())),
+                inline=False
+            )
 
-        # Cập nhật thời gian đánh boss
-        await update_user(ctx.author.id, {"last_danhboss": now.isoformat()})
+        # Thông báo đột phá nếu có
+        if new_realm_id > old_realm_id:
+            embed.add_field(
+                name=f"{EMOJI_LEVEL_UP} Đột phá",
+                value=f"Chúc mừng! Bạn đã đột phá lên **{CULTIVATION_REALMS[new_realm_id]['name']}**!",
+                inline=False
+            )
+            cultivation_cog = self.bot.get_cog("CultivationCog")
+            if cultivation_cog:
+                await cultivation_cog.announce_breakthrough(ctx.author.id, new_realm_id)
+
+        embed.set_footer(text=f"Phù Săn Yêu còn lại: {tickets - so_tran}")
+        await ctx.send(embed=embed)
 
     @commands.command(name="combat", aliases=["pvp", "pk"])
     async def combat_pvp(self, ctx, opponent: discord.Member = None):
@@ -334,28 +373,21 @@ class CombatCog(commands.Cog):
             )
             return await ctx.send(embed=embed)
 
-        # Lấy thông tin người dùng
-        user = await get_user_or_create(ctx.author.id, ctx.author.name)
+        # Kiểm tra cooldown (đang hồi thì trả lời ngay, không đọc database)
+        remaining = await cooldowns.remaining(ctx.author.id, "combat")
+        if remaining:
+            minutes, seconds = divmod(remaining, 60)
 
-        # Kiểm tra cooldown
-        now = datetime.datetime.now()
-        last_combat = user.get("last_combat")
-
-        if last_combat:
-            last_combat = datetime.datetime.fromisoformat(last_combat)
-            time_diff = (now - last_combat).total_seconds()
-
-            if time_diff < COMBAT_COOLDOWN:
-                remaining = COMBAT_COOLDOWN - time_diff
-                minutes, seconds = divmod(int(remaining), 60)
+            embed = discord.Embed(
+                title="⏳ Cooldown",
+                description=f"Bạn cần nghỉ ngơi **{minutes} phút {seconds} giây** nữa mới có thể thách đấu tiếp!",
+                color=EMBED_COLOR_ERROR
+            )
 
-                embed = discord.Embed(
-                    title="⏳ Cooldown",
-                    description=f"Bạn cần nghỉ ngơi **{minutes} phút {seconds} giây** nữa mới có thể thách đấu tiếp!",
-                    color=EMBED_COLOR_ERROR
-                )
+            return await ctx.send(embed=embed)
 
-                return await ctx.send(embed=embed)
+        # Lấy thông tin người dùng
+        user = await get_user_or_create(ctx.author.id, ctx.author.name)
 
         # Lấy thông tin đối thủ
         opponent_user = await get_user_or_create(opponent.id, opponent.name)
@@ -397,7 +429,7 @@ class CombatCog(commands.Cog):
 
         try:
             # Chờ phản ứng
-            reaction, user = await self.bot.wait_for("reaction_add", timeout=60.0, check=check)
+            reaction, _ = await self.bot.wait_for("reaction_add", timeout=60.0, check=check)
 
             # Nếu từ chối
             if str(reaction.emoji) == "❌":
@@ -410,132 +442,39 @@ class CombatCog(commands.Cog):
             embed.description = f"{opponent.display_name} đã chấp nhận thách đấu! Trận chiến bắt đầu!"
             await challenge_msg.edit(embed=embed)
 
-            # Chuẩn bị thông tin người chơi
-            player = {
-                "name": ctx.author.display_name,
-                "health": user["health"],
-                "attack": user["attack"],
-                "defense": user["defense"],
-                "realm_id": user["realm_id"]
-            }
-
-            opponent_player = {
-                "name": opponent.display_name,
-                "health": opponent_user["health"],
-                "attack": opponent_user["attack"],
-                "defense": opponent_user["defense"],
-                "realm_id": opponent_user["realm_id"]
-            }
-
-            # Áp dụng hệ số sức mạnh theo cảnh giới
-            player_multiplier = get_power_multiplier(player["realm_id"])
-            player["attack"] = int(player["attack"] * player_multiplier)
-            player["defense"] = int(player["defense"] * player_multiplier)
-            player["health"] = int(player["health"] * player_multiplier)
-
-            opponent_multiplier = get_power_multiplier(opponent_player["realm_id"])
-            opponent_player["attack"] = int(opponent_player["attack"] * opponent_multiplier)
-            opponent_player["defense"] = int(opponent_player["defense"] * opponent_multiplier)
-            opponent_player["health"] = int(opponent_player["health"] * opponent_multiplier)
-
-            # Mô phỏng chiến đấu
-            round_num = 1
-            player_hp = player["health"]
-            opponent_hp = opponent_player["health"]
-            battle_log = []
+            # Chuẩn bị thông tin người chơi (áp dụng hệ số sức mạnh theo cảnh giới)
+            fighters = [
+                prepare_fighter(ctx.author.display_name, user, user["realm_id"]),
+                prepare_fighter(opponent.display_name, opponent_user, opponent_user["realm_id"])
+            ]
+            labels = [player_realm, opponent_realm]
+            player, opponent_player = fighters
 
             # Ai có tốc độ cao hơn sẽ đánh trước (dựa trên cảnh giới)
-            player_goes_first = player["realm_id"] >= opponent_player["realm_id"]
-
-            while player_hp > 0 and opponent_hp > 0:
-                # Xác định thứ tự tấn công
-                if player_goes_first:
-                    first_attacker, second_attacker = player, opponent_player
-                    first_hp, second_hp = player_hp, opponent_hp
-                else:
-                    first_attacker, second_attacker = opponent_player, player
-                    first_hp, second_hp = opponent_hp, player_hp
-
-                # Người đánh trước tấn công
-                damage, is_crit = self.calculate_damage(first_attacker, second_attacker)
-                second_hp = max(0, second_hp - damage)
-
-                # Tạo log
-                crit_text = " (Chí mạng!)" if is_crit else ""
-                battle_log.append(
-                    f"🔶 **Lượt {round_num}:** {first_attacker['name']} gây ra {damage} sát thương{crit_text}. {second_attacker['name']} còn {second_hp} HP.")
-
-                # Nếu người thứ hai chết, kết thúc
-                if second_hp <= 0:
-                    break
-
-                # Người thứ hai tấn công
-                damage, is_crit = self.calculate_damage(second_attacker, first_attacker)
-                first_hp = max(0, first_hp - damage)
-
-                # Tạo log
-                crit_text = " (Chí mạng!)" if is_crit else ""
-                battle_log.append(
-                    f"🔷 **Lượt {round_num}:** {second_attacker['name']} gây ra {damage} sát thương{crit_text}. {first_attacker['name']} còn {first_hp} HP.")
-
-                # Cập nhật HP
-                if player_goes_first:
-                    player_hp, opponent_hp = first_hp, second_hp
-                else:
-                    opponent_hp, player_hp = first_hp, second_hp
-
-                # Tăng số lượt
-                round_num += 1
-
-                # Cập nhật embed
-                embed.description = "\n".join(battle_log[-5:])  # Chỉ hiển thị 5 lượt gần nhất
-                embed.set_field_at(0,
-                                   name=f"{player['name']} [{CULTIVATION_REALMS[player['realm_id']]['name']}]",
-                                   value=f"{EMOJI_HEALTH} HP: {player_hp}/{player['health']}\n{EMOJI_ATTACK} Tấn công: {player['attack']}\n{EMOJI_DEFENSE} Phòng thủ: {player['defense']}",
-                                   inline=True
-                                   )
-                embed.set_field_at(1,
-                                   name=f"{opponent_player['name']} [{CULTIVATION_REALMS[opponent_player['realm_id']]['name']}]",
-                                   value=f"{EMOJI_HEALTH} HP: {opponent_hp}/{opponent_player['health']}\n{EMOJI_ATTACK} Tấn công: {opponent_player['attack']}\n{EMOJI_DEFENSE} Phòng thủ: {opponent_player['defense']}",
-                                   inline=True
-                                   )
-
-                # Cập nhật tin nhắn
-                await challenge_msg.edit(embed=embed)
+            first = 0 if player["realm_id"] >= opponent_player["realm_id"] else 1
 
-                # Tạm dừng để tạo hiệu ứng
-                await asyncio.sleep(1)
+            # Giải toàn bộ trận đấu trước khi hiển thị
+            result = resolve_combat(fighters, first=first)
 
-            # Xác định người thắng
-            if player_hp > 0:
-                winner = ctx.author
-                loser = opponent
-                winner_user = user
-
-                # Cập nhật embed
-                embed.color = EMBED_COLOR_SUCCESS
-                embed.description = f"**{player['name']} đã chiến thắng {opponent_player['name']} sau {round_num} lượt!**\n\n" + "\n".join(
-                    battle_log[-3:])
+            if result.winner == 0:
+                winner, loser = ctx.author, opponent
+                winner_name, loser_name = player["name"], opponent_player["name"]
             else:
-                winner = opponent
-                loser = ctx.author
-                winner_user = opponent_user
+                winner, loser = opponent, ctx.author
+                winner_name, loser_name = opponent_player["name"], player["name"]
 
-                # Cập nhật embed
-                embed.color = EMBED_COLOR_ERROR
-                embed.description = f"**{opponent_player['name']} đã chiến thắng {player['name']} sau {round_num} lượt!**\n\n" + "\n".join(
-                    battle_log[-3:])
+            # Ghi phần thưởng và thời gian combat ngay khi biết kết quả
+            cooldowns.start(ctx.author.id, "combat")
 
             # Thưởng linh thạch cho người thắng
             await add_user_linh_thach(winner.id, COMBAT_WIN_REWARD)
 
-            # Thêm kinh nghiệm cho cả hai
+            # Thêm kinh nghiệm cho cả hai (người thắng nhận nhiều kinh nghiệm hơn)
+            win_exp = 50
+            lose_exp = 20
+            breakthrough_text = ""
             cultivation_cog = self.bot.get_cog("CultivationCog")
             if cultivation_cog:
-                # Người thắng nhận nhiều kinh nghiệm hơn
-                win_exp = 50
-                lose_exp = 20
-
                 # Thêm kinh nghiệm và kiểm tra đột phá
                 win_success, win_realm = await cultivation_cog.add_exp(winner.id, win_exp,
                                                                        f"thắng PvP với {loser.display_name}")
@@ -543,20 +482,25 @@ class CombatCog(commands.Cog):
                                                                          f"thua PvP với {winner.display_name}")
 
                 # Thông báo đột phá
-                breakthrough_text = ""
                 if win_success:
                     breakthrough_text += f"\n{EMOJI_LEVEL_UP} {winner.mention} đã đột phá lên **{win_realm}**!"
                 if lose_success:
                     breakthrough_text += f"\n{EMOJI_LEVEL_UP} {loser.mention} đã đột phá lên **{lose_realm}**!"
             else:
-                win_exp = 50
-                lose_exp = 20
-                breakthrough_text = ""
-
                 # Thêm kinh nghiệm
                 await add_user_exp(winner.id, win_exp)
                 await add_user_exp(loser.id, lose_exp)
 
+            # Phát lại các khung hình chính
+            live = LiveMessage(challenge_msg)
+            set_fighter_fields(embed, fighters, labels, result.max_hp)
+            await replay_combat(live, embed, fighters, labels, result)
+
+            # Cập nhật embed
+            embed.color = EMBED_COLOR_SUCCESS if result.winner == 0 else EMBED_COLOR_ERROR
+            embed.description = f"**{winner_name} đã chiến thắng {loser_name} sau {result.rounds} lượt!**\n\n" + "\n".join(
+                log_lines(result, fighters, result.rounds, 3))
+
             # Thêm thông tin phần thưởng vào embed
             embed.add_field(
                 name="Phần thưởng",
@@ -572,10 +516,7 @@ class CombatCog(commands.Cog):
             )
 
             # Cập nhật tin nhắn cuối cùng
-            await challenge_msg.edit(embed=embed)
-
-            # Cập nhật thời gian combat cho người gọi lệnh
-            await update_user(ctx.author.id, {"last_combat": now.isoformat()})
+            await live.edit(embed=embed)
 
         except asyncio.TimeoutError:
             # Nếu hết thời gian
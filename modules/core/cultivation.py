@@ -3,35 +3,114 @@ from discord.ext import commands, tasks
 import asyncio
 import datetime
 import random
+import time
+import uuid
 import logging
 from typing import Dict, List
 
-from database.mongo_handler import get_user_or_create, update_user, add_user_exp
+from pymongo import UpdateOne, DeleteOne
+
+from database.mongo_handler import (
+    MongoHandler, get_user_or_create, get_user_view, find_user_views, grant_user_exp,
+    bulk_inc_user_exp, check_exp_promotions
+)
+from database.user_views import RealmView, to_view
+from database.exp_buffer import ExpBuffer
 from config import (
-    CULTIVATION_REALMS, EXP_PER_MESSAGE, EXP_PER_MINUTE_VOICE,
-    VOICE_CHECK_INTERVAL, EMBED_COLOR, EMOJI_EXP, EMOJI_LEVEL_UP
+    VOICE_SESSIONS_COLLECTION, REALMS, EXP_PER_MESSAGE, EXP_PER_MINUTE_VOICE,
+    VOICE_CHECK_INTERVAL, EXP_FLUSH_INTERVAL, EXP_FLUSH_THRESHOLD, ANNOUNCE_CONCURRENCY,
+    EMBED_COLOR, EMOJI_EXP, EMOJI_LEVEL_UP
 )
 
 # Cấu hình logging
 logger = logging.getLogger("tutien-bot.cultivation")
 
 # Theo dõi người dùng đang trong voice chat
-voice_users = {}  # {user_id: {"channel_id": channel_id, "start_time": datetime, "last_check": datetime}}
+voice_users = {}  # {user_id: {"guild_id": id, "channel_id": id, "start_time": datetime, "last_check": datetime}}
+
+# Phiên voice cần lưu/xóa ở lần ghi checkpoint kế tiếp (không ghi database trong từng sự kiện voice)
+dirty_voice_sessions = set()
+ended_voice_sessions = set()
+
+
+def is_cultivating_in_voice(member) -> bool:
+    """Thành viên có đang tu luyện trong voice không, chỉ dựa trên VoiceState đã cache"""
+    voice = member.voice
+    if member.bot or voice is None or voice.channel is None:
+        return False
+
+    # Kênh AFK hoặc tự tắt nghe không được tính
+    if voice.afk or voice.self_deaf or voice.deaf:
+        return False
+    afk_channel = member.guild.afk_channel
+    if afk_channel is not None and voice.channel.id == afk_channel.id:
+        return False
+
+    # Phải có ít nhất một người (không phải bot) khác trong kênh
+    return any(not other.bot and other.id != member.id for other in voice.channel.members)
 
 
 class CultivationCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.mongo_handler = MongoHandler()
+        self.exp_buffer = ExpBuffer(EXP_FLUSH_THRESHOLD)
+        self._flush_task = None
+        self._announce_semaphore = asyncio.Semaphore(ANNOUNCE_CONCURRENCY)
+
+        # Thống kê thời gian mỗi lượt voice_check (mili giây)
+        self.voice_tick_stats = {"last_ms": 0.0, "max_ms": 0.0, "users": 0}
+
         self.voice_check.start()
+        self.exp_flush.start()
 
-    def cog_unload(self):
+    async def cog_unload(self):
         self.voice_check.cancel()
+        self.exp_flush.cancel()
+
+        # Ghi nốt kinh nghiệm còn trong bộ đệm (cũng được gọi khi bot tắt)
+        await self.flush_exp()
+        await self.checkpoint_voice_sessions()
+
+    @tasks.loop(seconds=EXP_FLUSH_INTERVAL)
+    async def exp_flush(self):
+        """Định kỳ ghi kinh nghiệm chat tích lũy vào database"""
+        await self.flush_exp()
+
+    @exp_flush.before_loop
+    async def before_exp_flush(self):
+        await self.bot.wait_until_ready()
+
+    async def flush_exp(self):
+        """Ghi bộ đệm kinh nghiệm và thông báo các lần đột phá"""
+        promotions = await self.exp_buffer.flush()
+        await self.announce_promotions(promotions)
+
+    async def announce_promotions(self, promotions):
+        """Thông báo đồng thời các lần đột phá, giới hạn số thông báo gửi cùng lúc"""
+
+        async def announce(user_id, new_realm_id):
+            async with self._announce_semaphore:
+                try:
+                    await self.announce_breakthrough(user_id, new_realm_id)
+                except Exception as e:
+                    logger.error(f"Lỗi khi thông báo đột phá cho {user_id}: {e}")
+
+        await asyncio.gather(*(announce(user_id, new_realm_id) for user_id, _, new_realm_id in promotions))
+
+    def request_flush(self):
+        """Lên lịch ghi bộ đệm ngay nếu chưa có lần ghi nào đang chạy"""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self.flush_exp())
 
     @tasks.loop(seconds=VOICE_CHECK_INTERVAL)
     async def voice_check(self):
         """Kiểm tra và cộng kinh nghiệm cho người dùng trong voice chat"""
+        tick_start = time.perf_counter()
         now = datetime.datetime.now()
         users_to_remove = []
+        grants = {}
+        previous_checks = {}  # {user_id: last_check cũ} để khôi phục nếu ghi lỗi
 
         for user_id, data in voice_users.items():
             # Tính toán thời gian từ lần check cuối
@@ -40,28 +119,146 @@ class CultivationCog(commands.Cog):
 
             # Nếu đã trôi qua ít nhất 1 phút
             if time_diff >= 1:
-                # Tính toán kinh nghiệm
-                exp_gain = int(time_diff * EXP_PER_MINUTE_VOICE)
-
-                # Cộng kinh nghiệm
-                await self.add_exp(user_id, exp_gain, f"tu luyện Voice Chat ({int(time_diff)} phút)")
+                # Tính toán kinh nghiệm, ghi chung một lần cho tất cả người dùng
+                grants[user_id] = int(time_diff * EXP_PER_MINUTE_VOICE)
 
-                # Cập nhật thời gian kiểm tra
-                voice_users[user_id]["last_check"] = now
+                # Chuyển mốc ngay trước khi chờ ghi, end_voice_tracking chen vào chỉ tính phần sau mốc này
+                previous_checks[user_id] = last_check
+                data["last_check"] = now
 
-                # Kiểm tra xem người dùng còn trong voice chat không
-                member = self.bot.get_user(user_id)
-                if not member:
-                    # Bot không thể tìm thấy thành viên, có thể đã offline
+                # Kiểm tra xem người dùng còn tu luyện trong voice chat không (theo VoiceState đã cache)
+                guild = self.bot.get_guild(data["guild_id"])
+                member = guild.get_member(user_id) if guild else None
+                if not member or not is_cultivating_in_voice(member):
                     users_to_remove.append(user_id)
 
         # Xóa các người dùng đã rời voice
         for user_id in users_to_remove:
             del voice_users[user_id]
+            ended_voice_sessions.add(user_id)
+
+        # Cộng kinh nghiệm bằng một bulk_write và một truy vấn kiểm tra đột phá
+        promotions = []
+        if grants:
+            batch_id = uuid.uuid4().hex
+            written = grants
+            try:
+                failed = await bulk_inc_user_exp(grants, batch_id=batch_id)
+            except Exception as e:
+                # Không rõ lô đã được ghi hay chưa: giao lô (cùng batch_id) cho bộ đệm gửi lại,
+                # server bỏ qua nếu đã cộng nên giữ nguyên mốc last_check mới
+                logger.error(f"Lỗi khi cộng kinh nghiệm voice cho {len(grants)} người dùng: {e}")
+                self.exp_buffer.retry_batch(batch_id, grants)
+                self.request_flush()
+                written, failed = {}, {}
+
+            # Chỉ hoàn tác những người chưa được cộng
+            for user_id, exp_amount in failed.items():
+                data = voice_users.get(user_id)
+                if data is not None and data["last_check"] == now:
+                    # Trả lại mốc cũ để lượt sau cộng bù
+                    data["last_check"] = previous_checks[user_id]
+                elif self.exp_buffer.add(user_id, exp_amount):
+                    # Người dùng đã rời voice: chuyển phần kinh nghiệm này sang bộ đệm
+                    self.request_flush()
+
+            # Kinh nghiệm đã ghi thì không hoàn tác, lỗi kiểm tra đột phá để bộ đệm kiểm tra lại
+            applied = [user_id for user_id in written if user_id not in failed]
+            try:
+                promotions = await check_exp_promotions(applied)
+            except Exception as e:
+                logger.error(f"Lỗi khi kiểm tra đột phá voice cho {len(applied)} người dùng: {e}")
+                self.exp_buffer.unchecked.update(applied)
+                self.request_flush()
+
+        elapsed_ms = (time.perf_counter() - tick_start) * 1000
+        self.voice_tick_stats = {
+            "last_ms": elapsed_ms,
+            "max_ms": max(self.voice_tick_stats["max_ms"], elapsed_ms),
+            "users": len(grants)
+        }
+        if elapsed_ms > VOICE_CHECK_INTERVAL * 1000:
+            logger.warning(f"Lượt voice_check mất {elapsed_ms:.0f}ms, lâu hơn chu kỳ {VOICE_CHECK_INTERVAL}s")
+
+        # Lưu các phiên voice mới bắt đầu/kết thúc
+        await self.checkpoint_voice_sessions()
+
+        # Thông báo đột phá không tính vào thời gian ghi database
+        await self.announce_promotions(promotions)
 
     @voice_check.before_loop
     async def before_voice_check(self):
         await self.bot.wait_until_ready()
+        try:
+            await self.reconcile_voice_sessions()
+        except Exception as e:
+            # Không để lỗi database làm dừng hẳn vòng voice_check
+            logger.error(f"Lỗi khi dựng lại các phiên voice: {e}")
+
+    async def reconcile_voice_sessions(self):
+        """Dựng lại các phiên voice từ trạng thái kênh voice hiện tại (sau khi khởi động lại)"""
+        now = datetime.datetime.now()
+
+        # Thời điểm bắt đầu đã lưu trước khi khởi động lại (một truy vấn)
+        cursor = await self.mongo_handler.find_async(VOICE_SESSIONS_COLLECTION, {}, {"_id": 0})
+        checkpoints = {session["user_id"]: session async for session in cursor}
+
+        for guild in self.bot.guilds:
+            for channel in guild.voice_channels:
+                for member in channel.members:
+                    if member.id in voice_users or not is_cultivating_in_voice(member):
+                        continue
+
+                    checkpoint = checkpoints.get(member.id)
+                    voice_users[member.id] = {
+                        "guild_id": guild.id,
+                        "channel_id": channel.id,
+                        "start_time": checkpoint["start_time"] if checkpoint else now,
+                        # Kinh nghiệm trong lúc bot tắt không được cộng
+                        "last_check": now
+                    }
+                    if not checkpoint or checkpoint.get("channel_id") != channel.id:
+                        dirty_voice_sessions.add(member.id)
+
+        # Các phiên đã kết thúc trong lúc bot tắt
+        ended_voice_sessions.update(checkpoints.keys() - voice_users.keys())
+        await self.checkpoint_voice_sessions()
+
+        logger.info(f"Đã khôi phục {len(voice_users)} phiên voice ({len(checkpoints)} phiên đã lưu)")
+
+    async def checkpoint_voice_sessions(self):
+        """Ghi các phiên voice đã thay đổi vào database bằng một bulk_write"""
+        if not dirty_voice_sessions and not ended_voice_sessions:
+            return
+
+        dirty = dirty_voice_sessions & voice_users.keys()
+        ended = ended_voice_sessions - voice_users.keys()
+        dirty_voice_sessions.clear()
+        ended_voice_sessions.clear()
+
+        operations = [
+            UpdateOne(
+                {"user_id": user_id},
+                {"$set": {
+                    "guild_id": voice_users[user_id]["guild_id"],
+                    "channel_id": voice_users[user_id]["channel_id"],
+                    "start_time": voice_users[user_id]["start_time"]
+                }},
+                upsert=True
+            )
+            for user_id in dirty
+        ]
+        operations.extend(DeleteOne({"user_id": user_id}) for user_id in ended)
+        if not operations:
+            return
+
+        try:
+            await self.mongo_handler.bulk_write_async(VOICE_SESSIONS_COLLECTION, operations, ordered=False)
+        except Exception as e:
+            # Ghi lại ở lượt sau
+            dirty_voice_sessions.update(dirty)
+            ended_voice_sessions.update(ended)
+            logger.error(f"Lỗi khi lưu {len(operations)} phiên voice: {e}")
 
     @commands.command(name="canhgioi", aliases=["cg", "realm"])
     async def check_realm(self, ctx, member: discord.Member = None):
@@ -70,21 +267,23 @@ class CultivationCog(commands.Cog):
         if member is None:
             member = ctx.author
 
-        # Lấy dữ liệu người dùng
-        user = await get_user_or_create(member.id, member.name)
+        # Lấy dữ liệu người dùng (chỉ cảnh giới và kinh nghiệm)
+        user = await get_user_view(member.id, RealmView)
+        if user is None:
+            user = to_view(RealmView, await get_user_or_create(member.id, member.name))
 
         # Lấy thông tin cảnh giới
-        realm_id = user["realm_id"]
-        realm = next((r for r in CULTIVATION_REALMS if r["id"] == realm_id), CULTIVATION_REALMS[0])
+        realm_id = user.realm_id
+        realm = REALMS.get(realm_id, REALMS.get(0))
 
         # Tính toán thông tin kinh nghiệm
-        current_exp = user["experience"]
+        current_exp = user.experience
 
         # Xác định cảnh giới tiếp theo
         next_realm = None
         exp_to_next = 0
-        if realm_id < len(CULTIVATION_REALMS) - 1:
-            next_realm = next((r for r in CULTIVATION_REALMS if r["id"] == realm_id + 1), None)
+        if realm_id < REALMS.max_id:
+            next_realm = REALMS.next(realm_id)
             if next_realm:
                 exp_to_next = next_realm["exp_required"] - current_exp
 
@@ -129,9 +328,7 @@ class CultivationCog(commands.Cog):
     async def show_ranking(self, ctx):
         """Hiển thị bảng xếp hạng tu luyện"""
         # Lấy dữ liệu từ database
-        from database.mongo_handler import users_collection
-        cursor = users_collection.find().sort("experience", -1).limit(10)
-        users = await cursor.to_list(length=10)
+        users = await find_user_views(RealmView, sort=[("experience", -1)], limit=10)
 
         # Tạo embed
         embed = discord.Embed(
@@ -143,78 +340,66 @@ class CultivationCog(commands.Cog):
         # Thêm thông tin từng người
         for i, user in enumerate(users, 1):
             # Lấy thông tin cảnh giới
-            realm_id = user["realm_id"]
-            realm = next((r for r in CULTIVATION_REALMS if r["id"] == realm_id), CULTIVATION_REALMS[0])
+            realm_id = user.realm_id
+            realm = REALMS.get(realm_id, REALMS.get(0))
 
             # Lấy thông tin thành viên
-            member = ctx.guild.get_member(user["user_id"])
-            name = member.display_name if member else user["username"]
+            member = ctx.guild.get_member(user.user_id)
+            name = member.display_name if member else user.username
 
             # Thêm vào embed
             embed.add_field(
                 name=f"{i}. {name}",
-                value=f"Cảnh giới: **{realm['name']}**\nKinh nghiệm: **{user['experience']:,}**",
+                value=f"Cảnh giới: **{realm['name']}**\nKinh nghiệm: **{user.experience:,}**",
                 inline=False
             )
 
         # Gửi embed
         await ctx.send(embed=embed)
 
-    async def add_exp(self, user_id, exp_amount, source=""):
-        """Thêm kinh nghiệm cho người dùng và xử lý đột phá cảnh giới"""
-        # Lấy thông tin người dùng
-        user = await get_user_or_create(user_id, str(user_id))
+    async def announce_breakthrough(self, user_id, new_realm_id):
+        """Thông báo người dùng đã đột phá lên cảnh giới mới"""
+        # Lấy thông tin cảnh giới mới
+        new_realm = REALMS.get(new_realm_id)
+
+        # Lấy người dùng để thông báo
+        member = self.bot.get_user(user_id)
+        if member:
+            # Tạo embed thông báo
+            embed = discord.Embed(
+                title=f"{EMOJI_LEVEL_UP} Đột Phá Thành Công!",
+                description=f"Chúc mừng {member.mention} đã đột phá lên **{new_realm['name']}**!",
+                color=discord.Color.gold()
+            )
+
+            # Gửi thông báo đến kênh chung
+            for guild in self.bot.guilds:
+                member_in_guild = guild.get_member(user_id)
+                if member_in_guild:
+                    # Tìm kênh general
+                    general_channel = discord.utils.get(guild.text_channels, name="general")
+                    if general_channel:
+                        await general_channel.send(embed=embed)
+                        break
+
+            # Gửi tin nhắn riêng
+            try:
+                await member.send(embed=embed)
+            except:
+                pass  # Bỏ qua nếu không gửi được DM
 
-        # Cộng kinh nghiệm
-        old_exp = user["experience"]
-        old_realm_id = user["realm_id"]
-        await add_user_exp(user_id, exp_amount)
+            logger.info(f"{member.name} đã đột phá lên {new_realm['name']}")
 
-        # Lấy thông tin người dùng sau khi cập nhật
-        user = await get_user_or_create(user_id, str(user_id))
-        new_exp = user["experience"]
+        return new_realm
 
-        # Kiểm tra xem có đột phá cảnh giới không
-        new_realm_id = old_realm_id
-        for realm in CULTIVATION_REALMS:
-            if realm["id"] > old_realm_id and new_exp >= realm["exp_required"]:
-                new_realm_id = realm["id"]
+    async def add_exp(self, user_id, exp_amount, source=""):
+        """Thêm kinh nghiệm cho người dùng và xử lý đột phá cảnh giới"""
+        # Cộng kinh nghiệm và tính lại cảnh giới trong một thao tác nguyên tử
+        old_realm_id, new_realm_id = await grant_user_exp(user_id, exp_amount)
 
         # Nếu có đột phá
         if new_realm_id > old_realm_id:
-            # Cập nhật cảnh giới
-            await update_user(user_id, {"realm_id": new_realm_id})
-
-            # Lấy thông tin cảnh giới mới
-            new_realm = next((r for r in CULTIVATION_REALMS if r["id"] == new_realm_id), None)
-
-            # Lấy người dùng để thông báo
-            member = self.bot.get_user(user_id)
-            if member:
-                # Tạo embed thông báo
-                embed = discord.Embed(
-                    title=f"{EMOJI_LEVEL_UP} Đột Phá Thành Công!",
-                    description=f"Chúc mừng {member.mention} đã đột phá lên **{new_realm['name']}**!",
-                    color=discord.Color.gold()
-                )
-
-                # Gửi thông báo đến kênh chung
-                for guild in self.bot.guilds:
-                    member_in_guild = guild.get_member(user_id)
-                    if member_in_guild:
-                        # Tìm kênh general
-                        general_channel = discord.utils.get(guild.text_channels, name="general")
-                        if general_channel:
-                            await general_channel.send(embed=embed)
-                            break
-
-                # Gửi tin nhắn riêng
-                try:
-                    await member.send(embed=embed)
-                except:
-                    pass  # Bỏ qua nếu không gửi được DM
-
-            logger.info(f"{member.name} đã đột phá lên {new_realm['name']}")
+            new_realm = await self.announce_breakthrough(user_id, new_realm_id)
 
             return True, new_realm["name"]
 
@@ -227,10 +412,11 @@ async def add_chat_exp(bot, message):
     # Lấy thông tin người dùng
     user_id = message.author.id
 
-    # Thêm kinh nghiệm
+    # Cộng dồn vào bộ đệm, kinh nghiệm được ghi theo lô định kỳ
     cog = bot.get_cog("CultivationCog")
     if cog:
-        await cog.add_exp(user_id, EXP_PER_MESSAGE, "chat")
+        if cog.exp_buffer.add(user_id, EXP_PER_MESSAGE, message.author.name):
+            cog.request_flush()
 
 
 # Hàm để bắt đầu theo dõi voice chat
@@ -239,10 +425,13 @@ async def start_voice_tracking(bot, member, voice_channel):
     # Thêm vào danh sách theo dõi
     now = datetime.datetime.now()
     voice_users[member.id] = {
+        "guild_id": member.guild.id,
         "channel_id": voice_channel.id,
         "start_time": now,
         "last_check": now
     }
+    dirty_voice_sessions.add(member.id)
+    ended_voice_sessions.discard(member.id)
 
     logger.info(f"{member.name} đã tham gia voice chat {voice_channel.name}")
 
@@ -253,25 +442,46 @@ async def end_voice_tracking(bot, member, voice_channel):
     # Kiểm tra xem người dùng có trong danh sách không
     if member.id in voice_users:
         # Lấy thông tin
-        data = voice_users[member.id]
-        start_time = data["start_time"]
+        data = voice_users.pop(member.id)
         now = datetime.datetime.now()
+        dirty_voice_sessions.discard(member.id)
+        ended_voice_sessions.add(member.id)
 
-        # Tính toán thời gian
-        time_diff = (now - start_time).total_seconds() / 60  # Đổi sang phút
-
-        # Tính toán kinh nghiệm
+        # Phần kinh nghiệm từ lần voice_check cuối chưa được cộng
+        time_diff = (now - data["last_check"]).total_seconds() / 60  # Đổi sang phút
         exp_gain = int(time_diff * EXP_PER_MINUTE_VOICE)
 
-        # Cộng kinh nghiệm
+        # Cộng dồn vào bộ đệm, được ghi cùng kinh nghiệm chat
         cog = bot.get_cog("CultivationCog")
-        if cog:
-            await cog.add_exp(member.id, exp_gain, f"tu luyện Voice Chat ({int(time_diff)} phút)")
-
-        # Xóa khỏi danh sách theo dõi
-        del voice_users[member.id]
-
-        logger.info(f"{member.name} đã rời voice chat {voice_channel.name} sau {int(time_diff)} phút")
+        if cog and exp_gain > 0:
+            if cog.exp_buffer.add(member.id, exp_gain, member.name):
+                cog.request_flush()
+
+        total_minutes = int((now - data["start_time"]).total_seconds() / 60)
+        logger.info(f"{member.name} đã rời voice chat {voice_channel.name} sau {total_minutes} phút")
+
+
+# Hàm để cập nhật theo dõi khi trạng thái voice thay đổi
+async def update_voice_tracking(bot, member, before, after):
+    """Cập nhật theo dõi cho các kênh bị ảnh hưởng bởi một thay đổi trạng thái voice"""
+    # Người dùng rời hẳn voice chat
+    if after.channel is None and member.id in voice_users:
+        await end_voice_tracking(bot, member, before.channel)
+
+    # Vào/ra/tắt nghe/AFK có thể làm thay đổi trạng thái tu luyện của cả những người cùng kênh
+    channels = {channel.id: channel for channel in (before.channel, after.channel) if channel is not None}
+    for channel in channels.values():
+        for channel_member in channel.members:
+            tracked = voice_users.get(channel_member.id)
+            if is_cultivating_in_voice(channel_member):
+                if tracked is None:
+                    await start_voice_tracking(bot, channel_member, channel)
+                elif tracked["channel_id"] != channel_member.voice.channel.id:
+                    # Chuyển kênh: giữ nguyên phiên
+                    tracked["channel_id"] = channel_member.voice.channel.id
+                    dirty_voice_sessions.add(channel_member.id)
+            elif tracked is not None:
+                await end_voice_tracking(bot, channel_member, channel)
 
 
 async def setup(bot):
@@ -9,9 +9,12 @@ from typing import Dict, List, Optional, Union, Any
 
 from database.mongo_handler import MongoHandler
 from database.models.user_model import User
+from database.user_views import InventoryView
 from database.models.item_model import Item, Equipment, Consumable, Material, Treasure, Pill, SkillBook, SpiritStone
-from utils.embed_utils import create_embed, create_success_embed, create_error_embed
+from utils.embed import create_embed, create_success_embed, create_error_embed
 from utils.text_utils import format_number, progress_bar
+from utils.game_data import game_data
+from config import ITEMS_COLLECTION
 
 # Cấu hình logging
 logger = logging.getLogger("tutien-bot.inventory")
@@ -21,36 +24,33 @@ class InventoryCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.mongo_handler = MongoHandler()
-        self.items_cache = {}  # Cache cho dữ liệu vật phẩm
-        self.load_items_data()
-
-    def load_items_data(self):
-        """Tải dữ liệu vật phẩm từ file JSON"""
-        import json
-        import os
-
-        try:
-            with open(os.path.join("data", "items.json"), "r", encoding="utf-8") as f:
-                self.items_cache = json.load(f)
-            logger.info(f"Đã tải {len(self.items_cache)} vật phẩm từ file JSON")
-        except Exception as e:
-            logger.error(f"Lỗi khi tải dữ liệu vật phẩm: {e}")
+        self.items_cache = {}  # Vật phẩm lấy từ database hoặc đã được sửa đổi (độ bền, tinh luyện...)
 
     def get_item_data(self, item_id: str) -> Optional[Dict[str, Any]]:
-        """Lấy thông tin vật phẩm từ cache hoặc database"""
+        """Lấy thông tin vật phẩm từ cache (gồm vật phẩm trong database) hoặc dữ liệu game"""
         # Kiểm tra trong cache trước
         if item_id in self.items_cache:
             return self.items_cache[item_id]
 
-        # Nếu không có trong cache, truy vấn từ database
-        item_data = self.mongo_handler.find_one("items", {"item_id": item_id})
+        # Dữ liệu game dùng chung (bản sao vì các lệnh có thể sửa thông tin vật phẩm)
+        item_data = game_data.items.copy(item_id)
         if item_data:
-            # Thêm vào cache để sử dụng sau này
-            self.items_cache[item_id] = item_data
             return item_data
 
         return None
 
+    async def cog_load(self):
+        """Nạp trước vật phẩm lưu trong database (một truy vấn) để get_item_data không phải chờ database"""
+        try:
+            cursor = await self.mongo_handler.find_async(ITEMS_COLLECTION, {}, {"_id": 0})
+            async for item_data in cursor:
+                # Dữ liệu game được ưu tiên hơn database như trước
+                if "item_id" in item_data and item_data["item_id"] not in game_data.items:
+                    self.items_cache.setdefault(item_data["item_id"], item_data)
+            logger.info(f"Đã nạp {len(self.items_cache)} vật phẩm từ database")
+        except Exception as e:
+            logger.error(f"Lỗi khi nạp vật phẩm từ database: {e}")
+
     async def get_user_data(self, user_id: int) -> Optional[User]:
         """Lấy dữ liệu người dùng từ database"""
         user_data = await self.mongo_handler.find_one_async("users", {"user_id": user_id})
@@ -59,20 +59,26 @@ class InventoryCog(commands.Cog):
         return None
 
     async def save_user_data(self, user: User) -> bool:
-        """Lưu dữ liệu người dùng vào database"""
+        """Lưu dữ liệu người dùng vào database (chỉ ghi các trường đã thay đổi)"""
+        update = user.get_changes()
+        if not update:
+            return True
+
         result = await self.mongo_handler.update_one_async(
             "users",
             {"user_id": user.user_id},
-            {"$set": user.to_dict()},
+            update,
             upsert=True
         )
+        if result.acknowledged:
+            user.mark_clean()
         return result.acknowledged
 
     @commands.group(name="inventory", aliases=["inv", "kho", "túi"], invoke_without_command=True)
     async def inventory(self, ctx, page: int = 1):
         """Xem kho đồ của bạn"""
-        # Lấy dữ liệu người dùng
-        user = await self.get_user_data(ctx.author.id)
+        # Lấy dữ liệu người dùng (chỉ phần kho đồ)
+        user = await self.mongo_handler.get_user_view(ctx.author.id, InventoryView)
         if not user:
             embed = create_error_embed(
                 title="❌ Lỗi",
@@ -80,6 +86,9 @@ class InventoryCog(commands.Cog):
             )
             return await ctx.send(embed=embed)
 
+        inventory = user.inventory or {}
+        items = inventory.get("items", [])
+
         # Kiểm tra trang hợp lệ
         if page < 1:
             page = 1
@@ -88,7 +97,7 @@ class InventoryCog(commands.Cog):
         items_per_page = 10
 
         # Tính toán số trang
-        total_items = len(user.inventory["items"])
+        total_items = len(items)
         total_pages = max(1, (total_items + items_per_page - 1) // items_per_page)
 
         if page > total_pages:
@@ -101,7 +110,7 @@ class InventoryCog(commands.Cog):
         # Tạo embed
         embed = create_embed(
             title=f"🎒 Kho Đồ của {ctx.author.display_name}",
-            description=f"Sức chứa: {total_items}/{user.inventory['capacity']} vật phẩm\n"
+            description=f"Sức chứa: {total_items}/{inventory.get('capacity', 50)} vật phẩm\n"
                         f"Trang {page}/{total_pages}"
         )
 
@@ -110,7 +119,7 @@ class InventoryCog(commands.Cog):
             embed.add_field(name="Trống", value="Kho đồ của bạn đang trống.", inline=False)
         else:
             # Lấy danh sách vật phẩm hiện tại
-            current_items = user.inventory["items"][start_idx:end_idx]
+            current_items = items[start_idx:end_idx]
 
             for i, item_entry in enumerate(current_items, start=start_idx + 1):
                 item_id = item_entry["item_id"]
@@ -2677,5 +2686,5 @@ class InventoryCog(commands.Cog):
         return translations.get(skill_type, "Không xác định")
 
 
-def setup(bot):
-    bot.add_cog(InventoryCog(bot))
+async def setup(bot):
+    await bot.add_cog(InventoryCog(bot))
@@ -9,40 +9,31 @@ from typing import Dict, List, Optional, Union, Any
 
 from database.mongo_handler import MongoHandler
 from database.models.user_model import User
-from utils.embed_utils import create_embed, create_success_embed, create_error_embed
+from utils.embed import create_embed, create_success_embed, create_error_embed
 from utils.text_utils import format_number, progress_bar
+from utils.game_data import game_data
 
 # Cấu hình logging
 logger = logging.getLogger("tutien-bot.auction")
 
-
 class AuctionCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.mongo_handler = MongoHandler()
-        self.items_cache = {}
-        self.load_items_data()
 
         # Danh sách đấu giá hiện tại
         self.active_auctions = {}
 
-        # Tải các đấu giá từ database
-        self.bot.loop.create_task(self.load_auctions())
-
-        # Tạo task kiểm tra đấu giá đã kết thúc
-        self.bot.loop.create_task(self.check_ended_auctions())
-
-    def load_items_data(self):
-        """Tải dữ liệu vật phẩm từ file JSON"""
-        import json
-        import os
+        # Tải các đấu giá từ database và tạo task kiểm tra đấu giá đã kết thúc
+        # (bot.loop không dùng được trước khi bot chạy, cog được tạo trong event loop nên dùng asyncio)
+        self._tasks = [
+            asyncio.create_task(self.load_auctions()),
+            asyncio.create_task(self.check_ended_auctions())
+        ]
 
-        try:
-            with open(os.path.join("data", "items.json"), "r", encoding="utf-8") as f:
-                self.items_cache = json.load(f)
-            logger.info(f"Đã tải {len(self.items_cache)} vật phẩm từ file JSON")
-        except Exception as e:
-            logger.error(f"Lỗi khi tải dữ liệu vật phẩm: {e}")
+    def cog_unload(self):
+        for task in self._tasks:
+            task.cancel()
 
     async def load_auctions(self):
         """Tải các đấu giá từ database"""
@@ -105,7 +96,7 @@ class AuctionCog(commands.Cog):
                     try:
                         seller_user = self.bot.get_user(seller_id)
                         if seller_user:
-                            item_data = self.items_cache.get(item_id, {"name": f"Vật phẩm #{item_id}"})
+                            item_data = game_data.items.get(item_id, {"name": f"Vật phẩm #{item_id}"})
 
                             embed = create_embed(
                                 title="📦 Đấu Giá Kết Thúc",
@@ -136,7 +127,7 @@ class AuctionCog(commands.Cog):
                     try:
                         winner_user = self.bot.get_user(winner_id)
                         if winner_user:
-                            item_data = self.items_cache.get(auction["item_id"],
+                            item_data = game_data.items.get(auction["item_id"],
                                                              {"name": f"Vật phẩm #{auction['item_id']}"})
 
                             embed = create_success_embed(
@@ -166,7 +157,7 @@ class AuctionCog(commands.Cog):
                     try:
                         seller_user = self.bot.get_user(seller_id)
                         if seller_user:
-                            item_data = self.items_cache.get(auction["item_id"],
+                            item_data = game_data.items.get(auction["item_id"],
                                                              {"name": f"Vật phẩm #{auction['item_id']}"})
 
                             embed = create_success_embed(
@@ -198,13 +189,19 @@ class AuctionCog(commands.Cog):
         return None
 
     async def save_user_data(self, user: User) -> bool:
-        """Lưu dữ liệu người dùng vào database"""
+        """Lưu dữ liệu người dùng vào database (chỉ ghi các trường đã thay đổi)"""
+        update = user.get_changes()
+        if not update:
+            return True
+
         result = await self.mongo_handler.update_one_async(
             "users",
             {"user_id": user.user_id},
-            {"$set": user.to_dict()},
+            update,
             upsert=True
         )
+        if result.acknowledged:
+            user.mark_clean()
         return result.acknowledged
 
     @commands.group(name="auction", aliases=["daugia"], invoke_without_command=True)
@@ -253,7 +250,7 @@ class AuctionCog(commands.Cog):
             for i, auction in enumerate(current_auctions, start=start_idx + 1):
                 # Lấy thông tin vật phẩm
                 item_id = auction["item_id"]
-                item_data = self.items_cache.get(item_id, {"name": f"Vật phẩm #{item_id}"})
+                item_data = game_data.items.get(item_id, {"name": f"Vật phẩm #{item_id}"})
 
                 # Định dạng tên vật phẩm theo độ hiếm
                 rarity_icons = {
@@ -338,7 +335,7 @@ class AuctionCog(commands.Cog):
 
         # Lấy thông tin vật phẩm
         item_id = auction["item_id"]
-        item_data = self.items_cache.get(item_id, {"name": f"Vật phẩm #{item_id}"})
+        item_data = game_data.items.get(item_id, {"name": f"Vật phẩm #{item_id}"})
 
         # Định dạng tên vật phẩm theo độ hiếm
         rarity_icons = {
@@ -554,7 +551,7 @@ class AuctionCog(commands.Cog):
 
         # Tạo embed xác nhận
         item_id = auction["item_id"]
-        item_data = self.items_cache.get(item_id, {"name": f"Vật phẩm #{item_id}"})
+        item_data = game_data.items.get(item_id, {"name": f"Vật phẩm #{item_id}"})
 
         embed = create_embed(
             title="🔨 Xác Nhận Đặt Giá",
@@ -773,7 +770,7 @@ class AuctionCog(commands.Cog):
             return await ctx.send(embed=embed)
 
         # Lấy thông tin vật phẩm
-        item_data = self.items_cache.get(item_id)
+        item_data = game_data.items.get(item_id)
         if not item_data:
             embed = create_error_embed(
                 title="❌ Lỗi",
@@ -992,7 +989,7 @@ class AuctionCog(commands.Cog):
         # Lấy thông tin vật phẩm
         item_id = auction["item_id"]
         quantity = auction["quantity"]
-        item_data = self.items_cache.get(item_id, {"name": f"Vật phẩm #{item_id}"})
+        item_data = game_data.items.get(item_id, {"name": f"Vật phẩm #{item_id}"})
 
         # Tạo embed xác nhận
         embed = create_embed(
@@ -1138,7 +1135,7 @@ class AuctionCog(commands.Cog):
             for i, auction in enumerate(current_auctions, start=start_idx + 1):
                 # Lấy thông tin vật phẩm
                 item_id = auction["item_id"]
-                item_data = self.items_cache.get(item_id, {"name": f"Vật phẩm #{item_id}"})
+                item_data = game_data.items.get(item_id, {"name": f"Vật phẩm #{item_id}"})
 
                 # Định dạng tên vật phẩm theo độ hiếm
                 rarity_icons = {
@@ -1276,5 +1273,5 @@ class AuctionCog(commands.Cog):
         return translations.get(stat, stat)
 
 
-def setup(bot):
-    bot.add_cog(AuctionCog(bot))
+async def setup(bot):
+    await bot.add_cog(AuctionCog(bot))
@@ -2,38 +2,23 @@
 import discord
 from discord.ext import commands
 import asyncio
-import datetime
 import random
 import logging
 from typing import Dict, List, Optional, Union, Any
 
 from database.mongo_handler import MongoHandler
 from database.models.user_model import User
-from utils.embed_utils import create_embed, create_success_embed, create_error_embed
+from database.user_views import ResourcesView
+from utils.embed import create_embed, create_success_embed, create_error_embed
 from utils.text_utils import format_number, progress_bar
 
 # Cấu hình logging
 logger = logging.getLogger("tutien-bot.economy")
 
-
 class EconomyCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.mongo_handler = MongoHandler()
-        self.daily_rewards = {
-            1: {"spirit_stones": 100, "exp": 50},
-            2: {"spirit_stones": 120, "exp": 60},
-            3: {"spirit_stones": 140, "exp": 70},
-            4: {"spirit_stones": 160, "exp": 80},
-            5: {"spirit_stones": 180, "exp": 90},
-            6: {"spirit_stones": 200, "exp": 100},
-            7: {"spirit_stones": 300, "exp": 150, "special": "weekly_chest"},
-            14: {"spirit_stones": 500, "exp": 250, "special": "biweekly_chest"},
-            30: {"spirit_stones": 1000, "exp": 500, "special": "monthly_chest"},
-            60: {"spirit_stones": 2000, "exp": 1000, "special": "bimonthly_chest"},
-            100: {"spirit_stones": 5000, "exp": 2500, "special": "cultivation_manual"},
-            365: {"spirit_stones": 20000, "exp": 10000, "special": "legendary_pet_egg"}
-        }
 
     async def get_user_data(self, user_id: int) -> Optional[User]:
         """Lấy dữ liệu người dùng từ database"""
@@ -43,13 +28,19 @@ class EconomyCog(commands.Cog):
         return None
 
     async def save_user_data(self, user: User) -> bool:
-        """Lưu dữ liệu người dùng vào database"""
+        """Lưu dữ liệu người dùng vào database (chỉ ghi các trường đã thay đổi)"""
+        update = user.get_changes()
+        if not update:
+            return True
+
         result = await self.mongo_handler.update_one_async(
             "users",
             {"user_id": user.user_id},
-            {"$set": user.to_dict()},
+            update,
             upsert=True
         )
+        if result.acknowledged:
+            user.mark_clean()
         return result.acknowledged
 
     @commands.command(name="balance", aliases=["bal", "money", "linhthach"])
@@ -58,8 +49,8 @@ class EconomyCog(commands.Cog):
         # Nếu không chỉ định thành viên, mặc định là người gọi lệnh
         target = member or ctx.author
 
-        # Lấy dữ liệu người dùng
-        user = await self.get_user_data(target.id)
+        # Lấy dữ liệu người dùng (chỉ phần tài nguyên)
+        user = await self.mongo_handler.get_user_view(target.id, ResourcesView)
         if not user:
             embed = create_error_embed(
                 title="❌ Lỗi",
@@ -67,6 +58,8 @@ class EconomyCog(commands.Cog):
             )
             return await ctx.send(embed=embed)
 
+        resources = user.resources or {}
+
         # Tạo embed hiển thị số linh thạch
         embed = create_embed(
             title=f"💰 Linh Thạch của {target.display_name}",
@@ -76,59 +69,59 @@ class EconomyCog(commands.Cog):
         # Thêm thông tin linh thạch
         embed.add_field(
             name="Linh thạch",
-            value=f"{format_number(user.resources['spirit_stones'])} 💎",
+            value=f"{format_number(resources.get('spirit_stones', 0))} 💎",
             inline=False
         )
 
         # Thêm thông tin linh thạch khác nếu có
-        if user.resources.get("low_stones", 0) > 0:
+        if resources.get("low_stones", 0) > 0:
             embed.add_field(
                 name="Linh thạch hạ phẩm",
-                value=f"{format_number(user.resources['low_stones'])} 🟢",
+                value=f"{format_number(resources['low_stones'])} 🟢",
                 inline=True
             )
 
-        if user.resources.get("mid_stones", 0) > 0:
+        if resources.get("mid_stones", 0) > 0:
             embed.add_field(
                 name="Linh thạch trung phẩm",
-                value=f"{format_number(user.resources['mid_stones'])} 🔵",
+                value=f"{format_number(resources['mid_stones'])} 🔵",
                 inline=True
             )
 
-        if user.resources.get("high_stones", 0) > 0:
+        if resources.get("high_stones", 0) > 0:
             embed.add_field(
                 name="Linh thạch thượng phẩm",
-                value=f"{format_number(user.resources['high_stones'])} 🟣",
+                value=f"{format_number(resources['high_stones'])} 🟣",
                 inline=True
             )
 
         # Thêm thông tin linh thạch khóa nếu có
-        if user.resources.get("bound_spirit_stones", 0) > 0:
+        if resources.get("bound_spirit_stones", 0) > 0:
             embed.add_field(
                 name="Linh thạch khóa",
-                value=f"{format_number(user.resources['bound_spirit_stones'])} 🔒",
+                value=f"{format_number(resources['bound_spirit_stones'])} 🔒",
                 inline=True
             )
 
         # Thêm thông tin tài nguyên khác
-        if user.resources.get("spiritual_energy", 0) > 0:
+        if resources.get("spiritual_energy", 0) > 0:
             embed.add_field(
                 name="Linh khí",
-                value=f"{format_number(user.resources['spiritual_energy'])} ✨",
+                value=f"{format_number(resources['spiritual_energy'])} ✨",
                 inline=True
             )
 
-        if user.resources.get("contribution", 0) > 0:
+        if resources.get("contribution", 0) > 0:
             embed.add_field(
                 name="Điểm cống hiến",
-                value=f"{format_number(user.resources['contribution'])} 🏆",
+                value=f"{format_number(resources['contribution'])} 🏆",
                 inline=True
             )
 
-        if user.resources.get("reputation", 0) > 0:
+        if resources.get("reputation", 0) > 0:
             embed.add_field(
                 name="Danh vọng",
-                value=f"{format_number(user.resources['reputation'])} 🌟",
+                value=f"{format_number(resources['reputation'])} 🌟",
                 inline=True
             )
 
@@ -139,136 +132,6 @@ class EconomyCog(commands.Cog):
         # Gửi embed
         await ctx.send(embed=embed)
 
-    @commands.command(name="daily", aliases=["diemdanh"])
-    async def daily(self, ctx):
-        """Nhận phần thưởng điểm danh hàng ngày"""
-        # Lấy dữ liệu người dùng
-        user = await self.get_user_data(ctx.author.id)
-        if not user:
-            embed = create_error_embed(
-                title="❌ Lỗi",
-                description="Bạn chưa bắt đầu tu tiên. Hãy sử dụng lệnh `!start` để bắt đầu."
-            )
-            return await ctx.send(embed=embed)
-
-        # Kiểm tra xem đã điểm danh hôm nay chưa
-        now = datetime.datetime.utcnow()
-        last_daily = user.activities.get("last_daily")
-
-        if last_daily and (now - last_daily).total_seconds() < 86400:  # 24 giờ = 86400 giây
-            # Tính thời gian còn lại
-            next_daily = last_daily + datetime.timedelta(days=1)
-            time_left = next_daily - now
-            hours, remainder = divmod(time_left.seconds, 3600)
-            minutes, seconds = divmod(remainder, 60)
-
-            embed = create_error_embed(
-                title="⏰ Chưa đến thời gian",
-                description=f"Bạn đã điểm danh hôm nay rồi. Vui lòng quay lại sau {hours} giờ {minutes} phút {seconds} giây."
-            )
-            return await ctx.send(embed=embed)
-
-        # Cập nhật thời gian điểm danh
-        if last_daily and (now - last_daily).days == 1:
-            # Điểm danh liên tiếp
-            user.activities["daily_streak"] += 1
-        else:
-            # Bắt đầu chuỗi điểm danh mới
-            user.activities["daily_streak"] = 1
-
-        user.activities["last_daily"] = now
-
-        # Xác định phần thưởng
-        streak = user.activities["daily_streak"]
-        reward = None
-
-        # Tìm phần thưởng phù hợp với chuỗi điểm danh
-        for milestone in sorted(self.daily_rewards.keys(), reverse=True):
-            if streak >= milestone:
-                reward = self.daily_rewards[milestone]
-                break
-
-        if not reward:
-            reward = self.daily_rewards[1]  # Phần thưởng mặc định
-
-        # Cộng phần thưởng
-        spirit_stones = reward.get("spirit_stones", 100)
-        exp = reward.get("exp", 50)
-
-        user.add_spirit_stones(spirit_stones)
-        exp_result = user.gain_exp(exp)
-
-        # Thêm vật phẩm đặc biệt nếu có
-        special_item = reward.get("special")
-        if special_item:
-            user.add_item(special_item, 1)
-
-        # Lưu dữ liệu người dùng
-        await self.save_user_data(user)
-
-        # Tạo embed thông báo
-        embed = create_success_embed(
-            title="✅ Điểm Danh Thành Công",
-            description=f"Bạn đã điểm danh thành công! Chuỗi điểm danh hiện tại: **{streak}** ngày."
-        )
-
-        # Thêm thông tin phần thưởng
-        embed.add_field(
-            name="Phần thưởng",
-            value=f"💰 {format_number(spirit_stones)} linh thạch\n✨ {format_number(exp_result['exp_gained'])} kinh nghiệm",
-            inline=False
-        )
-
-        # Thêm thông tin vật phẩm đặc biệt nếu có
-        if special_item:
-            special_item_names = {
-                "weekly_chest": "Rương Tuần",
-                "biweekly_chest": "Rương Nửa Tháng",
-                "monthly_chest": "Rương Tháng",
-                "bimonthly_chest": "Rương Hai Tháng",
-                "cultivation_manual": "Bí Kíp Tu Luyện",
-                "legendary_pet_egg": "Trứng Linh Thú Huyền Thoại"
-            }
-
-            embed.add_field(
-                name="Phần thưởng đặc biệt",
-                value=f"🎁 {special_item_names.get(special_item, special_item)}",
-                inline=False
-            )
-
-        # Thêm thông tin về đột phá nếu có
-        if exp_result.get("breakthrough", False):
-            if exp_result.get("realm_advancement", False):
-                embed.add_field(
-                    name="🌟 Đột phá cảnh giới",
-                    value=f"Chúc mừng! Bạn đã đột phá lên {exp_result['new_realm']} cảnh {exp_result['new_level']}!",
-                    inline=False
-                )
-            else:
-                embed.add_field(
-                    name="🌟 Đột phá tiểu cảnh",
-                    value=f"Chúc mừng! Bạn đã đột phá lên {user.cultivation['realm']} cảnh {user.cultivation['realm_level']}!",
-                    inline=False
-                )
-
-        # Thêm thông tin về chuỗi điểm danh tiếp theo
-        next_milestone = None
-        for milestone in sorted(self.daily_rewards.keys()):
-            if milestone > streak:
-                next_milestone = milestone
-                break
-
-        if next_milestone:
-            days_left = next_milestone - streak
-            embed.add_field(
-                name="Chuỗi điểm danh tiếp theo",
-                value=f"Còn {days_left} ngày nữa để đạt chuỗi {next_milestone} ngày và nhận phần thưởng lớn hơn!",
-                inline=False
-            )
-
-        # Gửi embed
-        await ctx.send(embed=embed)
-
     @commands.command(name="convert", aliases=["doilinhthach", "exchange"])
     async def convert_spirit_stones(self, ctx, amount: int, from_type: str, to_type: str):
         """Chuyển đổi giữa các loại linh thạch"""
@@ -557,7 +420,7 @@ class EconomyCog(commands.Cog):
         # Gửi embed xác nhận
         await ctx.send(embed=embed, view=view)
 
-    @commands.command(name="leaderboard", aliases=["lb", "top", "bangxephang"])
+    @commands.command(name="leaderboard", aliases=["lb", "top"])
     async def leaderboard(self, ctx, category: str = "cultivation"):
         """Xem bảng xếp hạng"""
         valid_categories = ["cultivation", "spirit_stones", "contribution", "reputation", "pvp"]
@@ -967,5 +830,5 @@ class EconomyCog(commands.Cog):
             await ctx.send(embed=embed)
 
 
-def setup(bot):
-    bot.add_cog(EconomyCog(bot))
+async def setup(bot):
+    await bot.add_cog(EconomyCog(bot))
@@ -9,8 +9,10 @@ from typing import Dict, List, Optional, Union, Any
 
 from database.mongo_handler import MongoHandler
 from database.models.user_model import User
-from utils.embed_utils import create_embed, create_success_embed, create_error_embed
+from config import MAJOR_REALMS
+from utils.embed import create_embed, create_success_embed, create_error_embed
 from utils.text_utils import format_number, progress_bar
+from utils.game_data import game_data
 
 # Cấu hình logging
 logger = logging.getLogger("tutien-bot.shop")
@@ -20,8 +22,6 @@ class ShopCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.mongo_handler = MongoHandler()
-        self.shop_items = {}
-        self.load_shop_data()
 
         # Danh sách các cửa hàng
         self.shops = {
@@ -73,18 +73,6 @@ class ShopCog(commands.Cog):
             }
         }
 
-    def load_shop_data(self):
-        """Tải dữ liệu cửa hàng từ file JSON"""
-        import json
-        import os
-
-        try:
-            with open(os.path.join("data", "items.json"), "r", encoding="utf-8") as f:
-                self.shop_items = json.load(f)
-            logger.info(f"Đã tải {len(self.shop_items)} vật phẩm từ file JSON")
-        except Exception as e:
-            logger.error(f"Lỗi khi tải dữ liệu cửa hàng: {e}")
-
     async def get_user_data(self, user_id: int) -> Optional[User]:
         """Lấy dữ liệu người dùng từ database"""
         user_data = await self.mongo_handler.find_one_async("users", {"user_id": user_id})
@@ -93,13 +81,19 @@ class ShopCog(commands.Cog):
         return None
 
     async def save_user_data(self, user: User) -> bool:
-        """Lưu dữ liệu người dùng vào database"""
+        """Lưu dữ liệu người dùng vào database (chỉ ghi các trường đã thay đổi)"""
+        update = user.get_changes()
+        if not update:
+            return True
+
         result = await self.mongo_handler.update_one_async(
             "users",
             {"user_id": user.user_id},
-            {"$set": user.to_dict()},
+            update,
             upsert=True
         )
+        if result.acknowledged:
+            user.mark_clean()
         return result.acknowledged
 
     @commands.group(name="shop", aliases=["cuahang", "store"], invoke_without_command=True)
@@ -237,7 +231,7 @@ class ShopCog(commands.Cog):
 
         for i, item_id in enumerate(current_items, start=start_idx + 1):
             # Lấy thông tin vật phẩm
-            item_data = self.shop_items.get(item_id)
+            item_data = game_data.items.get(item_id)
 
             if item_data:
                 # Định dạng tên vật phẩm theo độ hiếm
@@ -348,7 +342,7 @@ class ShopCog(commands.Cog):
         item_id = shop_items[item_index - 1]
 
         # Lấy thông tin vật phẩm
-        item_data = self.shop_items.get(item_id)
+        item_data = game_data.items.get(item_id)
         if not item_data:
             embed = create_error_embed(
                 title="❌ Lỗi",
@@ -378,12 +372,8 @@ class ShopCog(commands.Cog):
 
         # Kiểm tra yêu cầu cảnh giới
         if "required_realm" in item_data and item_data["required_realm"]:
-            realm_levels = ["Luyện Khí", "Trúc Cơ", "Kim Đan", "Nguyên Anh", "Hóa Thần", "Luyện Hư", "Hợp Thể",
-                            "Đại Thừa", "Độ Kiếp", "Tiên Nhân"]
-            required_realm_index = realm_levels.index(item_data["required_realm"]) if item_data[
-                                                                                          "required_realm"] in realm_levels else -1
-            current_realm_index = realm_levels.index(user.cultivation["realm"]) if user.cultivation[
-                                                                                       "realm"] in realm_levels else -1
+            required_realm_index = MAJOR_REALMS.index(item_data["required_realm"], -1)
+            current_realm_index = MAJOR_REALMS.index(user.cultivation["realm"], -1)
 
             if current_realm_index < required_realm_index:
                 embed = create_error_embed(
@@ -490,7 +480,7 @@ class ShopCog(commands.Cog):
             return await ctx.send(embed=embed)
 
         # Lấy thông tin vật phẩm
-        item_data = self.shop_items.get(item_id)
+        item_data = game_data.items.get(item_id)
         if not item_data:
             embed = create_error_embed(
                 title="❌ Lỗi",
@@ -583,5 +573,5 @@ class ShopCog(commands.Cog):
         await ctx.send(embed=embed, view=view)
 
 
-def setup(bot):
-    bot.add_cog(ShopCog(bot))
+async def setup(bot):
+    await bot.add_cog(ShopCog(bot))
@@ -8,7 +8,8 @@ from typing import Dict, List, Optional, Union, Any
 
 from database.mongo_handler import MongoHandler
 from database.models.user_model import User
-from utils.embed_utils import create_embed, create_success_embed, create_error_embed
+from database.user_loader import UserLoader
+from utils.embed import create_embed, create_success_embed, create_error_embed
 from utils.text_utils import format_number
 
 # Cấu hình logging
@@ -29,13 +30,19 @@ class FriendsCog(commands.Cog):
         return None
 
     async def save_user_data(self, user: User) -> bool:
-        """Lưu dữ liệu người dùng vào database"""
+        """Lưu dữ liệu người dùng vào database (chỉ ghi các trường đã thay đổi)"""
+        update = user.get_changes()
+        if not update:
+            return True
+
         result = await self.mongo_handler.update_one_async(
             "users",
             {"user_id": user.user_id},
-            {"$set": user.to_dict()},
+            update,
             upsert=True
         )
+        if result.acknowledged:
+            user.mark_clean()
         return result.acknowledged
 
     @commands.group(name="friend", aliases=["friends", "banbe"], invoke_without_command=True)
@@ -67,8 +74,12 @@ class FriendsCog(commands.Cog):
                 inline=False
             )
         else:
+            # Lấy thông tin tất cả bạn bè bằng một truy vấn
+            loader = UserLoader({"_id": 0, "cultivation.realm": 1, "cultivation.realm_level": 1})
+            friend_users = await loader.load_many(friend_data.get("user_id") for friend_data in friends)
+
             # Hiển thị danh sách bạn bè
-            for i, friend_data in enumerate(friends, 1):
+            for i, (friend_data, friend_user) in enumerate(zip(friends, friend_users), 1):
                 friend_id = friend_data.get("user_id")
                 added_date = friend_data.get("added_date", datetime.datetime.utcnow())
 
@@ -76,12 +87,10 @@ class FriendsCog(commands.Cog):
                 friend = self.bot.get_user(friend_id)
                 friend_name = friend.name if friend else f"Người dùng #{friend_id}"
 
-                # Lấy thông tin người dùng từ database
-                friend_user = await self.get_user_data(friend_id)
-
-                if friend_user:
+                if friend_user and "cultivation" in friend_user:
                     # Hiển thị thông tin cơ bản
-                    value = f"**Cảnh giới:** {friend_user.cultivation['realm']} cảnh {friend_user.cultivation['realm_level']}\n"
+                    cultivation = friend_user["cultivation"]
+                    value = f"**Cảnh giới:** {cultivation['realm']} cảnh {cultivation['realm_level']}\n"
                     value += f"**Kết bạn từ:** {added_date.strftime('%d/%m/%Y')}\n"
 
                     # Kiểm tra xem có online không
@@ -581,5 +590,5 @@ class FriendsCog(commands.Cog):
         # Không xóa khỏi danh sách bạn bè để giữ lại mối quan hệ nếu họ quay lại
 
 
-def setup(bot):
-    bot.add_cog(FriendsCog(bot))
+async def setup(bot):
+    await bot.add_cog(FriendsCog(bot))
@@ -2,7 +2,7 @@ import discord
 from discord.ext import commands
 import asyncio
 from database.mongo_handler import MongoHandler
-from utils.embed_utils import create_leaderboard_embed
+from utils.embed import create_leaderboard_embed
 from utils.text_utils import format_number
 import config
 
@@ -75,7 +75,7 @@ class Rankings(commands.Cog):
         """Lấy dữ liệu xếp hạng dựa trên danh mục"""
         if category == "power":
             # Xếp hạng theo sức mạnh chiến đấu
-            users = await self.db.get_all_users()
+            users = await self.db.get_all_users(projection={"username": 1, "combat_power": 1})
             leaderboard = []
 
             for user in users:
@@ -92,7 +92,8 @@ class Rankings(commands.Cog):
 
         elif category == "cultivation":
             # Xếp hạng theo cảnh giới tu luyện
-            users = await self.db.get_all_users()
+            users = await self.db.get_all_users(projection={"username": 1, "cultivation.realm": 1, "cultivation.stage": 1,
+                                                            "cultivation.progress": 1, "cultivation.max_progress": 1})
             leaderboard = []
 
             for user in users:
@@ -124,7 +125,7 @@ class Rankings(commands.Cog):
 
         elif category == "spirit":
             # Xếp hạng theo số lượng linh thạch
-            users = await self.db.get_all_users()
+            users = await self.db.get_all_users(projection={"username": 1, "spirit_stones": 1})
             leaderboard = []
 
             for user in users:
@@ -141,7 +142,7 @@ class Rankings(commands.Cog):
 
         elif category == "contribution":
             # Xếp hạng theo đóng góp môn phái
-            users = await self.db.get_all_users()
+            users = await self.db.get_all_users(projection={"username": 1, "contribution": 1, "sect.name": 1})
             leaderboard = []
 
             for user in users:
@@ -165,7 +166,7 @@ class Rankings(commands.Cog):
 
         elif category == "pvp":
             # Xếp hạng theo thành tích PvP
-            users = await self.db.get_all_users()
+            users = await self.db.get_all_users(projection={"username": 1, "pvp.wins": 1, "pvp.losses": 1})
             leaderboard = []
 
             for user in users:
@@ -227,7 +228,7 @@ class Rankings(commands.Cog):
 
         return realms.get(realm, 0)
 
-    @commands.command(name="rank", aliases=["myrank", "hangcuatoi"])
+    @commands.command(name="hangcuatoi", aliases=["myrank"])
     async def my_rank(self, ctx, category="power"):
         """Hiển thị thứ hạng của bản thân trong các bảng xếp hạng"""
         # Kiểm tra danh mục hợp lệ
@@ -378,41 +379,35 @@ class Rankings(commands.Cog):
 
     async def _get_sect_leaderboard(self):
         """Lấy dữ liệu xếp hạng môn phái"""
-        # Lấy tất cả môn phái
-        sects = await self.db.get_all_sects()
-        leaderboard = []
-
-        for sect in sects:
-            # Tính tổng sức mạnh của môn phái
-            total_power = 0
-            member_count = 0
-
-            # Lấy danh sách thành viên
-            members = sect.get('members', [])
-            for member_id in members:
-                user = await self.db.get_user(member_id)
-                if user:
-                    total_power += user.get('combat_power', 0)
-                    member_count += 1
+        # Tính tổng sức mạnh của từng môn phái ngay trên database bằng một truy vấn
+        # (pipeline trong $lookup chỉ lấy combat_power, không kéo cả document thành viên về)
+        pipeline = [
+            {"$lookup": {
+                "from": config.USERS_COLLECTION,
+                "localField": "members",
+                "foreignField": "user_id",
+                "pipeline": [{"$project": {"_id": 0, "combat_power": 1}}],
+                "as": "member_docs"
+            }},
+            {"$project": {
+                "name": 1,
+                "total_power": {"$sum": "$member_docs.combat_power"},
+                "member_count": {"$size": "$member_docs"}
+            }},
+            {"$sort": {"total_power": -1}}
+        ]
+        cursor = await self.db.aggregate_async(config.SECTS_COLLECTION, pipeline)
 
-            # Thêm vào danh sách xếp hạng
+        leaderboard = []
+        async for sect in cursor:
             leaderboard.append({
                 'sect_id': sect['_id'],
                 'username': sect.get('name', 'Không xác định'),
-                'value': total_power,
-                'display_value': f"{format_number(total_power)} ({member_count} thành viên)"
+                'value': f"{format_number(sect['total_power'])} ({sect['member_count']} thành viên)"
             })
 
-        # Sắp xếp theo sức mạnh giảm dần
-        leaderboard.sort(key=lambda x: x['value'], reverse=True)
-
-        # Thay đổi giá trị hiển thị
-        for entry in leaderboard:
-            if 'display_value' in entry:
-                entry['value'] = entry['display_value']
-
         return leaderboard
 
 
-def setup(bot):
-    bot.add_cog(Rankings(bot))
+async def setup(bot):
+    await bot.add_cog(Rankings(bot))
@@ -4,12 +4,12 @@ import asyncio
 import datetime
 import random
 import logging
-import json
-import os
 from typing import Dict, List, Optional
 
 from database.mongo_handler import get_user_or_create, update_user, get_sect, create_sect, add_member_to_sect, \
     remove_member_from_sect
+from database.user_loader import UserLoader
+from utils.game_data import game_data
 from config import (
     CULTIVATION_REALMS, EMBED_COLOR, EMBED_COLOR_SUCCESS,
     EMBED_COLOR_ERROR, EMOJI_LINH_THACH
@@ -22,22 +22,11 @@ logger = logging.getLogger("tutien-bot.sect")
 class SectCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.load_sects()
 
-    def load_sects(self):
-        """Tải dữ liệu các môn phái từ JSON"""
-        try:
-            if os.path.exists("data/sects.json"):
-                with open("data/sects.json", "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.sect_templates = data.get("sects", [])
-                logger.info(f"Đã tải {len(self.sect_templates)} mẫu môn phái từ JSON")
-            else:
-                logger.warning("Không tìm thấy file data/sects.json")
-                self.sect_templates = []
-        except Exception as e:
-            logger.error(f"Lỗi khi tải dữ liệu môn phái: {e}")
-            self.sect_templates = []
+    @property
+    def sect_templates(self):
+        """Các mẫu môn phái trong dữ liệu game dùng chung"""
+        return game_data.sects
 
     @commands.group(name="monphai", aliases=["mp", "sect"], invoke_without_command=True)
     async def sect(self, ctx):
@@ -215,13 +204,10 @@ class SectCog(commands.Cog):
             color=EMBED_COLOR
         )
 
-        # Thêm thông tin từng thành viên
-        from database.mongo_handler import users_collection
-
-        # Lấy thông tin chi tiết của các thành viên
+        # Lấy thông tin chi tiết của các thành viên bằng một truy vấn
+        loader = UserLoader({"_id": 0, "username": 1, "realm_id": 1, "experience": 1})
         member_details = []
-        for member_id in members:
-            user_data = await users_collection.find_one({"user_id": member_id})
+        for member_id, user_data in zip(members, await loader.load_many(members)):
             if user_data:
                 # Lấy thông tin tu vi
                 realm_id = user_data.get("realm_id", 0)
@@ -2,7 +2,8 @@ import discord
 from discord.ext import commands
 import asyncio
 from database.mongo_handler import MongoHandler
-from utils.embed_utils import create_embed
+from database.settlement import TradeSettlement, SettlementError
+from utils.embed import create_embed
 from utils.text_utils import format_number
 
 
@@ -10,6 +11,7 @@ class Trading(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.db = MongoHandler()
+        self.settlement = TradeSettlement(self.db)
         self.active_trades = {}
 
     @commands.command(name="trade", aliases=["giaodich"])
@@ -358,20 +360,8 @@ class Trading(commands.Cog):
 
         # Thực hiện giao dịch
         try:
-            # Cập nhật linh thạch
-            await self.db.update_spirit_stones(user1.id, -user1_trade["spirit_stones"])
-            await self.db.update_spirit_stones(user2.id, -user2_trade["spirit_stones"])
-            await self.db.update_spirit_stones(user1.id, user2_trade["spirit_stones"])
-            await self.db.update_spirit_stones(user2.id, user1_trade["spirit_stones"])
-
-            # Cập nhật vật phẩm
-            for item in user1_trade["items"]:
-                await self.db.remove_item(user1.id, item["item_id"], item["quantity"])
-                await self.db.add_item(user2.id, item["item_id"], item["quantity"])
-
-            for item in user2_trade["items"]:
-                await self.db.remove_item(user2.id, item["item_id"], item["quantity"])
-                await self.db.add_item(user1.id, item["item_id"], item["quantity"])
+            # Trừ và cộng linh thạch, vật phẩm của cả hai bên cùng lúc
+            await self.settlement.settle(user1.id, user1_trade, user2.id, user2_trade)
 
             # Xóa thông tin giao dịch
             del self.active_trades[user1.id]
@@ -387,6 +377,23 @@ class Trading(commands.Cog):
                 view=None
             )
 
+        except SettlementError as e:
+            # Một bên không còn đủ tài sản, không có tài sản nào bị trừ
+            await trade_msg.edit(
+                embed=create_embed(
+                    title="Giao dịch thất bại",
+                    description=str(e),
+                    color=discord.Color.orange()
+                ),
+                view=None
+            )
+
+            # Xóa thông tin giao dịch
+            if user1.id in self.active_trades:
+                del self.active_trades[user1.id]
+            if user2.id in self.active_trades:
+                del self.active_trades[user2.id]
+
         except Exception as e:
             # Xử lý lỗi
             await trade_msg.edit(
@@ -405,5 +412,5 @@ class Trading(commands.Cog):
                 del self.active_trades[user2.id]
 
 
-def setup(bot):
-    bot.add_cog(Trading(bot))
+async def setup(bot):
+    await bot.add_cog(Trading(bot))
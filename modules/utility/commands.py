@@ -8,25 +8,27 @@ import os
 import time
 import psutil
 
-from database.mongo_handler import get_user_or_create, users_collection
+from database.mongo_handler import get_user_or_create, get_user_cache_stats, users_collection
 from config import (
     CULTIVATION_REALMS, EMBED_COLOR, EMBED_COLOR_SUCCESS,
     EMBED_COLOR_ERROR, EMOJI_LINH_THACH, EMOJI_EXP
 )
 from utils.text_utils import format_number, generate_random_quote
 from utils.time_utils import get_vietnamese_date_string
+from utils.live_message import edit_limiter, live_stats
+from utils.cooldowns import cooldowns
+from utils.game_data import game_data
 
 # Cấu hình logging
 logger = logging.getLogger("tutien-bot.commands")
 
-
 class CommandsCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.start_time = datetime.datetime.now()
 
     @commands.command(name="thongtin", aliases=["info", "botinfo"])
-    async def bot_info(self, ctx):
+    async def info_command(self, ctx):
         """Hiển thị thông tin về bot"""
         # Tính thời gian hoạt động
         uptime = datetime.datetime.now() - self.start_time
@@ -104,6 +106,73 @@ class CommandsCog(commands.Cog):
             inline=True
         )
 
+        # Thời gian mỗi lượt cộng kinh nghiệm voice
+        cultivation_cog = self.bot.get_cog("CultivationCog")
+        if cultivation_cog:
+            tick_stats = cultivation_cog.voice_tick_stats
+            embed.add_field(
+                name="Voice Tick",
+                value=f"{tick_stats['last_ms']:.0f} ms ({tick_stats['users']} người)\nTối đa: {tick_stats['max_ms']:.0f} ms",
+                inline=True
+            )
+
+        # Thống kê giới hạn kinh nghiệm chat
+        chat_limiter = getattr(self.bot, "chat_limiter", None)
+        if chat_limiter:
+            limiter_stats = chat_limiter.stats()
+            embed.add_field(
+                name="Lọc Chat EXP",
+                value=(
+                    f"Tính: {limiter_stats['allowed']:,} | Chặn: {limiter_stats['blocked_rate']:.0%}\n"
+                    f"Người: {limiter_stats['user_throttled']:,} | Kênh: {limiter_stats['channel_throttled']:,}\n"
+                    f"Trùng: {limiter_stats['duplicate']:,} | Vô nghĩa: {limiter_stats['low_entropy']:,}"
+                ),
+                inline=True
+            )
+
+        # Thông tin cập nhật tin nhắn trực tiếp
+        embed.add_field(
+            name="Cập Nhật Tin Nhắn",
+            value=(
+                f"Đã sửa: {live_stats['edits']:,} | Bỏ qua: {live_stats['dropped']:,}\n"
+                f"Chờ lượt: {edit_limiter.waits:,} | Bị giới hạn: {edit_limiter.rate_limited:,}"
+            ),
+            inline=True
+        )
+
+        # Thông tin dịch vụ thời gian hồi
+        cooldown_stats = cooldowns.stats()
+        embed.add_field(
+            name="Thời Gian Hồi",
+            value=(
+                f"Người dùng: {cooldown_stats['users']:,} | Nạp từ DB: {cooldown_stats['loads']:,}\n"
+                f"Từ chối: {cooldown_stats['rejections']:,} | Đã ghi: {cooldown_stats['writes']:,}"
+            ),
+            inline=True
+        )
+
+        # Thông tin dữ liệu game
+        startup = game_data.startup
+        embed.add_field(
+            name="Dữ Liệu Game",
+            value=(
+                f"Nạp từ: {startup.get('source', '-')} trong {startup.get('seconds', 0) * 1000:.1f} ms\n"
+                f"Tải lại: {game_data.reloads:,} | Lỗi: {game_data.errors:,}"
+            ),
+            inline=True
+        )
+
+        # Thông tin cache người dùng
+        cache_stats = get_user_cache_stats()
+        embed.add_field(
+            name="Cache Người Dùng",
+            value=(
+                f"{cache_stats['entries']:,} mục ({cache_stats['bytes'] / 1024:.0f} KB)\n"
+                f"Tỷ lệ trúng: {cache_stats['hit_rate']:.0%}"
+            ),
+            inline=True
+        )
+
         # Thêm thông tin tác giả
         embed.add_field(
             name="Tác Giả",
@@ -144,7 +213,7 @@ class CommandsCog(commands.Cog):
         # Cập nhật tin nhắn
         await message.edit(content=None, embed=embed)
 
-    @commands.command(name="lenh", aliases=["help", "commands", "trogiup"])
+    @commands.command(name="lenh", aliases=["commands", "trogiup"])
     async def help_command(self, ctx, *, command_name: str = None):
         """Hiển thị danh sách lệnh và cách sử dụng"""
         prefix = self.bot.command_prefix
@@ -112,136 +112,6 @@ class ErrorHandlerCog(commands.Cog):
 
         await ctx.send(embed=embed)
 
-    @commands.command(name="ping")
-    async def ping(self, ctx):
-        """Kiểm tra độ trễ của bot"""
-        # Tính toán độ trễ
-        latency = round(self.bot.latency * 1000)
-
-        # Tạo embed
-        embed = discord.Embed(
-            title="🏓 Pong!",
-            description=f"Độ trễ: **{latency}ms**",
-            color=discord.Color.green() if latency < 100 else discord.Color.orange() if latency < 200 else discord.Color.red()
-        )
-
-        # Gửi embed
-        await ctx.send(embed=embed)
-
-    @commands.command(name="info", aliases=["botinfo", "thongtin"])
-    async def bot_info(self, ctx):
-        """Hiển thị thông tin về bot"""
-        # Tạo embed
-        embed = discord.Embed(
-            title="🤖 Thông Tin Bot",
-            color=discord.Color.blue()
-        )
-
-        # Thêm thông tin bot
-        embed.add_field(
-            name="Tên",
-            value=self.bot.user.name,
-            inline=True
-        )
-
-        embed.add_field(
-            name="ID",
-            value=self.bot.user.id,
-            inline=True
-        )
-
-        # Thêm thông tin hệ thống
-        import platform
-        import discord
-
-        embed.add_field(
-            name="Phiên Bản Discord.py",
-            value=discord.__version__,
-            inline=True
-        )
-
-        embed.add_field(
-            name="Python",
-            value=platform.python_version(),
-            inline=True
-        )
-
-        embed.add_field(
-            name="Hệ Điều Hành",
-            value=platform.system(),
-            inline=True
-        )
-
-        # Thêm thông tin server
-        guild_count = len(self.bot.guilds)
-
-        embed.add_field(
-            name="Số Server",
-            value=guild_count,
-            inline=True
-        )
-
-        # Tính tổng số thành viên
-        member_count = sum(guild.member_count for guild in self.bot.guilds)
-
-        embed.add_field(
-            name="Số Thành Viên",
-            value=member_count,
-            inline=True
-        )
-
-        # Thêm thông tin ping
-        embed.add_field(
-            name="Ping",
-            value=f"{round(self.bot.latency * 1000)}ms",
-            inline=True
-        )
-
-        # Thêm thời gian hoạt động
-        from datetime import datetime
-        import psutil
-
-        # Lấy thời gian tiến trình Python đã chạy
-        process = psutil.Process()
-        uptime = datetime.now() - datetime.fromtimestamp(process.create_time())
-
-        # Định dạng thời gian hoạt động
-        days = uptime.days
-        hours, remainder = divmod(uptime.seconds, 3600)
-        minutes, seconds = divmod(remainder, 60)
-
-        uptime_str = f"{days} ngày, {hours} giờ, {minutes} phút, {seconds} giây"
-
-        embed.add_field(
-            name="Thời Gian Hoạt Động",
-            value=uptime_str,
-            inline=False
-        )
-
-        # Thêm thông tin bộ nhớ
-        ram_usage = psutil.Process().memory_info().rss / 1024 ** 2  # Đổi sang MB
-
-        embed.add_field(
-            name="Sử Dụng RAM",
-            value=f"{ram_usage:.2f} MB",
-            inline=True
-        )
-
-        # Thêm thông tin CPU
-        cpu_usage = psutil.Process().cpu_percent() / psutil.cpu_count()
-
-        embed.add_field(
-            name="Sử Dụng CPU",
-            value=f"{cpu_usage:.2f}%",
-            inline=True
-        )
-
-        # Thêm avatar
-        embed.set_thumbnail(url=self.bot.user.display_avatar.url)
-
-        # Gửi embed
-        await ctx.send(embed=embed)
-
     @commands.command(name="restart", aliases=["reboot"])
     @commands.is_owner()
     async def restart(self, ctx):
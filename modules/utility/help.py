@@ -273,7 +273,7 @@ class CustomHelpCommand(commands.HelpCommand):
         await ctx.send(embed=embed)
 
     @commands.command(name="gioi", aliases=["intro", "gt", "gioithieu"])
-    async def bot_intro(self, ctx):
+    async def intro_command(self, ctx):
         """Hiển thị giới thiệu về bot"""
         # Tạo embed
         embed = discord.Embed(
@@ -1,7 +1,6 @@
 import discord
 from discord.ext import commands
 import asyncio
-import datetime
 import random
 import logging
 import sys
@@ -16,7 +15,8 @@ from config import (
 )
 from utils.text_utils import format_number, generate_random_quote, realm_description
 from utils.time_utils import get_vietnamese_date_string, format_seconds
-from utils.embed_utils import create_embed, create_success_embed, create_error_embed
+from utils.cooldowns import cooldowns
+from utils.embed import create_embed, create_success_embed, create_error_embed
 
 # Cấu hình logging
 logger = logging.getLogger("tutien-bot.utility")
@@ -26,7 +26,7 @@ class UtilityCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-    @commands.command(name="profile", aliases=["p", "me", "thongtin"])
+    @commands.command(name="profile", aliases=["p", "me"])
     async def profile(self, ctx, member: discord.Member = None):
         """Hiển thị thông tin nhân vật của bạn hoặc người khác"""
         # Nếu không chỉ định member, lấy người gọi lệnh
@@ -419,11 +419,8 @@ class UtilityCog(commands.Cog):
     @commands.command(name="timeleft", aliases=["cooldown", "cd", "thoigian"])
     async def check_cooldowns(self, ctx):
         """Kiểm tra thời gian hồi của các hoạt động"""
-        # Lấy thông tin người dùng
-        user = await get_user_or_create(ctx.author.id, ctx.author.name)
-
-        # Lấy thời gian hiện tại
-        now = datetime.datetime.now()
+        # Thời gian hồi lấy từ bộ nhớ (chỉ đọc database ở lần đầu, người dùng chưa có dữ liệu thì mọi hoạt động đều sẵn sàng)
+        status = await cooldowns.status(ctx.author.id)
 
         # Tạo embed
         embed = create_embed(
@@ -431,110 +428,10 @@ class UtilityCog(commands.Cog):
             description="Thời gian còn lại cho các hoạt động:",
         )
 
-        # Kiểm tra thời gian điểm danh
-        last_daily = user.get("last_daily")
-        if last_daily:
-            last_daily = datetime.datetime.fromisoformat(last_daily)
-            # Kiểm tra xem đã qua ngày mới chưa
-            next_day = datetime.datetime.combine(last_daily.date() + datetime.timedelta(days=1), datetime.time.min)
-            if now < next_day:
-                time_diff = (next_day - now).total_seconds()
-                embed.add_field(
-                    name="Điểm Danh",
-                    value=format_seconds(time_diff),
-                    inline=True
-                )
-            else:
-                embed.add_field(
-                    name="Điểm Danh",
-                    value="✅ Sẵn sàng",
-                    inline=True
-                )
-        else:
-            embed.add_field(
-                name="Điểm Danh",
-                value="✅ Sẵn sàng",
-                inline=True
-            )
-
-        # Kiểm tra thời gian đánh quái
-        last_danhquai = user.get("last_danhquai")
-        if last_danhquai:
-            last_danhquai = datetime.datetime.fromisoformat(last_danhquai)
-            time_diff = (now - last_danhquai).total_seconds()
-            cooldown = 600  # 10 phút
-
-            if time_diff < cooldown:
-                remaining = cooldown - time_diff
-                embed.add_field(
-                    name="Đánh Quái",
-                    value=format_seconds(remaining),
-                    inline=True
-                )
-            else:
-                embed.add_field(
-                    name="Đánh Quái",
-                    value="✅ Sẵn sàng",
-                    inline=True
-                )
-        else:
-            embed.add_field(
-                name="Đánh Quái",
-                value="✅ Sẵn sàng",
-                inline=True
-            )
-
-        # Kiểm tra thời gian đánh boss
-        last_danhboss = user.get("last_danhboss")
-        if last_danhboss:
-            last_danhboss = datetime.datetime.fromisoformat(last_danhboss)
-            time_diff = (now - last_danhboss).total_seconds()
-            cooldown = 900  # 15 phút
-
-            if time_diff < cooldown:
-                remaining = cooldown - time_diff
-                embed.add_field(
-                    name="Đánh Boss",
-                    value=format_seconds(remaining),
-                    inline=True
-                )
-            else:
-                embed.add_field(
-                    name="Đánh Boss",
-                    value="✅ Sẵn sàng",
-                    inline=True
-                )
-        else:
-            embed.add_field(
-                name="Đánh Boss",
-                value="✅ Sẵn sàng",
-                inline=True
-            )
-
-        # Kiểm tra thời gian PvP
-        last_combat = user.get("last_combat")
-        if last_combat:
-            last_combat = datetime.datetime.fromisoformat(last_combat)
-            time_diff = (now - last_combat).total_seconds()
-            cooldown = 1800  # 30 phút
-
-            if time_diff < cooldown:
-                remaining = cooldown - time_diff
-                embed.add_field(
-                    name="PvP",
-                    value=format_seconds(remaining),
-                    inline=True
-                )
-            else:
-                embed.add_field(
-                    name="PvP",
-                    value="✅ Sẵn sàng",
-                    inline=True
-                )
-        else:
+        for action, remaining in status:
             embed.add_field(
-                name="PvP",
-                value="✅ Sẵn sàng",
+                name=action.label,
+                value=format_seconds(remaining) if remaining else "✅ Sẵn sàng",
                 inline=True
             )
 
@@ -0,0 +1,222 @@
+"""
+Mô phỏng Monte-Carlo để kiểm tra cân bằng chiến đấu và phần thưởng (chạy ngoài bot)
+
+Dùng đúng các công thức của bot: hệ số sức mạnh theo cảnh giới (config.REALMS), sát thương và
+thứ tự ra đòn của utils.combat_engine, bảng quái vật/boss và phần thưởng trong config
+(hoặc data/monsters.json, data/bosses.json). Mỗi cặp cảnh giới × quái vật được giải
+hàng triệu trận cùng lúc bằng NumPy.
+
+Cần NumPy (phụ thuộc không bắt buộc):  pip install -r requirements-optional.txt
+
+Chạy:  python -m utils.balance_sim [--fights 1000000] [--realms 0-28] [--source combat|data] [--csv]
+"""
+import argparse
+import time
+from typing import Dict, List, Optional, Any
+
+try:
+    import numpy as np
+except ImportError:  # Công cụ ngoài bot, không bắt buộc cài NumPy
+    np = None
+
+from config import (
+    REALMS, NEW_USER_STATS, COMBAT_MONSTERS, COMBAT_BOSSES, COMBAT_MAX_ROUNDS,
+    DANHQUAI_COOLDOWN, DANHBOSS_COOLDOWN
+)
+from utils.combat_engine import prepare_fighter, monster_level_range, boss_level_range, combat_rewards
+from utils.spawn_table import SpawnTable
+from utils.game_data import game_data
+
+
+def _damage(base: int, size: int, rng) -> "np.ndarray":
+    """Sát thương của `size` đòn đánh (giống utils.combat_engine.calculate_damage)"""
+    damage = np.floor(base * rng.uniform(0.8, 1.2, size))
+    crit = rng.random(size) < 0.1
+    return np.where(crit, np.floor(damage * 1.5), damage)
+
+
+def simulate_fights(player: Dict[str, Any], enemy: Dict[str, Any], fights: int, rng,
+                    max_rounds: int = COMBAT_MAX_ROUNDS) -> Dict[str, float]:
+    """
+    Giải `fights` trận người chơi (đánh trước) với một quái vật
+
+    Trả về {"win_rate", "avg_rounds", "avg_hp_left"}
+    """
+    player_base = max(1, player["attack"] - (enemy["defense"] // 2))
+    enemy_base = max(1, enemy["attack"] - (player["defense"] // 2))
+
+    player_hp = np.full(fights, float(player["health"]))
+    enemy_hp = np.full(fights, float(enemy["health"]))
+    rounds = np.full(fights, max_rounds)
+    won = np.zeros(fights, dtype=bool)
+    active = np.arange(fights)
+
+    for round_num in range(1, max_rounds + 1):
+        if active.size == 0:
+            break
+
+        # Người chơi đánh trước
+        enemy_hp[active] -= _damage(player_base, active.size, rng)
+        killed = enemy_hp[active] <= 0
+        won[active[killed]] = True
+        rounds[active[killed]] = round_num
+        active = active[~killed]
+
+        # Quái vật đánh trả
+        player_hp[active] -= _damage(enemy_base, active.size, rng)
+        dead = player_hp[active] <= 0
+        rounds[active[dead]] = round_num
+        active = active[~dead]
+
+    # Hết số lượt tối đa: bên còn nhiều máu hơn (theo tỷ lệ) thắng, hòa thì quái vật thắng
+    if active.size:
+        won[active] = player_hp[active] / player["health"] > enemy_hp[active] / enemy["health"]
+
+    return {
+        "win_rate": float(won.mean()),
+        "avg_rounds": float(rounds.mean()),
+        "avg_hp_left": float(np.clip(player_hp, 0, None).mean() / player["health"])
+    }
+
+
+def data_rewards(enemy: Dict[str, Any]):
+    """Phần thưởng theo dữ liệu JSON: (linh thạch tối thiểu, tối đa, kinh nghiệm)"""
+    return enemy.get("linh_thach_min", 0), enemy.get("linh_thach_max", 0), enemy.get("exp_reward", 0)
+
+
+def combat_spawn_tables() -> Dict[str, SpawnTable]:
+    """Bảng chọn quái vật/boss của !danhquai/!danhboss, trọng số lấy từ thư mục data như CombatCog"""
+    spawn_data = {e["name"]: e for catalog in (game_data.monsters, game_data.bosses) for e in catalog}
+
+    def weight_of(enemy):
+        return spawn_data.get(enemy["name"], enemy).get("spawn_weight", 1.0)
+
+    return {
+        "quai": SpawnTable(COMBAT_MONSTERS, lambda realm_id: monster_level_range(realm_id, len(COMBAT_MONSTERS)),
+                           weight_of=weight_of),
+        "boss": SpawnTable(COMBAT_BOSSES, boss_level_range, weight_of=weight_of)
+    }
+
+
+def run(realm_ids: List[int], fights: int, source: str = "combat", seed: Optional[int] = None,
+        stats: Optional[Dict[str, int]] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Chạy mô phỏng cho các cảnh giới
+
+    Trả về {"pairs": [mỗi cặp cảnh giới × quái vật], "summary": [mỗi cảnh giới]}
+    """
+    if np is None:
+        raise RuntimeError("Cần cài NumPy để chạy mô phỏng: pip install numpy")
+
+    rng = np.random.default_rng(seed)
+    spawn_tables = combat_spawn_tables()
+    stats = stats or NEW_USER_STATS
+    pairs = []
+    summary = []
+
+    for realm_id in realm_ids:
+        player = prepare_fighter("Người chơi", stats, realm_id)
+        row = {"realm_id": realm_id, "realm": REALMS.name(realm_id)}
+
+        for kind, cooldown, is_boss in (("quai", DANHQUAI_COOLDOWN, False), ("boss", DANHBOSS_COOLDOWN, True)):
+            # Các đối thủ có thể gặp ở cảnh giới này và xác suất gặp
+            if source == "data":
+                enemies = list(game_data.bosses if is_boss else game_data.monsters)
+                enemies = [e for e in enemies if e.get("min_realm", 0) <= realm_id] or enemies[:1]
+                spawns = [(enemy, 1 / len(enemies)) for enemy in enemies]
+            else:
+                spawns = spawn_tables[kind].probabilities(realm_id)
+
+            exp_total = 0.0
+            stones_total = 0.0
+            win_total = 0.0
+            for enemy, chance in spawns:
+                result = simulate_fights(player, enemy, fights, rng)
+                stones_min, stones_max, exp = data_rewards(enemy) if source == "data" else combat_rewards(enemy, is_boss)
+
+                pairs.append({
+                    "realm_id": realm_id,
+                    "realm": row["realm"],
+                    "kind": kind,
+                    "enemy": enemy["name"],
+                    "level": enemy["level"],
+                    **result
+                })
+                win_total += chance * result["win_rate"]
+                exp_total += chance * result["win_rate"] * exp
+                stones_total += chance * result["win_rate"] * (stones_min + stones_max) / 2
+
+            # Số lần đánh mỗi giờ bị giới hạn bởi cooldown
+            per_hour = 3600 / cooldown
+            row[f"{kind}_win_rate"] = win_total
+            row[f"{kind}_exp_hour"] = exp_total * per_hour
+            row[f"{kind}_stones_hour"] = stones_total * per_hour
+
+        summary.append(row)
+
+    return {"pairs": pairs, "summary": summary}
+
+
+def format_table(rows: List[Dict[str, Any]], columns: List[tuple], csv: bool = False) -> str:
+    """In bảng: columns = [(tiêu đề, khóa, định dạng)]"""
+    if csv:
+        lines = [",".join(title for title, _, _ in columns)]
+        lines += [",".join(str(row[key]) for _, key, _ in columns) for row in rows]
+        return "\n".join(lines)
+
+    cells = [[format(row[key], fmt) for _, key, fmt in columns] for row in rows]
+    widths = [max([len(title)] + [len(r[i]) for r in cells]) for i, (title, _, _) in enumerate(columns)]
+    lines = ["  ".join(title.ljust(width) for (title, _, _), width in zip(columns, widths)),
+             "  ".join("-" * width for width in widths)]
+    lines += ["  ".join(cell.ljust(width) for cell, width in zip(r, widths)) for r in cells]
+    return "\n".join(lines)
+
+
+def parse_realms(value: str) -> List[int]:
+    """"0-28" hoặc "0,5,10" -> danh sách id cảnh giới"""
+    realm_ids = []
+    for part in value.split(","):
+        if "-" in part:
+            start, end = part.split("-", 1)
+            realm_ids.extend(range(int(start), int(end) + 1))
+        elif part:
+            realm_ids.append(int(part))
+    return [realm_id for realm_id in realm_ids if REALMS.get(realm_id)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mô phỏng cân bằng chiến đấu và phần thưởng")
+    parser.add_argument("--fights", type=int, default=1_000_000, help="Số trận cho mỗi cặp cảnh giới × quái vật")
+    parser.add_argument("--realms", default=f"0-{REALMS.max_id}", help="Các cảnh giới, ví dụ 0-28 hoặc 0,10,20")
+    parser.add_argument("--source", choices=["combat", "data"], default="combat",
+                        help="combat: bảng quái vật của !danhquai/!danhboss, data: data/monsters.json và data/bosses.json")
+    parser.add_argument("--seed", type=int, default=None, help="Seed để kết quả lặp lại được")
+    parser.add_argument("--pairs", action="store_true", help="In thêm bảng chi tiết từng cặp cảnh giới × quái vật")
+    parser.add_argument("--csv", action="store_true", help="In dạng CSV")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = run(parse_realms(args.realms), args.fights, args.source, args.seed)
+    elapsed = time.perf_counter() - start
+
+    if args.pairs:
+        print(format_table(result["pairs"], [
+            ("Cảnh giới", "realm", ""), ("Loại", "kind", ""), ("Đối thủ", "enemy", ""), ("Cấp", "level", "d"),
+            ("Thắng", "win_rate", ".1%"), ("Số lượt", "avg_rounds", ".1f"), ("Máu còn", "avg_hp_left", ".0%")
+        ], args.csv))
+        print()
+
+    print(format_table(result["summary"], [
+        ("Cảnh giới", "realm", ""),
+        ("Thắng quái", "quai_win_rate", ".1%"), ("EXP/giờ (quái)", "quai_exp_hour", ",.0f"),
+        ("Linh thạch/giờ (quái)", "quai_stones_hour", ",.0f"),
+        ("Thắng boss", "boss_win_rate", ".1%"), ("EXP/giờ (boss)", "boss_exp_hour", ",.0f"),
+        ("Linh thạch/giờ (boss)", "boss_stones_hour", ",.0f")
+    ], args.csv))
+
+    if not args.csv:
+        print(f"\n{len(result['pairs'])} cặp × {args.fights:,} trận trong {elapsed:.1f} giây")
+
+
+if __name__ == "__main__":
+    main()
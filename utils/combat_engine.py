@@ -0,0 +1,177 @@
+"""
+Bộ giải trận đấu không phụ thuộc Discord
+
+Toàn bộ trận đấu được tính xong ngay (không sleep, không gửi tin nhắn) và trả về nhật ký
+gọn gồm các đòn đánh. Phần hiển thị chỉ phát lại một vài khung hình chính từ nhật ký này.
+"""
+import random
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Any
+
+from config import (
+    COMBAT_MAX_ROUNDS, QUAI_MIN_REWARD, QUAI_MAX_REWARD, BOSS_MIN_REWARD, BOSS_MAX_REWARD,
+    QUAI_EXP_PER_LEVEL, BOSS_EXP_PER_LEVEL, get_power_multiplier
+)
+
+
+class Hit(NamedTuple):
+    """Một đòn đánh trong nhật ký trận đấu"""
+    round: int
+    attacker: int  # Vị trí người tấn công trong fighters (0 hoặc 1)
+    damage: int
+    crit: bool
+    hp: int  # Máu còn lại của người bị đánh
+
+
+class CombatResult(NamedTuple):
+    """Kết quả trận đấu"""
+    winner: int  # Vị trí người thắng trong fighters
+    rounds: int
+    hits: List[Hit]
+    hp: Tuple[int, int]  # Máu còn lại của hai bên
+    max_hp: Tuple[int, int]  # Máu ban đầu của hai bên
+
+    def hp_after(self, round_num: int) -> Tuple[int, int]:
+        """Máu của hai bên sau khi kết thúc lượt round_num"""
+        hp = list(self.max_hp)
+        for hit in self.hits:
+            if hit.round > round_num:
+                break
+            hp[1 - hit.attacker] = hit.hp
+        return hp[0], hp[1]
+
+
+def prepare_fighter(name: str, stats: Dict[str, Any], realm_id: int = 0, level: Optional[int] = None) -> Dict[str, Any]:
+    """Tạo chỉ số chiến đấu, áp dụng hệ số sức mạnh theo cảnh giới"""
+    multiplier = get_power_multiplier(realm_id)
+    fighter = {
+        "name": name,
+        "health": int(stats["health"] * multiplier),
+        "attack": int(stats["attack"] * multiplier),
+        "defense": int(stats["defense"] * multiplier),
+        "realm_id": realm_id
+    }
+    if level is not None:
+        fighter["level"] = level
+    return fighter
+
+
+def monster_level_range(realm_id: int, max_level: int) -> Tuple[int, int]:
+    """Phạm vi cấp quái vật của !danhquai theo cảnh giới"""
+    min_level = max(1, realm_id // 3)
+    return min_level, min(max_level, min_level + 3)
+
+
+def boss_level_range(realm_id: int) -> Tuple[int, None]:
+    """Phạm vi cấp boss của !danhboss theo cảnh giới (không giới hạn trên)"""
+    return max(15, (realm_id * 2) // 3), None
+
+
+def suitable_monsters(monsters: List[Dict[str, Any]], realm_id: int) -> List[Dict[str, Any]]:
+    """Các quái vật phù hợp với cảnh giới (con yếu nhất nếu không có con nào)"""
+    min_level, max_level = monster_level_range(realm_id, len(monsters))
+    return [m for m in monsters if min_level <= m["level"] <= max_level] or [monsters[0]]
+
+
+def suitable_bosses(bosses: List[Dict[str, Any]], realm_id: int) -> List[Dict[str, Any]]:
+    """Các boss phù hợp với cảnh giới (con yếu nhất nếu không có con nào)"""
+    min_level, _ = boss_level_range(realm_id)
+    return [b for b in bosses if b["level"] >= min_level] or [bosses[0]]
+
+
+def combat_rewards(enemy: Dict[str, Any], is_boss: bool = False) -> Tuple[int, int, int]:
+    """Phần thưởng khi thắng: (linh thạch tối thiểu, linh thạch tối đa, kinh nghiệm)"""
+    if is_boss:
+        return BOSS_MIN_REWARD, BOSS_MAX_REWARD, enemy["level"] * BOSS_EXP_PER_LEVEL
+    return QUAI_MIN_REWARD, QUAI_MAX_REWARD, enemy["level"] * QUAI_EXP_PER_LEVEL
+
+
+def calculate_damage(attacker: Dict[str, Any], defender: Dict[str, Any], rng=random) -> Tuple[int, bool]:
+    """Tính toán sát thương"""
+    base_damage = max(1, attacker["attack"] - (defender["defense"] // 2))
+
+    # Thêm yếu tố ngẫu nhiên (+-20%)
+    damage = int(base_damage * rng.uniform(0.8, 1.2))
+
+    # Crit (10% cơ hội)
+    is_crit = rng.random() < 0.1
+    if is_crit:
+        damage = int(damage * 1.5)
+
+    return damage, is_crit
+
+
+def resolve_combat(fighters: Sequence[Dict[str, Any]], first: int = 0, rng=random,
+                   max_rounds: int = COMBAT_MAX_ROUNDS) -> CombatResult:
+    """
+    Giải toàn bộ trận đấu giữa fighters[0] và fighters[1]
+
+    first: vị trí người đánh trước trong mỗi lượt
+    Nếu hết max_rounds mà chưa phân thắng bại, bên còn nhiều máu (theo tỷ lệ) thắng, hòa thì người đánh sau thắng.
+    """
+    max_hp = (fighters[0]["health"], fighters[1]["health"])
+    hp = list(max_hp)
+    order = (first, 1 - first)
+    hits = []
+
+    round_num = 0
+    while round_num < max_rounds:
+        round_num += 1
+        for attacker in order:
+            defender = 1 - attacker
+            damage, is_crit = calculate_damage(fighters[attacker], fighters[defender], rng)
+            hp[defender] = max(0, hp[defender] - damage)
+            hits.append(Hit(round_num, attacker, damage, is_crit, hp[defender]))
+
+            if hp[defender] <= 0:
+                return CombatResult(attacker, round_num, hits, (hp[0], hp[1]), max_hp)
+
+    # Hết số lượt tối đa
+    ratios = [hp[i] / max(1, max_hp[i]) for i in (0, 1)]
+    winner = order[0] if ratios[order[0]] > ratios[order[1]] else order[1]
+    return CombatResult(winner, round_num, hits, (hp[0], hp[1]), max_hp)
+
+
+def resolve_many(matches: Sequence[Tuple[Dict[str, Any], Dict[str, Any]]], first: int = 0,
+                 rng=random) -> List[CombatResult]:
+    """Giải nhiều trận đấu cùng lúc (ví dụ đánh quái hàng loạt)"""
+    return [resolve_combat(match, first, rng) for match in matches]
+
+
+def key_frames(result: CombatResult, max_frames: int) -> List[int]:
+    """
+    Chọn các lượt đáng hiển thị trước khung hình kết quả cuối cùng
+
+    Ưu tiên các lượt có đòn chí mạng, phần còn lại chia đều theo thời gian trận đấu.
+    """
+    # Lượt cuối được hiển thị cùng kết quả
+    candidates = list(range(1, result.rounds))
+    if max_frames <= 0 or not candidates:
+        return []
+    if len(candidates) <= max_frames:
+        return candidates
+
+    crit_rounds = sorted({hit.round for hit in result.hits if hit.crit and hit.round < result.rounds})
+    frames = set(crit_rounds[:max_frames // 2])
+
+    step = len(candidates) / (max_frames - len(frames) + 1)
+    position = step
+    while len(frames) < max_frames and position < len(candidates):
+        frames.add(candidates[int(position)])
+        position += step
+
+    return sorted(frames)[:max_frames]
+
+
+def format_hit(hit: Hit, fighters: Sequence[Dict[str, Any]]) -> str:
+    """Dòng nhật ký cho một đòn đánh"""
+    icon = "🔶" if hit.attacker == 0 else "🔷"
+    crit_text = " (Chí mạng!)" if hit.crit else ""
+    attacker = fighters[hit.attacker]["name"]
+    defender = fighters[1 - hit.attacker]["name"]
+    return f"{icon} **Lượt {hit.round}:** {attacker} gây ra {hit.damage} sát thương{crit_text}. {defender} còn {hit.hp} HP."
+
+
+def log_lines(result: CombatResult, fighters: Sequence[Dict[str, Any]], until_round: int, limit: int) -> List[str]:
+    """Các dòng nhật ký gần nhất tính đến hết lượt until_round"""
+    hits = [hit for hit in result.hits if hit.round <= until_round]
+    return [format_hit(hit, fighters) for hit in hits[-limit:]]
@@ -0,0 +1,240 @@
+"""
+Dịch vụ thời gian hồi dùng chung cho các lệnh
+
+Thời điểm hết hồi (epoch, giây) của từng người dùng được giữ trong bộ nhớ. Lệnh bị từ chối vì đang hồi
+được trả lời ngay mà không đọc database; chỉ lần đầu gặp một người dùng mới nạp các mốc thời gian
+từ document (trường phẳng last_* hoặc activities.cooldowns.* của mô hình User). Khi bắt đầu hồi,
+mốc thời gian được ghi xuống database ở nền (gom nhiều lần ghi thành một bulk_write).
+"""
+import asyncio
+import datetime
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Any
+
+from database.mongo_handler import get_users, bulk_set_user_fields
+from config import (
+    DANHQUAI_COOLDOWN, DANHBOSS_COOLDOWN, COMBAT_COOLDOWN, WORLD_BOSS_ATTACK_COOLDOWN,
+    COOLDOWN_CACHE_MAX_USERS, COOLDOWN_FLUSH_DELAY
+)
+
+# Cấu hình logging
+logger = logging.getLogger("tutien-bot.cooldowns")
+
+
+class CooldownAction(NamedTuple):
+    """Một hoạt động có thời gian hồi"""
+    key: str
+    label: str  # Tên hiển thị trong !cooldowns
+    field: str  # Trường phẳng lưu lần thực hiện cuối (ISO)
+    nested: str  # Đường dẫn tương ứng trong mô hình User
+    seconds: Optional[int]  # None: hồi vào 0 giờ ngày hôm sau
+
+
+COOLDOWN_ACTIONS = [
+    CooldownAction("daily", "Điểm Danh", "last_daily", "activities.last_daily", None),
+    CooldownAction("danhquai", "Đánh Quái", "last_danhquai", "activities.cooldowns.hunt", DANHQUAI_COOLDOWN),
+    CooldownAction("danhboss", "Đánh Boss", "last_danhboss", "activities.cooldowns.boss", DANHBOSS_COOLDOWN),
+    CooldownAction("combat", "PvP", "last_combat", "activities.cooldowns.pvp", COMBAT_COOLDOWN),
+    CooldownAction("raid", "Boss Thế Giới", "last_raid", "activities.cooldowns.raid", WORLD_BOSS_ATTACK_COOLDOWN),
+]
+
+
+def _to_datetime(value: Any) -> Optional[datetime.datetime]:
+    if isinstance(value, datetime.datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _get_path(document: Dict[str, Any], path: str) -> Any:
+    for key in path.split("."):
+        if not isinstance(document, dict):
+            return None
+        document = document.get(key)
+    return document
+
+
+class CooldownService:
+    """
+    Thời gian hồi của người dùng: {user_id: [thời điểm hết hồi của từng hoạt động]}
+
+    Chỉ giữ tối đa `max_users` người dùng, người dùng lâu không dùng bị loại trước
+    (và được nạp lại từ database khi cần).
+    """
+
+    def __init__(self, actions: List[CooldownAction], max_users: int = COOLDOWN_CACHE_MAX_USERS,
+                 flush_delay: float = COOLDOWN_FLUSH_DELAY):
+        self.actions = actions
+        self.index = {action.key: i for i, action in enumerate(actions)}
+        self.max_users = max_users
+        self.flush_delay = flush_delay
+
+        self._expiries: "OrderedDict[int, List[int]]" = OrderedDict()
+        self._loading: Dict[int, asyncio.Future] = {}
+        self._dirty: Dict[int, Dict[str, str]] = {}  # {user_id: {trường: giá trị}} chờ ghi
+        self._flush_task: Optional[asyncio.Task] = None
+
+        # Thống kê
+        self.hits = 0
+        self.loads = 0
+        self.rejections = 0
+        self.writes = 0
+
+    def __len__(self) -> int:
+        return len(self._expiries)
+
+    def _expiry(self, action: CooldownAction, last: datetime.datetime) -> int:
+        """Thời điểm hết hồi (epoch) tính từ lần thực hiện cuối"""
+        if action.seconds is None:
+            next_day = datetime.datetime.combine(last.date() + datetime.timedelta(days=1), datetime.time.min)
+            return int(next_day.timestamp())
+        return math.ceil(last.timestamp()) + action.seconds
+
+    def _from_document(self, document: Optional[Dict[str, Any]]) -> List[int]:
+        """Các thời điểm hết hồi lấy từ document (mốc muộn nhất giữa trường phẳng và trường lồng nhau)"""
+        expiries = [0] * len(self.actions)
+        if not document:
+            return expiries
+
+        for i, action in enumerate(self.actions):
+            times = [t for t in (_to_datetime(document.get(action.field)),
+                                 _to_datetime(_get_path(document, action.nested))) if t is not None]
+            if times:
+                expiries[i] = self._expiry(action, max(times))
+        return expiries
+
+    def projection(self) -> Dict[str, int]:
+        """Projection chỉ gồm các trường lưu mốc thời gian"""
+        projection = {"_id": 0}
+        for action in self.actions:
+            projection[action.field] = 1
+            projection[action.nested] = 1
+        return projection
+
+    def _remember(self, user_id: int, expiries: List[int]) -> List[int]:
+        self._expiries[user_id] = expiries
+        self._expiries.move_to_end(user_id)
+        if len(self._expiries) > self.max_users:
+            # Không loại người dùng còn mốc thời gian chưa ghi xuống database
+            for old_id in list(self._expiries):
+                if len(self._expiries) <= self.max_users:
+                    break
+                if old_id not in self._dirty and old_id != user_id:
+                    del self._expiries[old_id]
+        return expiries
+
+    async def _load(self, user_id: int) -> List[int]:
+        expiries = self._expiries.get(user_id)
+        if expiries is not None:
+            self.hits += 1
+            self._expiries.move_to_end(user_id)
+            return expiries
+
+        # Nhiều lệnh cùng lúc của một người dùng chỉ đọc database một lần
+        future = self._loading.get(user_id)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[user_id] = future
+        try:
+            self.loads += 1
+            users = await get_users([user_id], self.projection())
+            document = users.get(user_id)
+            if user_id in self._dirty:
+                # Các mốc chưa kịp ghi xuống database mới hơn dữ liệu vừa đọc
+                document = {**(document or {}), **self._dirty[user_id]}
+            expiries = self._expiries.get(user_id) or self._remember(user_id, self._from_document(document))
+            future.set_result(expiries)
+            return expiries
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Tránh cảnh báo khi không có ai chờ
+            raise
+        finally:
+            del self._loading[user_id]
+
+    async def remaining(self, user_id: int, key: str) -> int:
+        """Số giây còn lại trước khi được thực hiện hoạt động (0 nếu đã sẵn sàng)"""
+        expiries = await self._load(user_id)
+        remaining = max(0, expiries[self.index[key]] - int(time.time()))
+        if remaining:
+            self.rejections += 1
+        return remaining
+
+    async def status(self, user_id: int) -> List[tuple]:
+        """Thời gian còn lại của mọi hoạt động: [(hoạt động, số giây)]"""
+        expiries = await self._load(user_id)
+        now = int(time.time())
+        return [(action, max(0, expiry - now)) for action, expiry in zip(self.actions, expiries)]
+
+    def start(self, user_id: int, key: str, now: Optional[datetime.datetime] = None, persist: bool = True) -> None:
+        """
+        Bắt đầu thời gian hồi của hoạt động
+
+        persist=False khi lệnh tự ghi mốc thời gian cùng các trường khác (vd: điểm danh)
+        """
+        action = self.actions[self.index[key]]
+        now = now or datetime.datetime.now()
+
+        # Người dùng chưa được nạp sẽ đọc mốc thời gian này (từ database hoặc hàng chờ ghi) ở lần nạp sau
+        expiries = self._expiries.get(user_id)
+        if expiries is not None:
+            expiries[self.index[key]] = self._expiry(action, now)
+
+        if persist:
+            self._dirty.setdefault(user_id, {})[action.field] = now.isoformat()
+            if self._flush_task is None or self._flush_task.done():
+                self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def try_start(self, user_id: int, key: str) -> int:
+        """Bắt đầu hồi nếu đã sẵn sàng; trả về số giây còn lại nếu vẫn đang hồi (0 nếu đã bắt đầu)"""
+        remaining = await self.remaining(user_id, key)
+        if not remaining:
+            self.start(user_id, key)
+        return remaining
+
+    def reset(self, user_id: int) -> None:
+        """Quên thời gian hồi của người dùng (nạp lại ở lần dùng kế tiếp, vd: sau khi admin sửa dữ liệu)"""
+        # Bỏ luôn các mốc chờ ghi để không ghi đè dữ liệu admin vừa đặt lại
+        self._dirty.pop(user_id, None)
+        self._expiries.pop(user_id, None)
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_delay)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Ghi các mốc thời gian đang chờ xuống database"""
+        while self._dirty:
+            dirty, self._dirty = self._dirty, {}
+            try:
+                await bulk_set_user_fields(dirty)
+                self.writes += len(dirty)
+            except Exception as e:
+                logger.error(f"Không thể ghi thời gian hồi của {len(dirty)} người dùng: {e}")
+                # Giữ lại để thử lần sau (không ghi đè mốc mới hơn)
+                for user_id, fields in dirty.items():
+                    self._dirty[user_id] = {**fields, **self._dirty.get(user_id, {})}
+                return
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "users": len(self._expiries),
+            "hits": self.hits,
+            "loads": self.loads,
+            "rejections": self.rejections,
+            "writes": self.writes,
+            "pending": len(self._dirty)
+        }
+
+
+# Dịch vụ dùng chung cho toàn bộ bot
+cooldowns = CooldownService(COOLDOWN_ACTIONS)
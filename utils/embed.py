@@ -50,7 +50,7 @@ def create_embed(title=None, description=None, color=None, author=None, footer=N
     if author:
         name = author.get('name', '')
         icon_url = author.get('icon_url', '')
-        url = author.get('url', discord.Embed.Empty)
+        url = author.get('url')
         embed.set_author(name=name, icon_url=icon_url, url=url)
 
     # Thêm footer nếu được cung cấp
@@ -81,6 +81,16 @@ def create_embed(title=None, description=None, color=None, author=None, footer=N
     return embed
 
 
+def create_success_embed(title=None, description=None, **kwargs):
+    """Tạo embed thông báo thành công (màu xanh lá)"""
+    return create_embed(title=title, description=description, color=config.EMBED_COLOR_SUCCESS, **kwargs)
+
+
+def create_error_embed(title=None, description=None, **kwargs):
+    """Tạo embed thông báo lỗi (màu đỏ)"""
+    return create_embed(title=title, description=description, color=config.EMBED_COLOR_ERROR, **kwargs)
+
+
 def create_user_embed(user_data, member=None):
     """
     Tạo embed hiển thị thông tin người dùng
@@ -673,7 +683,7 @@ def create_help_embed(command_list, category=None):
     else:
         for cmd_name, cmd_info in commands.items():
             embed.add_field(
-                name=f"{config.PREFIX}{cmd_name} {cmd_info.get('usage', '')}",
+                name=f"{config.BOT_PREFIX}{cmd_name} {cmd_info.get('usage', '')}",
                 value=cmd_info.get('description', 'Không có mô tả'),
                 inline=False
             )
@@ -698,7 +708,7 @@ def create_command_help_embed(command_name, command_info):
         Embed trợ giúp chi tiết
     """
     embed = create_embed(
-        title=f"Trợ giúp: {config.PREFIX}{command_name}",
+        title=f"Trợ giúp: {config.BOT_PREFIX}{command_name}",
         color=config.EMBED_COLOR
     )
 
@@ -713,14 +723,14 @@ def create_command_help_embed(command_name, command_info):
     usage = command_info.get('usage', '')
     embed.add_field(
         name="Cách sử dụng",
-        value=f"{config.PREFIX}{command_name} {usage}",
+        value=f"{config.BOT_PREFIX}{command_name} {usage}",
         inline=False
     )
 
     # Ví dụ
     examples = command_info.get('examples', [])
     if examples:
-        examples_text = "\n".join([f"{config.PREFIX}{example}" for example in examples])
+        examples_text = "\n".join([f"{config.BOT_PREFIX}{example}" for example in examples])
         embed.add_field(
             name="Ví dụ",
             value=examples_text,
@@ -730,7 +740,7 @@ def create_command_help_embed(command_name, command_info):
     # Bí danh
     aliases = command_info.get('aliases', [])
     if aliases:
-        aliases_text = ", ".join([f"{config.PREFIX}{alias}" for alias in aliases])
+        aliases_text = ", ".join([f"{config.BOT_PREFIX}{alias}" for alias in aliases])
         embed.add_field(
             name="Bí danh",
             value=aliases_text,
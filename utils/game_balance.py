@@ -3,7 +3,7 @@ Mô-đun cân bằng game - chứa các hàm và hằng số để cân bằng t
 """
 import random
 import math
-from config import CULTIVATION_REALMS
+from config import REALMS
 
 def calculate_combat_power(user_data):
     """
@@ -25,11 +25,7 @@ def calculate_combat_power(user_data):
     stage = cultivation.get('stage', 1)
 
     # Lấy hệ số cảnh giới
-    realm_index = 0
-    for i, r in enumerate(CULTIVATION_REALMS):
-        if r['name'] == realm:
-            realm_index = i
-            break
+    realm_index = REALMS.ordinal(realm)
 
     # Tính toán sức mạnh cơ bản
     base_power = (realm_index + 1) * 1000 + stage * 100
@@ -83,11 +79,7 @@ def calculate_exp_requirement(realm, stage):
         Lượng kinh nghiệm cần thiết
     """
     # Tìm chỉ số cảnh giới
-    realm_index = 0
-    for i, r in enumerate(CULTIVATION_REALMS):
-        if r['name'] == realm:
-            realm_index = i
-            break
+    realm_index = REALMS.ordinal(realm)
 
     # Công thức tính kinh nghiệm cần thiết
     base_exp = 100  # Kinh nghiệm cơ bản
@@ -119,11 +111,7 @@ def calculate_cultivation_time(realm, stage, current_exp, target_exp):
         Thời gian tu luyện cần thiết (giây)
     """
     # Tìm chỉ số cảnh giới
-    realm_index = 0
-    for i, r in enumerate(CULTIVATION_REALMS):
-        if r['name'] == realm:
-            realm_index = i
-            break
+    realm_index = REALMS.ordinal(realm)
 
     # Tính tốc độ tu luyện (kinh nghiệm/giây)
     base_rate = 0.5  # Tốc độ cơ bản
@@ -402,11 +390,7 @@ def calculate_health(realm, stage):
         Lượng máu tối đa
     """
     # Tìm chỉ số cảnh giới
-    realm_index = 0
-    for i, r in enumerate(CULTIVATION_REALMS):
-        if r['name'] == realm:
-            realm_index = i
-            break
+    realm_index = REALMS.ordinal(realm)
 
     # Công thức tính máu tối đa
     base_health = 100  # Máu cơ bản
@@ -434,11 +418,7 @@ def calculate_healing_rate(realm, stage):
         Tốc độ hồi máu (% máu tối đa mỗi phút)
     """
     # Tìm chỉ số cảnh giới
-    realm_index = 0
-    for i, r in enumerate(CULTIVATION_REALMS):
-        if r['name'] == realm:
-            realm_index = i
-            break
+    realm_index = REALMS.ordinal(realm)
 
     # Công thức tính tốc độ hồi máu
     base_rate = 1.0  # Tốc độ cơ bản (1% mỗi phút)
@@ -720,11 +700,7 @@ def calculate_breakthrough_chance(user_data):
         return 0.0
 
     # Tìm chỉ số cảnh giới
-    realm_index = 0
-    for i, r in enumerate(CULTIVATION_REALMS):
-        if r['name'] == realm:
-            realm_index = i
-            break
+    realm_index = REALMS.ordinal(realm)
 
     # Cơ hội cơ bản giảm dần theo cảnh giới
     base_chance = 0.5 - realm_index * 0.05
@@ -767,11 +743,7 @@ def calculate_breakthrough_cost(realm):
         Chi phí đột phá (linh thạch, vật phẩm cần thiết)
     """
     # Tìm chỉ số cảnh giới
-    realm_index = 0
-    for i, r in enumerate(CULTIVATION_REALMS):
-        if r['name'] == realm:
-            realm_index = i
-            break
+    realm_index = REALMS.ordinal(realm)
 
     # Chi phí linh thạch tăng theo cấp bậc
     base_cost = 1000
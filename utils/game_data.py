@@ -0,0 +1,484 @@
+"""
+Dữ liệu game dùng chung (data/*.json) được nạp một lần cho toàn bộ bot
+
+Mỗi danh mục (vật phẩm, quái vật, boss, môn phái, sự kiện) được đọc, kiểm tra theo schema và đóng băng
+(dict -> FrozenDict, list -> tuple) thành một Catalog tra cứu theo id. Các cog dùng chung
+cùng một bản trong bộ nhớ thay vì tự đọc file. Khi file thay đổi (mtime khác), danh mục mới được
+dựng xong rồi mới thay thế bản cũ; nếu file mới bị lỗi, bản cũ được giữ nguyên.
+
+Để khởi động nhanh, các danh mục đã kiểm tra và đóng băng (kèm bảng tra theo id) được biên dịch sẵn
+thành một file snapshot (pickle) và nạp bằng một lần đọc. Snapshot cũ hơn file JSON bị bỏ qua.
+Snapshot chỉ là file nội bộ do chính bot tạo, không nạp snapshot từ nguồn không tin cậy.
+
+Biên dịch:  python -m utils.game_data build
+Kiểm tra:   python -m utils.game_data check
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import pickle
+import time
+from typing import Any, Callable, Dict, Iterator, List, Mapping, NamedTuple, Optional, Tuple
+
+from config import GAME_DATA_DIR, GAME_DATA_CHECK_INTERVAL, GAME_DATA_SNAPSHOT
+
+# Cấu hình logging
+logger = logging.getLogger("tutien-bot.game_data")
+
+
+# Tăng khi cấu trúc Catalog/FrozenDict thay đổi để snapshot cũ bị bỏ qua
+SNAPSHOT_VERSION = 1
+
+NUMBER = (int, float)
+
+
+class CatalogSpec(NamedTuple):
+    """Cách đọc và kiểm tra một danh mục"""
+    file_name: str
+    key: str  # Khóa chứa danh sách trong file ({"items": [...]})
+    required: Dict[str, Any]  # Trường bắt buộc -> kiểu dữ liệu
+    optional: Dict[str, Any] = {}  # Trường không bắt buộc -> kiểu dữ liệu (nếu có)
+    nested: Dict[str, Dict[str, Any]] = {}  # Trường danh sách object -> các trường bắt buộc của mỗi object
+    defaults: List[Dict[str, Any]] = []  # Dữ liệu trong bộ nhớ dùng khi file không có hoặc lỗi ngay lần nạp đầu
+
+
+ENEMY_FIELDS = {"id": int, "name": str, "level": int, "health": NUMBER, "attack": NUMBER, "defense": NUMBER}
+ENEMY_OPTIONAL = {"exp_reward": NUMBER, "linh_thach_min": int, "linh_thach_max": int, "min_realm": int,
+                  "spawn_weight": NUMBER, "drops": list}
+DROP_FIELDS = {"item_id": str}
+
+# Dữ liệu mặc định (chỉ trong bộ nhớ), dùng khi data/monsters.json hoặc data/bosses.json không có hay bị lỗi
+DEFAULT_MONSTERS = [
+    {"id": 1, "name": "Yêu Lang", "level": 1, "health": 100, "attack": 15, "defense": 5,
+     "exp_reward": 10, "linh_thach_min": 5, "linh_thach_max": 15, "drop_rate": 0.3,
+     "drops": [{"item_id": "healing_potion", "chance": 0.2}]},
+    {"id": 2, "name": "Hắc Hổ", "level": 3, "health": 150, "attack": 25, "defense": 10,
+     "exp_reward": 20, "linh_thach_min": 10, "linh_thach_max": 25, "drop_rate": 0.4,
+     "drops": [{"item_id": "strength_potion", "chance": 0.15}]},
+    {"id": 3, "name": "Độc Xà", "level": 5, "health": 200, "attack": 30, "defense": 15,
+     "exp_reward": 30, "linh_thach_min": 15, "linh_thach_max": 35, "drop_rate": 0.5,
+     "drops": [{"item_id": "poison_essence", "chance": 0.25}]},
+    {"id": 4, "name": "Thiết Giáp Thú", "level": 8, "health": 250, "attack": 35, "defense": 25,
+     "exp_reward": 45, "linh_thach_min": 20, "linh_thach_max": 50, "drop_rate": 0.4,
+     "drops": [{"item_id": "iron_scale", "chance": 0.3}]},
+    {"id": 5, "name": "U Linh", "level": 10, "health": 300, "attack": 40, "defense": 20,
+     "exp_reward": 60, "linh_thach_min": 30, "linh_thach_max": 70, "drop_rate": 0.45,
+     "drops": [{"item_id": "spirit_essence", "chance": 0.2}]},
+    {"id": 6, "name": "Hỏa Kỳ Lân", "level": 12, "health": 350, "attack": 50, "defense": 30,
+     "exp_reward": 80, "linh_thach_min": 40, "linh_thach_max": 90, "drop_rate": 0.5,
+     "drops": [{"item_id": "fire_crystal", "chance": 0.2}]},
+    {"id": 7, "name": "Bạch Cốt Ma", "level": 15, "health": 400, "attack": 60, "defense": 35,
+     "exp_reward": 100, "linh_thach_min": 50, "linh_thach_max": 110, "drop_rate": 0.55,
+     "drops": [{"item_id": "bone_fragment", "chance": 0.25}]},
+    {"id": 8, "name": "Thâm Hải Chi Long", "level": 18, "health": 500, "attack": 70, "defense": 40,
+     "exp_reward": 130, "linh_thach_min": 60, "linh_thach_max": 140, "drop_rate": 0.6,
+     "drops": [{"item_id": "dragon_scale", "chance": 0.15}]},
+    {"id": 9, "name": "Huyết Yêu", "level": 20, "health": 600, "attack": 80, "defense": 50,
+     "exp_reward": 160, "linh_thach_min": 70, "linh_thach_max": 170, "drop_rate": 0.65,
+     "drops": [{"item_id": "blood_essence", "chance": 0.2}]},
+    {"id": 10, "name": "Thiên Ma", "level": 25, "health": 700, "attack": 90, "defense": 60,
+     "exp_reward": 200, "linh_thach_min": 80, "linh_thach_max": 200, "drop_rate": 0.7,
+     "drops": [{"item_id": "demon_heart", "chance": 0.1}]},
+]
+
+DEFAULT_BOSSES = [
+    {"id": 1, "name": "Hắc Long Vương", "level": 15, "health": 1000, "attack": 120, "defense": 80,
+     "exp_reward": 300, "linh_thach_min": 100, "linh_thach_max": 300, "drop_rate": 0.8,
+     "drops": [{"item_id": "dragon_heart", "chance": 0.3}, {"item_id": "dragon_scale", "chance": 0.5}]},
+    {"id": 2, "name": "Cửu Vĩ Yêu Hồ", "level": 18, "health": 1500, "attack": 150, "defense": 100,
+     "exp_reward": 500, "linh_thach_min": 150, "linh_thach_max": 400, "drop_rate": 0.85,
+     "drops": [{"item_id": "fox_tail", "chance": 0.4}, {"item_id": "fox_fur", "chance": 0.6}]},
+    {"id": 3, "name": "Ma Đế", "level": 20, "health": 2000, "attack": 180, "defense": 120,
+     "exp_reward": 700, "linh_thach_min": 200, "linh_thach_max": 500, "drop_rate": 0.9,
+     "drops": [{"item_id": "demon_soul", "chance": 0.3}, {"item_id": "demon_horn", "chance": 0.5}]},
+    {"id": 4, "name": "Tà Thần", "level": 25, "health": 3000, "attack": 250, "defense": 150,
+     "exp_reward": 1000, "linh_thach_min": 300, "linh_thach_max": 700, "drop_rate": 0.95,
+     "drops": [{"item_id": "evil_core", "chance": 0.2}, {"item_id": "god_blood", "chance": 0.4}]},
+    {"id": 5, "name": "Thiên Ngoại Yêu Thi", "level": 30, "health": 5000, "attack": 350, "defense": 200,
+     "exp_reward": 1500, "linh_thach_min": 500, "linh_thach_max": 1000, "drop_rate": 1.0,
+     "drops": [{"item_id": "cosmic_essence", "chance": 0.1},
+               {"item_id": "star_fragment", "chance": 0.3}]},
+]
+
+
+CATALOG_SPECS = {
+    "items": CatalogSpec("items.json", "items", {"id": str, "name": str, "type": str},
+                         {"price": int, "value": int, "rarity": str, "effect": dict}),
+    "monsters": CatalogSpec("monsters.json", "monsters", ENEMY_FIELDS, ENEMY_OPTIONAL, {"drops": DROP_FIELDS},
+                            DEFAULT_MONSTERS),
+    "bosses": CatalogSpec("bosses.json", "bosses", ENEMY_FIELDS, {**ENEMY_OPTIONAL, "respawn_time": int},
+                          {"drops": DROP_FIELDS}, DEFAULT_BOSSES),
+    "sects": CatalogSpec("sects.json", "sects", {"id": str, "name": str}, {"min_level": int, "max_members": int}),
+    "events": CatalogSpec("events.json", "events",
+                          {"id": str, "name": str, "description": str, "type": str, "duration": NUMBER,
+                           "min_realm": int, "max_realm": int, "rewards": dict}),
+}
+
+
+class FrozenDict(dict):
+    """dict không sửa được (vẫn là dict nên dùng được với json, MongoDB; pickle được để làm snapshot)"""
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Dữ liệu game chỉ đọc, dùng Catalog.copy() để lấy bản sao có thể sửa")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+def freeze(value: Any) -> Any:
+    """Đóng băng dữ liệu JSON: dict -> FrozenDict, list -> tuple"""
+    if isinstance(value, dict):
+        return FrozenDict({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Bản sao có thể sửa (và lưu được vào MongoDB) của dữ liệu đã đóng băng"""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(item) for item in value]
+    return value
+
+
+class Catalog:
+    """Một danh mục đã đóng băng, tra cứu theo id"""
+
+    def __init__(self, name: str, entries: List[Dict[str, Any]], mtime: Optional[float] = None):
+        self.name = name
+        self.mtime = mtime
+        self.entries: Tuple[Mapping[str, Any], ...] = tuple(freeze(entry) for entry in entries)
+        self.by_id: Mapping[Any, Mapping[str, Any]] = FrozenDict({entry["id"]: entry for entry in self.entries})
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[Mapping[str, Any]]:
+        return iter(self.entries)
+
+    def __contains__(self, entry_id: Any) -> bool:
+        return entry_id in self.by_id
+
+    def __getitem__(self, entry_id: Any) -> Mapping[str, Any]:
+        return self.by_id[entry_id]
+
+    def get(self, entry_id: Any, default: Any = None) -> Any:
+        return self.by_id.get(entry_id, default)
+
+    def copy(self, entry_id: Any) -> Optional[Dict[str, Any]]:
+        """Bản sao có thể sửa của một phần tử, None nếu không tồn tại"""
+        entry = self.by_id.get(entry_id)
+        return thaw(entry) if entry is not None else None
+
+    def name_of(self, entry_id: Any, default: Optional[str] = None) -> str:
+        """Tên hiển thị của phần tử (mặc định là chính id)"""
+        entry = self.by_id.get(entry_id)
+        if entry is None:
+            return default if default is not None else str(entry_id)
+        return entry["name"]
+
+
+def _check_fields(where: str, entry: Dict[str, Any], required: Dict[str, Any], optional: Dict[str, Any]) -> None:
+    missing = [field for field in required if field not in entry]
+    if missing:
+        raise ValueError(f"{where} thiếu trường {', '.join(missing)}")
+    for fields in (required, optional):
+        for field, types in fields.items():
+            if field not in entry:
+                continue
+            value = entry[field]
+            # bool là lớp con của int nhưng không phải số hợp lệ trong dữ liệu game
+            if not isinstance(value, types) or isinstance(value, bool):
+                raise ValueError(f"{where}: trường {field} có kiểu {type(value).__name__} không hợp lệ")
+
+
+def validate_entries(spec: CatalogSpec, data: Any) -> List[Dict[str, Any]]:
+    """Kiểm tra dữ liệu đã đọc từ file theo schema, trả về danh sách phần tử, ValueError nếu sai"""
+    entries = data.get(spec.key) if isinstance(data, dict) else data
+    if not isinstance(entries, list):
+        raise ValueError(f"{spec.file_name}: thiếu danh sách '{spec.key}'")
+
+    seen = set()
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            raise ValueError(f"{spec.file_name}: phần tử thứ {index} không phải object")
+        where = f"{spec.file_name}: {entry.get('id', index)}"
+        _check_fields(where, entry, spec.required, spec.optional)
+        for field, fields in spec.nested.items():
+            for position, child in enumerate(entry.get(field, [])):
+                if not isinstance(child, dict):
+                    raise ValueError(f"{where}: {field}[{position}] không phải object")
+                _check_fields(f"{where} {field}[{position}]", child, fields, {})
+        if entry["id"] in seen:
+            raise ValueError(f"{spec.file_name}: trùng id {entry['id']}")
+        seen.add(entry["id"])
+
+    return entries
+
+
+def parse_catalog(name: str, spec: CatalogSpec, data: Any, mtime: Optional[float] = None) -> Catalog:
+    """Kiểm tra dữ liệu đã đọc từ file và dựng Catalog, ValueError nếu sai cấu trúc"""
+    return Catalog(name, validate_entries(spec, data), mtime)
+
+
+def read_catalog(name: str, spec: CatalogSpec, path: str, mtime: Optional[float] = None) -> Catalog:
+    """Đọc, kiểm tra và dựng Catalog từ file JSON"""
+    if mtime is None:
+        mtime = os.stat(path).st_mtime
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_catalog(name, spec, json.load(f), mtime)
+
+
+def source_fingerprint(path: str) -> Optional[Tuple[int, int]]:
+    """(mtime_ns, kích thước) của file JSON, None nếu không tồn tại"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class GameData:
+    """Kho dữ liệu game dùng chung, tự nạp lại danh mục khi file thay đổi"""
+
+    def __init__(self, directory: str = GAME_DATA_DIR, specs: Dict[str, CatalogSpec] = CATALOG_SPECS,
+                 check_interval: float = GAME_DATA_CHECK_INTERVAL, snapshot_path: Optional[str] = GAME_DATA_SNAPSHOT):
+        self.directory = directory
+        self.specs = specs
+        self.check_interval = check_interval
+        self.snapshot_path = snapshot_path
+        self._catalogs: Dict[str, Catalog] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._failed_mtime: Dict[str, float] = {}  # mtime của file lỗi, không đọc lại cho đến khi file đổi tiếp
+        self._listeners: Dict[str, List[Callable[[Catalog], None]]] = {name: [] for name in specs}
+        self._watch_task: Optional[asyncio.Task] = None
+
+        # Thống kê
+        self.loads = 0
+        self.reloads = 0
+        self.errors = 0
+        self.startup: Dict[str, Any] = {}  # Nguồn và thời gian nạp dữ liệu lúc khởi động
+
+    def __getattr__(self, name: str) -> Catalog:
+        # game_data.items, game_data.monsters, ...
+        specs = self.__dict__.get("specs", {})
+        if name in specs:
+            return self.get(name)
+        raise AttributeError(name)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, self.specs[name].file_name)
+
+    def fallback(self, name: str) -> Catalog:
+        """Danh mục dựng từ dữ liệu mặc định trong bộ nhớ (rỗng nếu không có), không ghi gì ra đĩa"""
+        return Catalog(name, self.specs[name].defaults)
+
+    def get(self, name: str) -> Catalog:
+        """Danh mục hiện tại (kiểm tra mtime tối đa mỗi check_interval giây)"""
+        catalog = self._catalogs.get(name)
+        if catalog is None or time.monotonic() - self._checked_at.get(name, 0.0) >= self.check_interval:
+            catalog = self.refresh(name)
+        return catalog
+
+    def refresh(self, name: str) -> Catalog:
+        """Nạp lại danh mục nếu file đã thay đổi, giữ bản cũ nếu file mới bị lỗi"""
+        self._checked_at[name] = time.monotonic()
+        current = self._catalogs.get(name)
+        path = self.path(name)
+
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            if current is None:
+                logger.warning(f"Không tìm thấy file {path}")
+                current = self._catalogs[name] = self.fallback(name)
+            return current
+
+        if current is not None and mtime in (current.mtime, self._failed_mtime.get(name)):
+            return current
+
+        try:
+            catalog = read_catalog(name, self.specs[name], path, mtime)
+        except Exception as e:
+            self.errors += 1
+            self._failed_mtime[name] = mtime
+            logger.error(f"Lỗi khi tải {path}: {e}")
+            if current is None:
+                current = self._catalogs[name] = self.fallback(name)
+            return current
+
+        self._catalogs[name] = catalog
+        if current is None:
+            self.loads += 1
+            logger.info(f"Đã tải {len(catalog)} phần tử từ {path}")
+        else:
+            self.reloads += 1
+            logger.info(f"Đã tải lại {len(catalog)} phần tử từ {path}")
+            for callback in list(self._listeners[name]):
+                try:
+                    callback(catalog)
+                except Exception as e:
+                    logger.error(f"Lỗi khi cập nhật theo {path}: {e}")
+        return catalog
+
+    def refresh_all(self) -> None:
+        for name in self.specs:
+            self.refresh(name)
+
+    def fingerprints(self) -> Dict[str, Optional[Tuple[int, int]]]:
+        return {name: source_fingerprint(self.path(name)) for name in self.specs}
+
+    def write_snapshot(self, catalogs: Dict[str, Catalog], sources: Dict[str, Optional[Tuple[int, int]]],
+                       path: Optional[str] = None) -> int:
+        """Ghi snapshot (ghi file tạm rồi thay thế), trả về số byte"""
+        path = path or self.snapshot_path
+        data = pickle.dumps({
+            "version": SNAPSHOT_VERSION,
+            "sources": sources,
+            "catalogs": catalogs
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+        return len(data)
+
+    def build_snapshot(self, path: Optional[str] = None) -> Dict[str, Catalog]:
+        """Kiểm tra toàn bộ file JSON và biên dịch snapshot, ValueError nếu có file sai schema"""
+        sources = self.fingerprints()
+        catalogs = {}
+        for name, spec in self.specs.items():
+            if sources[name] is None:
+                catalogs[name] = self.fallback(name)
+            else:
+                catalogs[name] = read_catalog(name, spec, self.path(name))
+        self.write_snapshot(catalogs, sources, path)
+        return catalogs
+
+    def load_snapshot(self, path: Optional[str] = None) -> bool:
+        """Nạp toàn bộ danh mục từ snapshot bằng một lần đọc, False nếu không có hoặc đã cũ"""
+        path = path or self.snapshot_path
+        if not path or not os.path.exists(path):
+            return False
+
+        try:
+            with open(path, "rb") as f:
+                snapshot = pickle.loads(f.read())
+        except Exception as e:
+            logger.warning(f"Không thể đọc snapshot dữ liệu game {path}: {e}")
+            return False
+
+        if snapshot.get("version") != SNAPSHOT_VERSION or set(snapshot.get("catalogs", {})) != set(self.specs):
+            logger.info("Snapshot dữ liệu game khác phiên bản, đọc lại từ JSON")
+            return False
+        if snapshot["sources"] != self.fingerprints():
+            logger.info("Snapshot dữ liệu game cũ hơn file JSON, đọc lại từ JSON")
+            return False
+
+        now = time.monotonic()
+        for name, catalog in snapshot["catalogs"].items():
+            self._catalogs[name] = catalog
+            self._checked_at[name] = now
+            self.loads += 1
+        return True
+
+    def load_all(self) -> Dict[str, Any]:
+        """
+        Nạp toàn bộ dữ liệu game lúc khởi động: từ snapshot nếu còn mới, ngược lại từ JSON
+        (và ghi lại snapshot nếu mọi file đều hợp lệ). Trả về nguồn và thời gian nạp.
+        """
+        start = time.perf_counter()
+        source = "snapshot"
+        if not self.load_snapshot():
+            source = "json"
+            sources = self.fingerprints()
+            errors = self.errors
+            self.refresh_all()
+            if self.snapshot_path and self.errors == errors:
+                try:
+                    self.write_snapshot(dict(self._catalogs), sources)
+                except OSError as e:
+                    logger.warning(f"Không thể ghi snapshot dữ liệu game: {e}")
+
+        elapsed = time.perf_counter() - start
+        entries = sum(len(catalog) for catalog in self._catalogs.values())
+        self.startup = {"source": source, "seconds": elapsed, "entries": entries}
+        logger.info(f"Đã tải {entries} phần tử dữ liệu game từ {source} trong {elapsed * 1000:.1f} ms")
+        return self.startup
+
+    def subscribe(self, name: str, callback: Callable[[Catalog], None]) -> None:
+        """Gọi callback(catalog mới) mỗi khi danh mục được nạp lại"""
+        self._listeners[name].append(callback)
+
+    def unsubscribe(self, name: str, callback: Callable[[Catalog], None]) -> None:
+        if callback in self._listeners[name]:
+            self._listeners[name].remove(callback)
+
+    def start_watching(self) -> None:
+        """Kiểm tra định kỳ các file để những cog đã dựng sẵn bảng tra cũng được cập nhật"""
+        if self._watch_task is None or self._watch_task.done():
+            self._watch_task = asyncio.create_task(self._watch())
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                self.refresh_all()
+            except Exception as e:
+                logger.error(f"Lỗi khi kiểm tra dữ liệu game: {e}")
+
+
+# Kho dữ liệu dùng chung cho toàn bộ bot
+game_data = GameData()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kiểm tra và biên dịch dữ liệu game (data/*.json)")
+    parser.add_argument("command", choices=["build", "check"],
+                        help="build: kiểm tra và ghi snapshot, check: chỉ kiểm tra schema và độ mới của snapshot")
+    parser.add_argument("--output", default=GAME_DATA_SNAPSHOT, help="Đường dẫn file snapshot")
+    args = parser.parse_args()
+
+    # Dùng lớp của utils.game_data (không phải __main__) để snapshot nạp được trong bot
+    import utils.game_data as registry
+
+    data = registry.GameData(snapshot_path=args.output)
+
+    start = time.perf_counter()
+    try:
+        if args.command == "build":
+            catalogs = data.build_snapshot()
+        else:
+            catalogs = {name: registry.read_catalog(name, spec, data.path(name)) if os.path.exists(data.path(name))
+                        else data.fallback(name) for name, spec in data.specs.items()}
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"Lỗi: {e}")
+    json_seconds = time.perf_counter() - start
+
+    for name, catalog in catalogs.items():
+        print(f"{name:<10} {len(catalog):>5} phần tử  ({data.path(name)})")
+
+    if args.command == "build":
+        print(f"\nĐã ghi {args.output} ({os.path.getsize(args.output):,} byte), đọc JSON mất {json_seconds * 1000:.1f} ms")
+
+    # So sánh thời gian nạp snapshot
+    start = time.perf_counter()
+    fresh = registry.GameData(snapshot_path=args.output).load_snapshot()
+    snapshot_seconds = time.perf_counter() - start
+    if fresh:
+        print(f"Snapshot còn mới, nạp mất {snapshot_seconds * 1000:.1f} ms")
+    else:
+        print("Snapshot không có hoặc đã cũ, chạy: python -m utils.game_data build")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import asyncio
+import time
+import logging
+from collections import deque
+from typing import Dict, Optional, Any
+
+import discord
+
+from config import LIVE_MESSAGE_MAX_EDITS, LIVE_MESSAGE_WINDOW
+
+# Cấu hình logging
+logger = logging.getLogger("tutien-bot.live_message")
+
+
+class EditRateLimiter:
+    """
+    Giới hạn số lần sửa tin nhắn theo từng bucket (mỗi kênh là một bucket)
+
+    Mỗi bucket cho phép tối đa `max_edits` lần sửa trong `window` giây (cửa sổ trượt).
+    Khi Discord trả về 429, bucket bị khóa cho đến hết thời gian retry_after.
+    """
+
+    def __init__(self, max_edits: int, window: float):
+        self.max_edits = max_edits
+        self.window = window
+        self._sent: Dict[Any, deque] = {}  # {bucket: thời điểm các lần sửa gần nhất}
+        self._blocked_until: Dict[Any, float] = {}
+
+        # Thống kê
+        self.waits = 0
+        self.rate_limited = 0
+
+    def delay(self, bucket) -> float:
+        """Số giây cần chờ trước khi được sửa tin nhắn trong bucket"""
+        now = time.monotonic()
+        wait = max(0.0, self._blocked_until.get(bucket, 0.0) - now)
+
+        sent = self._sent.get(bucket)
+        if sent:
+            while sent and sent[0] <= now - self.window:
+                sent.popleft()
+            if len(sent) >= self.max_edits:
+                wait = max(wait, sent[0] + self.window - now)
+        return wait
+
+    async def acquire(self, bucket) -> None:
+        """Chờ đến khi bucket còn lượt rồi ghi nhận một lần sửa"""
+        wait = self.delay(bucket)
+        while wait > 0:
+            self.waits += 1
+            await asyncio.sleep(wait)
+            wait = self.delay(bucket)
+        if len(self._sent) > 1000:
+            self.cleanup()
+        self._sent.setdefault(bucket, deque()).append(time.monotonic())
+
+    def block(self, bucket, retry_after: float) -> None:
+        """Khóa bucket sau khi bị Discord giới hạn tốc độ"""
+        self.rate_limited += 1
+        self._blocked_until[bucket] = max(self._blocked_until.get(bucket, 0.0), time.monotonic() + retry_after)
+
+    def cleanup(self) -> None:
+        """Xóa các bucket không còn hoạt động"""
+        now = time.monotonic()
+        for bucket in [b for b, sent in self._sent.items() if not sent or sent[-1] <= now - self.window]:
+            del self._sent[bucket]
+        for bucket in [b for b, until in self._blocked_until.items() if until <= now]:
+            del self._blocked_until[bucket]
+
+
+# Bộ giới hạn dùng chung cho toàn bộ bot
+edit_limiter = EditRateLimiter(LIVE_MESSAGE_MAX_EDITS, LIVE_MESSAGE_WINDOW)
+
+# Thống kê chung của các LiveMessage
+live_stats = {"updates": 0, "edits": 0, "dropped": 0}
+
+
+class LiveMessage:
+    """
+    Tin nhắn được cập nhật liên tục (trận đấu, động phủ)
+
+    update() chỉ lưu trạng thái mới nhất; một tác vụ nền gửi trạng thái đó khi bucket còn lượt,
+    các trạng thái trung gian chưa kịp gửi bị bỏ qua. edit() gửi ngay trạng thái mới nhất và chờ xong.
+    """
+
+    def __init__(self, message: discord.Message, limiter: EditRateLimiter = edit_limiter):
+        self.message = message
+        self.limiter = limiter
+        self.bucket = message.channel.id
+        self._pending: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self.closed = False
+
+    def update(self, **fields) -> None:
+        """Lưu trạng thái mới (embed, view, content) để gửi ở lần sửa kế tiếp"""
+        if self.closed:
+            return
+        live_stats["updates"] += 1
+        if self._pending is not None:
+            live_stats["dropped"] += 1
+            self._pending.update(fields)
+        else:
+            self._pending = dict(fields)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def flush(self) -> None:
+        """Chờ đến khi trạng thái mới nhất đã được gửi"""
+        while self._task is not None and not self._task.done():
+            await asyncio.shield(self._task)
+
+    async def edit(self, **fields) -> None:
+        """Cập nhật và chờ gửi xong (dùng cho khung hình cuối hoặc trước khi chờ người chơi bấm nút)"""
+        self.update(**fields)
+        await self.flush()
+
+    async def _flush_loop(self) -> None:
+        while self._pending is not None:
+            await self.limiter.acquire(self.bucket)
+
+            fields, self._pending = self._pending, None
+            try:
+                await self.message.edit(**fields)
+                live_stats["edits"] += 1
+            except discord.RateLimited as e:
+                # Gửi lại trạng thái này (nếu chưa có trạng thái mới hơn) khi hết bị khóa
+                self.limiter.block(self.bucket, e.retry_after)
+                if self._pending is None:
+                    self._pending = fields
+                else:
+                    self._pending = {**fields, **self._pending}
+            except discord.NotFound:
+                # Tin nhắn đã bị xóa
+                self.closed = True
+                self._pending = None
+            except discord.HTTPException as e:
+                if e.status == 429:
+                    self.limiter.block(self.bucket, self.limiter.window)
+                logger.warning(f"Không thể cập nhật tin nhắn {self.message.id}: {e}")
+            except Exception as e:
+                logger.error(f"Lỗi khi cập nhật tin nhắn {self.message.id}: {e}")
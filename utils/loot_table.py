@@ -0,0 +1,175 @@
+"""
+Bảng vật phẩm rơi được biên dịch sẵn
+
+Mỗi bảng rơi ([{"item_id", "chance", "min_quantity", "max_quantity", "guaranteed", "pity"}]) được
+chuyển thành các mảng (tỷ lệ, số lượng tối thiểu, khoảng số lượng) một lần khi tải dữ liệu. Vật phẩm
+rơi của một hoặc nhiều trận thắng được tung trong một lần gọi NumPy thay vì một vòng lặp Python
+cho từng vật phẩm của từng trận.
+
+- guaranteed (hoặc chance >= 1): luôn rơi
+- pity: bảo hiểm, sau pity - 1 lần trượt liên tiếp thì lần kế tiếp chắc chắn rơi.
+  Số lần trượt được lưu trong dict {item_id: số lần trượt} do người gọi giữ và lưu lại.
+
+Bảng loại trừ (exclusive=True): mỗi trận rơi tối đa một vật phẩm, chọn theo tỷ lệ cộng dồn.
+
+Không có NumPy thì dùng cùng các mảng đó với vòng lặp Python (cài NumPy: pip install -r requirements-optional.txt).
+"""
+import random
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Dict, List, Optional, Any
+
+try:
+    import numpy as np
+except ImportError:  # NumPy không bắt buộc, dùng vòng lặp Python thay thế
+    np = None
+
+_np_rng = np.random.default_rng() if np is not None else None
+
+
+def _apply_pity(positions: List[int], kills: int, threshold: int, misses: int):
+    """
+    Áp dụng bảo hiểm cho một vật phẩm
+
+    positions: các trận rơi tự nhiên (tăng dần). Trả về (các trận rơi sau bảo hiểm, số lần trượt liên tiếp còn lại)
+    """
+    result = []
+    pos = 0
+    i = 0
+    while pos < kills:
+        forced = max(pos, pos + threshold - 1 - misses)
+        while i < len(positions) and positions[i] < pos:
+            i += 1
+        natural = positions[i] if i < len(positions) else kills
+
+        if natural < kills and natural <= forced:
+            hit = natural
+        elif forced < kills:
+            hit = forced
+        else:
+            misses += kills - pos
+            break
+
+        result.append(hit)
+        pos = hit + 1
+        misses = 0
+    return result, misses
+
+
+class LootTable:
+    """Bảng vật phẩm rơi đã biên dịch"""
+
+    def __init__(self, drops: List[Dict[str, Any]], exclusive: bool = False):
+        self.item_ids = [drop["item_id"] for drop in drops]
+        self.exclusive = exclusive
+        chances = [1.0 if drop.get("guaranteed") else min(1.0, float(drop.get("chance", 0))) for drop in drops]
+        min_quantities = [int(drop.get("min_quantity", drop.get("quantity", 1))) for drop in drops]
+        max_quantities = [max(low, int(drop.get("max_quantity", low))) for low, drop in zip(min_quantities, drops)]
+
+        # Tỷ lệ cộng dồn của bảng loại trừ (tổng tối đa là 1)
+        self.cumulative = [min(1.0, c) for c in accumulate(chances)]
+
+        # Các cột có bảo hiểm: [(vị trí, ngưỡng)], bảng loại trừ không hỗ trợ bảo hiểm
+        self.pity = [] if exclusive else [(i, int(drop["pity"])) for i, drop in enumerate(drops)
+                                          if drop.get("pity", 0) > 0 and chances[i] < 1.0]
+
+        if np is not None:
+            self.cumulative = np.array(self.cumulative, dtype=float)
+            self.chances = np.array(chances, dtype=float)
+            self.min_quantities = np.array(min_quantities, dtype=np.int64)
+            self.max_quantities = np.array(max_quantities, dtype=np.int64)
+        else:
+            self.chances = chances
+            self.min_quantities = min_quantities
+            self.max_quantities = max_quantities
+
+    def __len__(self) -> int:
+        return len(self.item_ids)
+
+    def _roll_matrix(self, kills: int, pity: Optional[Dict[str, int]], rng):
+        """Số lượng rơi của từng vật phẩm trong từng trận: ma trận kills × số vật phẩm"""
+        if np is not None:
+            rng = rng or _np_rng
+            size = (kills, len(self.item_ids))
+            if self.exclusive:
+                picks = np.searchsorted(self.cumulative, rng.random(kills), side="right")
+                hits = picks[:, None] == np.arange(len(self.item_ids))
+            else:
+                hits = rng.random(size) < self.chances
+            quantities = rng.integers(self.min_quantities, self.max_quantities + 1, size=size)
+
+            if pity is not None:
+                for column, threshold in self.pity:
+                    item_id = self.item_ids[column]
+                    positions, pity[item_id] = _apply_pity(
+                        np.flatnonzero(hits[:, column]).tolist(), kills, threshold, pity.get(item_id, 0)
+                    )
+                    hits[:, column] = False
+                    hits[positions, column] = True
+
+            return np.where(hits, quantities, 0)
+
+        rng = rng or random
+        if self.exclusive:
+            matrix = []
+            for _ in range(kills):
+                row = [0] * len(self.item_ids)
+                pick = bisect_right(self.cumulative, rng.random())
+                if pick < len(row):
+                    row[pick] = rng.randint(self.min_quantities[pick], self.max_quantities[pick])
+                matrix.append(row)
+        else:
+            matrix = [[rng.randint(low, high) if rng.random() < chance else 0
+                       for chance, low, high in zip(self.chances, self.min_quantities, self.max_quantities)]
+                      for _ in range(kills)]
+
+        if pity is not None:
+            for column, threshold in self.pity:
+                item_id = self.item_ids[column]
+                natural = [k for k in range(kills) if matrix[k][column]]
+                positions, pity[item_id] = _apply_pity(natural, kills, threshold, pity.get(item_id, 0))
+                hit_set = set(positions)
+                for k in range(kills):
+                    if k in hit_set and not matrix[k][column]:
+                        matrix[k][column] = rng.randint(self.min_quantities[column], self.max_quantities[column])
+                    elif k not in hit_set:
+                        matrix[k][column] = 0
+        return matrix
+
+    def roll(self, kills: int = 1, pity: Optional[Dict[str, int]] = None, rng=None) -> Dict[str, int]:
+        """Tổng vật phẩm rơi của `kills` trận thắng: {item_id: số lượng}"""
+        if kills <= 0 or not self.item_ids:
+            return {}
+
+        matrix = self._roll_matrix(kills, pity, rng)
+        totals = matrix.sum(axis=0).tolist() if np is not None else [sum(column) for column in zip(*matrix)]
+
+        result = {}
+        for item_id, quantity in zip(self.item_ids, totals):
+            if quantity > 0:
+                result[item_id] = result.get(item_id, 0) + int(quantity)
+        return result
+
+    def roll_each(self, kills: int, pity: Optional[Dict[str, int]] = None, rng=None) -> List[Dict[str, int]]:
+        """Vật phẩm rơi của từng trận: [{item_id: số lượng}]"""
+        if kills <= 0:
+            return []
+        if not self.item_ids:
+            return [{} for _ in range(kills)]
+
+        matrix = self._roll_matrix(kills, pity, rng)
+        rows = matrix.tolist() if np is not None else matrix
+
+        result = []
+        for row in rows:
+            drops = {}
+            for item_id, quantity in zip(self.item_ids, row):
+                if quantity > 0:
+                    drops[item_id] = drops.get(item_id, 0) + int(quantity)
+            result.append(drops)
+        return result
+
+
+def compile_loot_tables(entries: List[Dict[str, Any]], key: str = "name") -> Dict[Any, LootTable]:
+    """Biên dịch bảng rơi của danh sách quái vật/boss: {entry[key]: LootTable}"""
+    return {entry[key]: LootTable(entry.get("drops", [])) for entry in entries}
@@ -0,0 +1,137 @@
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Any, Hashable
+
+
+class TokenBucketLimiter:
+    """
+    Giới hạn tần suất theo thuật toán token bucket cho từng khóa
+
+    Mỗi khóa có tối đa `burst` token, hồi `rate` token mỗi giây; mỗi lần cho phép tốn một token.
+    Chỉ giữ tối đa `max_keys` khóa, loại theo LRU: khóa lâu không dùng nhất bị loại trước, không xét
+    bucket đã đầy lại hay chưa (khóa bị loại sẽ bắt đầu lại với bucket đầy).
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 50000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()  # {khóa: [số token, thời điểm cập nhật]}
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def allow(self, key: Hashable) -> bool:
+        """Trừ một token của khóa, trả về False nếu đã hết token"""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+
+        if bucket is None:
+            bucket = [float(self.burst), now]
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            self._buckets.move_to_end(key)
+
+        if bucket[0] < 1:
+            return False
+
+        bucket[0] -= 1
+        return True
+
+
+def _normalize(content: str) -> str:
+    """Chuẩn hóa nội dung để so sánh: chữ thường, gộp khoảng trắng"""
+    return " ".join(content.lower().split())
+
+
+def char_entropy(text: str) -> float:
+    """Entropy Shannon theo ký tự (bit/ký tự)"""
+    if not text:
+        return 0.0
+    counts: Dict[str, int] = {}
+    for char in text:
+        counts[char] = counts.get(char, 0) + 1
+    length = len(text)
+    return -sum(count / length * math.log2(count / length) for count in counts.values())
+
+
+class ChatExpLimiter:
+    """
+    Lọc tin nhắn trước khi cộng kinh nghiệm chat
+
+    Tin nhắn bị bỏ qua nếu người gửi hoặc kênh đã hết token, hoặc (khi bật lọc nội dung)
+    tin nhắn trùng một trong các tin gần đây của người gửi hay có entropy quá thấp (vd: "aaaaaa").
+    """
+
+    def __init__(self, user_rate: float, user_burst: int, channel_rate: float, channel_burst: int,
+                 filter_content: bool = True, duplicate_window: int = 5, min_entropy: float = 1.0,
+                 min_entropy_length: int = 6):
+        self.user_buckets = TokenBucketLimiter(user_rate, user_burst)
+        self.channel_buckets = TokenBucketLimiter(channel_rate, channel_burst)
+
+        self.filter_content = filter_content
+        self.duplicate_window = duplicate_window
+        self.min_entropy = min_entropy
+        self.min_entropy_length = min_entropy_length
+        self._recent: "OrderedDict[int, deque]" = OrderedDict()  # {user_id: hash các tin nhắn gần đây}
+
+        # Thống kê để tinh chỉnh
+        self.counts = {"allowed": 0, "user_throttled": 0, "channel_throttled": 0, "duplicate": 0, "low_entropy": 0}
+
+    def check(self, user_id: int, channel_id: int, content: str) -> bool:
+        """Trả về True nếu tin nhắn được tính kinh nghiệm"""
+        if self.filter_content and not self._check_content(user_id, content):
+            return False
+
+        if not self.user_buckets.allow(user_id):
+            self.counts["user_throttled"] += 1
+            return False
+
+        if not self.channel_buckets.allow(channel_id):
+            self.counts["channel_throttled"] += 1
+            return False
+
+        self.counts["allowed"] += 1
+        return True
+
+    def _check_content(self, user_id: int, content: str) -> bool:
+        """
+        Lọc tin nhắn trùng lặp hoặc vô nghĩa
+
+        Chi phí tỉ lệ với độ dài tin nhắn: chuẩn hóa, tính entropy và hash() đều duyệt toàn bộ nội dung.
+        """
+        normalized = _normalize(content)
+
+        if len(normalized) >= self.min_entropy_length and char_entropy(normalized) < self.min_entropy:
+            self.counts["low_entropy"] += 1
+            return False
+
+        # hash() của Python trên toàn bộ tin đã chuẩn hóa, so với tối đa duplicate_window hash gần nhất
+        # (hash trùng ngẫu nhiên chỉ làm bỏ qua một tin); danh sách người dùng cũng loại theo LRU
+        content_hash = hash(normalized)
+        recent = self._recent.get(user_id)
+        if recent is None:
+            recent = deque(maxlen=self.duplicate_window)
+            self._recent[user_id] = recent
+            if len(self._recent) > self.user_buckets.max_keys:
+                self._recent.popitem(last=False)
+        else:
+            self._recent.move_to_end(user_id)
+
+        if content_hash in recent:
+            self.counts["duplicate"] += 1
+            return False
+
+        recent.append(content_hash)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Số tin nhắn được tính/bị chặn theo từng lý do"""
+        total = sum(self.counts.values())
+        blocked = total - self.counts["allowed"]
+        return {**self.counts, "blocked_rate": blocked / total if total else 0.0}
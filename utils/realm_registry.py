@@ -0,0 +1,124 @@
+"""
+Bảng tra cảnh giới được dựng sẵn một lần khi import
+
+RealmRegistry: các tiểu cảnh giới trong CULTIVATION_REALMS (id -> cảnh giới, tên -> thứ tự,
+hệ số sức mạnh cộng dồn, tra cảnh giới theo kinh nghiệm bằng bisect).
+MajorRealmTable: các đại cảnh giới của mô hình User / Monster (Luyện Khí ... Tiên Nhân).
+"""
+from bisect import bisect_right
+from typing import Dict, List, Optional, Tuple, Any
+
+
+class RealmRegistry:
+    """Tra cứu tiểu cảnh giới theo id, tên hoặc lượng kinh nghiệm"""
+
+    def __init__(self, realms: List[Dict[str, Any]], power_steps: List[Tuple[Optional[int], float]]):
+        """
+        realms: danh sách cảnh giới, id phải trùng với vị trí trong danh sách
+        power_steps: [(id giới hạn, mức cộng)] - hệ số cộng thêm khi vượt qua cảnh giới có id < giới hạn,
+                     giới hạn None áp dụng cho các cảnh giới còn lại
+        """
+        for index, realm in enumerate(realms):
+            if realm["id"] != index:
+                raise ValueError(f"Cảnh giới {realm['name']} có id {realm['id']} nhưng nằm ở vị trí {index}")
+
+        self.realms = realms
+        self.by_name = {realm["name"]: realm["id"] for realm in realms}
+
+        # Kinh nghiệm tối thiểu của từng cảnh giới (tăng dần)
+        self.thresholds = [realm["exp_required"] for realm in realms]
+        if self.thresholds != sorted(self.thresholds):
+            raise ValueError("exp_required của các cảnh giới phải tăng dần")
+
+        self.power_steps = power_steps
+
+        # multipliers[i] = hệ số sức mạnh ở cảnh giới i = 1.0 + tổng mức cộng của các cảnh giới trước đó
+        self.multipliers = [1.0]
+        for realm_id in range(len(realms) - 1):
+            self.multipliers.append(self.multipliers[-1] + self.power_step(realm_id))
+
+    def __len__(self) -> int:
+        return len(self.realms)
+
+    def __iter__(self):
+        return iter(self.realms)
+
+    @property
+    def max_id(self) -> int:
+        return len(self.realms) - 1
+
+    def power_step(self, realm_id: int) -> float:
+        """Mức cộng hệ số sức mạnh khi vượt qua cảnh giới realm_id"""
+        for limit, step in self.power_steps:
+            if limit is None or realm_id < limit:
+                return step
+        return 0.0
+
+    def get(self, realm_id: int, default: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Lấy cảnh giới theo id"""
+        if isinstance(realm_id, int) and 0 <= realm_id < len(self.realms):
+            return self.realms[realm_id]
+        return default
+
+    def next(self, realm_id: int) -> Optional[Dict[str, Any]]:
+        """Cảnh giới kế tiếp, None nếu đã là cảnh giới cao nhất"""
+        return self.get(realm_id + 1)
+
+    def name(self, realm_id: int, default: str = "Không xác định") -> str:
+        """Tên cảnh giới theo id"""
+        realm = self.get(realm_id)
+        return realm["name"] if realm else default
+
+    def ordinal(self, name: str, default: int = 0) -> int:
+        """Thứ tự (id) của cảnh giới theo tên"""
+        return self.by_name.get(name, default)
+
+    def id_for_exp(self, experience: int) -> int:
+        """Cảnh giới cao nhất mà lượng kinh nghiệm đạt tới"""
+        return max(0, bisect_right(self.thresholds, experience) - 1)
+
+    def power_multiplier(self, realm_id: int) -> float:
+        """Hệ số sức mạnh theo cảnh giới"""
+        if realm_id <= 0:
+            return 1.0
+        if realm_id < len(self.multipliers):
+            return self.multipliers[realm_id]
+
+        # Vượt quá cảnh giới cao nhất: tiếp tục cộng theo mức của từng bậc
+        multiplier = self.multipliers[-1]
+        for i in range(len(self.multipliers) - 1, realm_id):
+            multiplier += self.power_step(i)
+        return multiplier
+
+
+class MajorRealmTable:
+    """Tra cứu đại cảnh giới (Luyện Khí, Trúc Cơ, ...) theo tên"""
+
+    def __init__(self, realms: List[Dict[str, Any]]):
+        self.realms = realms
+        self.names = [realm["name"] for realm in realms]
+        self.index_by_name = {realm["name"]: index for index, realm in enumerate(realms)}
+
+        # Đại cảnh giới kế tiếp và hệ số sức mạnh quái vật (gấp đôi mỗi bậc)
+        self.by_name: Dict[str, Dict[str, Any]] = {}
+        for index, realm in enumerate(realms):
+            entry = dict(realm)
+            entry["index"] = index
+            entry["next"] = realms[index + 1]["name"] if index + 1 < len(realms) else None
+            entry["power_bonus"] = 2 ** index
+            self.by_name[realm["name"]] = entry
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.by_name
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.by_name.get(name)
+
+    def index(self, name: str, default: Optional[int] = None) -> Optional[int]:
+        """Thứ tự của đại cảnh giới, default nếu không tồn tại"""
+        return self.index_by_name.get(name, default)
+
+    def value(self, name: str, field: str, default: Any = None) -> Any:
+        """Lấy một thuộc tính của đại cảnh giới"""
+        realm = self.by_name.get(name)
+        return realm.get(field, default) if realm else default
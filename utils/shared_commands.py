@@ -4,6 +4,7 @@ import asyncio
 from typing import List, Dict, Any, Optional
 
 from database.mongo_handler import get_user_or_create
+from utils.cooldowns import cooldowns
 from config import CULTIVATION_REALMS, EMBED_COLOR
 
 
@@ -82,36 +83,28 @@ async def handle_pagination(
             break
 
 
-async def check_cooldown(
-        ctx: commands.Context,
-        user_data: Dict[str, Any],
-        cooldown_field: str,
-        cooldown_seconds: int,
-        action_name: str
-) -> bool:
-    """Kiểm tra và thông báo cooldown, trả về True nếu đang trong cooldown"""
-    import datetime
-
-    # Kiểm tra cooldown
-    now = datetime.datetime.now()
-    last_action = user_data.get(cooldown_field)
-
-    if last_action:
-        last_action = datetime.datetime.fromisoformat(last_action)
-        time_diff = (now - last_action).total_seconds()
-
-        if time_diff < cooldown_seconds:
-            remaining = cooldown_seconds - time_diff
-            minutes, seconds = divmod(int(remaining), 60)
-
-            embed = discord.Embed(
-                title="⏳ Cooldown",
-                description=f"Bạn cần nghỉ ngơi **{minutes} phút {seconds} giây** nữa mới có thể {action_name} tiếp!",
-                color=discord.Color.red()
-            )
-
-            await ctx.send(embed=embed)
-            return True
+async def check_cooldown(ctx: commands.Context, action: str, action_name: str, start: bool = False) -> bool:
+    """
+    Kiểm tra và thông báo cooldown (xem utils.cooldowns), trả về True nếu đang trong cooldown
+
+    start=True: bắt đầu thời gian hồi ngay nếu đã sẵn sàng
+    """
+    if start:
+        remaining = await cooldowns.try_start(ctx.author.id, action)
+    else:
+        remaining = await cooldowns.remaining(ctx.author.id, action)
+
+    if remaining:
+        minutes, seconds = divmod(remaining, 60)
+
+        embed = discord.Embed(
+            title="⏳ Cooldown",
+            description=f"Bạn cần nghỉ ngơi **{minutes} phút {seconds} giây** nữa mới có thể {action_name} tiếp!",
+            color=discord.Color.red()
+        )
+
+        await ctx.send(embed=embed)
+        return True
 
     return False
 
@@ -0,0 +1,147 @@
+"""
+Bảng xuất hiện quái vật/boss theo cảnh giới
+
+Quái vật được xếp theo cấp một lần khi tải dữ liệu, tập ứng viên của từng cảnh giới được tính sẵn
+và mỗi lần chọn chỉ tốn O(1) nhờ phương pháp alias (Vose) với trọng số spawn_weight.
+Trọng số theo khu vực (activities.exploration.current_area) được tính một lần cho mỗi cặp
+(tập ứng viên, khu vực) rồi lưu lại, không quét lại danh sách quái vật.
+"""
+import random
+from bisect import bisect_left, bisect_right
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Any
+
+from config import REALMS, SPAWN_DEFAULT_WEIGHT, SPAWN_AREA_BONUS
+
+
+class AliasTable:
+    """Chọn ngẫu nhiên có trọng số trong O(1) (phương pháp alias của Vose)"""
+
+    def __init__(self, items: Sequence[Any], weights: Sequence[float]):
+        if not items:
+            raise ValueError("AliasTable cần ít nhất một phần tử")
+
+        self.items = list(items)
+        n = len(self.items)
+        total = float(sum(weights))
+        if total <= 0:
+            weights, total = [1.0] * n, float(n)
+
+        self.probabilities = [w / total for w in weights]
+        scaled = [p * n for p in self.probabilities]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] = scaled[l] + scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def sample(self, rng=random) -> Any:
+        """Chọn một phần tử"""
+        i = int(rng.random() * len(self.items))
+        return self.items[i] if rng.random() < self.prob[i] else self.items[self.alias[i]]
+
+
+def default_weight(entry: Dict[str, Any]) -> float:
+    return entry.get("spawn_weight", SPAWN_DEFAULT_WEIGHT)
+
+
+def default_area(entry: Dict[str, Any]) -> Optional[str]:
+    return entry.get("zone") or entry.get("location")
+
+
+def current_area(user: Dict[str, Any]) -> Optional[str]:
+    """Khu vực người chơi đang ở (chỉ có ở mô hình User mới)"""
+    return user.get("activities", {}).get("exploration", {}).get("current_area")
+
+
+class SpawnTable:
+    """
+    Chọn quái vật/boss theo cảnh giới
+
+    level_range(realm_id) -> (cấp tối thiểu, cấp tối đa hoặc None nếu không giới hạn)
+    Không có ứng viên nào thì dùng phần tử đầu tiên của danh sách (giống cách lọc cũ).
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]], level_range: Callable[[int], Tuple[int, Optional[int]]],
+                 weight_of: Callable[[Dict[str, Any]], float] = default_weight,
+                 area_of: Callable[[Dict[str, Any]], Optional[str]] = default_area,
+                 area_bonus: float = SPAWN_AREA_BONUS):
+        if not entries:
+            raise ValueError("SpawnTable cần ít nhất một quái vật")
+
+        self.entries = entries
+        self.level_range = level_range
+        self.area_bonus = area_bonus
+
+        # Xếp theo cấp (giữ thứ tự gốc với các quái vật cùng cấp)
+        self.by_level = sorted(entries, key=lambda e: e["level"])
+        self.levels = [e["level"] for e in self.by_level]
+        self.weights = [weight_of(e) for e in self.by_level]
+        self.areas = [area_of(e) for e in self.by_level]
+
+        # {(cấp tối thiểu, cấp tối đa): (vị trí đầu, vị trí cuối, bảng alias)}
+        self._buckets: Dict[Tuple[int, Optional[int]], Tuple[int, int, AliasTable]] = {}
+        # {(cấp tối thiểu, cấp tối đa, khu vực): bảng alias}
+        self._area_tables: Dict[Tuple[int, Optional[int], str], AliasTable] = {}
+        # {cảnh giới: (cấp tối thiểu, cấp tối đa)}
+        self._realm_keys: Dict[int, Tuple[int, Optional[int]]] = {}
+
+        for realm_id in range(len(REALMS)):
+            self._bucket(realm_id)
+
+    def _bucket(self, realm_id: int) -> Tuple[Tuple[int, Optional[int]], Tuple[int, int, AliasTable]]:
+        key = self._realm_keys.get(realm_id)
+        if key is None:
+            key = self._realm_keys[realm_id] = tuple(self.level_range(realm_id))
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            min_level, max_level = key
+            start = bisect_left(self.levels, min_level)
+            end = len(self.levels) if max_level is None else bisect_right(self.levels, max_level)
+            if start < end:
+                table = AliasTable(self.by_level[start:end], self.weights[start:end])
+            else:
+                table = AliasTable([self.entries[0]], [1.0])
+            bucket = self._buckets[key] = (start, end, table)
+        return key, bucket
+
+    def _table(self, realm_id: int, area: Optional[str] = None) -> AliasTable:
+        key, (start, end, table) = self._bucket(realm_id)
+        if not area or start >= end or area not in self.areas[start:end]:
+            return table
+
+        area_key = key + (area,)
+        area_table = self._area_tables.get(area_key)
+        if area_table is None:
+            weights = [w * self.area_bonus if a == area else w
+                       for w, a in zip(self.weights[start:end], self.areas[start:end])]
+            area_table = self._area_tables[area_key] = AliasTable(table.items, weights)
+        return area_table
+
+    def candidates(self, realm_id: int) -> List[Dict[str, Any]]:
+        """Các quái vật có thể gặp ở cảnh giới (theo cấp tăng dần)"""
+        return list(self._bucket(realm_id)[1][2].items)
+
+    def probabilities(self, realm_id: int, area: Optional[str] = None) -> List[Tuple[Dict[str, Any], float]]:
+        """Tỷ lệ gặp từng quái vật: [(quái vật, xác suất)]"""
+        table = self._table(realm_id, area)
+        return list(zip(table.items, table.probabilities))
+
+    def pick(self, realm_id: int, area: Optional[str] = None, rng=random) -> Dict[str, Any]:
+        """Chọn một quái vật ngẫu nhiên"""
+        return self._table(realm_id, area).sample(rng)
+
+    def pick_many(self, realm_id: int, count: int, area: Optional[str] = None, rng=random) -> List[Dict[str, Any]]:
+        """Chọn nhiều quái vật (săn quái hàng loạt)"""
+        table = self._table(realm_id, area)
+        return [table.sample(rng) for _ in range(count)]
@@ -0,0 +1,243 @@
+"""
+Boss thế giới: máu chung của nhiều người chơi
+
+Máu boss nằm trong một document MongoDB duy nhất. Để hàng trăm người chơi đánh cùng lúc không phải
+xếp hàng chờ document đó, sát thương được gom trong tiến trình theo từng lô nhỏ (WORLD_BOSS_BATCH_INTERVAL):
+mỗi lô chỉ tốn một $inc vào máu boss và một bulk_write sát thương của người chơi, mọi lệnh trong lô
+cùng chờ một kết quả. Chuyển giai đoạn và kết liễu được xác nhận bằng cập nhật có điều kiện trên server
+nên chỉ đúng một lô (kể cả khi chạy nhiều tiến trình) thông báo và chia phần thưởng.
+"""
+import asyncio
+import datetime
+import logging
+import uuid
+from bisect import bisect_left, insort
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple, Any
+
+from database.mongo_handler import (
+    apply_world_boss_damage, advance_world_boss_phase, mark_world_boss_defeated,
+    add_world_boss_damage, get_world_boss_damage
+)
+from database.models.monster_model import Boss, MonsterType, MonsterRank, ElementType
+from utils.game_data import thaw
+from config import WORLD_BOSS_BATCH_INTERVAL, WORLD_BOSS_HP_MULTIPLIER, WORLD_BOSS_PHASES, WORLD_BOSS_DAMAGE_RETRIES
+
+# Cấu hình logging
+logger = logging.getLogger("tutien-bot.world_boss")
+
+
+def build_world_boss(entry: Dict[str, Any], raid_id: int, channel_id: Optional[int] = None) -> Dict[str, Any]:
+    """Tạo document boss thế giới từ một boss trong data/bosses.json"""
+    boss = Boss(f"world_{entry['id']}", entry["name"], MonsterType.DEMON, MonsterRank.S)
+    boss.description = entry.get("description", "")
+    boss.level = entry.get("level", 1)
+
+    hp = entry["health"] * WORLD_BOSS_HP_MULTIPLIER
+    boss.stats.update({"hp": hp, "max_hp": hp, "attack": entry["attack"], "defense": entry["defense"]})
+
+    try:
+        boss.element = ElementType(entry.get("element", "none"))
+    except ValueError:
+        boss.element = ElementType.NONE
+    boss.drops = thaw(entry.get("drops", []))
+    boss.respawn_time = entry.get("respawn_time", boss.respawn_time)
+
+    for trigger in WORLD_BOSS_PHASES:
+        boss.add_phase_trigger(trigger["hp_percent"], trigger["phase"])
+    boss.phases = 1 + len(boss.phase_triggers)
+
+    document = boss.to_dict()
+    document.update({
+        "raid_id": raid_id,
+        "channel_id": channel_id,
+        "phase": 1,
+        "hits": 0,
+        "last_hit": None,
+        "spawned_at": datetime.datetime.utcnow()
+    })
+    return document
+
+
+class DamageLeaderboard:
+    """Bảng xếp hạng sát thương: {user_id: sát thương} kèm danh sách luôn được sắp xếp"""
+
+    def __init__(self, entries: Optional[List[Tuple[int, int]]] = None):
+        self.damage: Dict[int, int] = dict(entries or [])
+        self._sorted: List[Tuple[int, int]] = sorted((-damage, user_id) for user_id, damage in self.damage.items())
+        self.total = sum(self.damage.values())
+
+    def __len__(self) -> int:
+        return len(self.damage)
+
+    def add(self, user_id: int, amount: int) -> None:
+        old = self.damage.get(user_id)
+        if old is not None:
+            del self._sorted[bisect_left(self._sorted, (-old, user_id))]
+        new = (old or 0) + amount
+        self.damage[user_id] = new
+        insort(self._sorted, (-new, user_id))
+        self.total += amount
+
+    def top(self, limit: int = 10) -> List[Tuple[int, int]]:
+        """Những người gây sát thương cao nhất: [(user_id, sát thương)]"""
+        return [(user_id, -damage) for damage, user_id in self._sorted[:limit]]
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """Thứ hạng (bắt đầu từ 1), None nếu chưa gây sát thương"""
+        damage = self.damage.get(user_id)
+        if damage is None:
+            return None
+        return bisect_left(self._sorted, (-damage, user_id)) + 1
+
+    def shares(self, pool: int) -> Dict[int, int]:
+        """Chia `pool` theo tỷ lệ sát thương (làm tròn xuống, ít nhất 1 cho mỗi người)"""
+        if not self.total:
+            return {}
+        return {user_id: max(1, pool * damage // self.total) for user_id, damage in self.damage.items()}
+
+
+class RaidUpdate(NamedTuple):
+    """Kết quả của một lô sát thương"""
+    hp: int
+    max_hp: int
+    phase: int
+    new_phase: Optional[int]  # Giai đoạn vừa chuyển sang trong lô này
+    landed: bool  # Sát thương đã được tính (False nếu boss bị đánh bại trước khi lô được ghi)
+    defeated: bool  # Boss đã bị đánh bại (trong lô này hoặc trước đó)
+    last_hit: Optional[int]  # Người ra đòn kết liễu nếu lô này kết liễu boss
+
+
+class WorldBossRaid:
+    """Một trận boss thế giới đang diễn ra"""
+
+    def __init__(self, document: Dict[str, Any], leaderboard: DamageLeaderboard,
+                 on_phase: Optional[Callable[["WorldBossRaid", int], Awaitable[None]]] = None,
+                 on_defeat: Optional[Callable[["WorldBossRaid", int], Awaitable[None]]] = None,
+                 interval: float = WORLD_BOSS_BATCH_INTERVAL):
+        self.document = document
+        self.boss = Boss.from_dict(document)
+        self.raid_id = document["raid_id"]
+        self.channel_id = document.get("channel_id")
+        self.max_hp = self.boss.stats["max_hp"]
+        self.hp = max(0, self.boss.stats["hp"])
+        self.phase = document.get("phase", 1)
+        self.defeated = document.get("last_defeat") is not None
+        self.leaderboard = leaderboard
+
+        self.on_phase = on_phase
+        self.on_defeat = on_defeat
+        self.interval = interval
+
+        # Lô sát thương đang gom
+        self._pending: Dict[int, int] = {}
+        self._pending_hits = 0
+        self._last_user: Optional[int] = None
+        self._waiters: List[asyncio.Future] = []
+        self._task: Optional[asyncio.Task] = None
+
+        # Thống kê
+        self.batches = 0
+        self.hits = 0
+
+    @classmethod
+    async def load(cls, document: Dict[str, Any], **kwargs) -> "WorldBossRaid":
+        """Tạo trận từ document, nạp bảng xếp hạng sát thương từ database"""
+        return cls(document, DamageLeaderboard(await get_world_boss_damage(document["raid_id"])), **kwargs)
+
+    @property
+    def hp_percent(self) -> float:
+        return 100 * self.hp / max(1, self.max_hp)
+
+    async def hit(self, user_id: int, damage: int) -> RaidUpdate:
+        """Gây sát thương, chờ lô chứa đòn đánh này được ghi xuống database"""
+        if self.defeated:
+            return RaidUpdate(0, self.max_hp, self.phase, None, False, True, None)
+
+        self._pending[user_id] = self._pending.get(user_id, 0) + damage
+        self._pending_hits += 1
+        self._last_user = user_id
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+        return await future
+
+    async def _flush_loop(self) -> None:
+        # Chỉ một lô được ghi tại một thời điểm, đòn đánh đến trong lúc ghi vào lô kế tiếp
+        while self._pending:
+            await asyncio.sleep(self.interval)
+
+            pending, hits, last_user, waiters = self._pending, self._pending_hits, self._last_user, self._waiters
+            self._pending, self._pending_hits, self._waiters = {}, 0, []
+
+            try:
+                update = await self._apply(pending, hits, last_user)
+            except Exception as e:
+                logger.error(f"Lỗi khi ghi sát thương boss thế giới {self.raid_id}: {e}")
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+                continue
+
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(update)
+
+    async def _apply(self, pending: Dict[int, int], hits: int, last_user: int) -> RaidUpdate:
+        after = await apply_world_boss_damage(self.raid_id, sum(pending.values()), hits)
+        if after is None:
+            # Boss đã bị đánh bại (có thể bởi tiến trình khác)
+            self.defeated = True
+            self.hp = 0
+            return RaidUpdate(0, self.max_hp, self.phase, None, False, True, None)
+
+        # Máu boss đã bị trừ: sát thương người chơi phải được ghi nhận, lỗi ở đây không trả về cho người chơi
+        await self._record_damage(pending)
+        for user_id, damage in pending.items():
+            self.leaderboard.add(user_id, damage)
+        self.batches += 1
+        self.hits += hits
+
+        raw_hp = after["stats"]["hp"]
+        self.hp = max(0, raw_hp)
+
+        # Chuyển giai đoạn: chỉ lô đầu tiên vượt ngưỡng được xác nhận
+        new_phase = None
+        phase = self.boss.get_current_phase(int(self.hp_percent))
+        if phase > after.get("phase", 1) and await advance_world_boss_phase(self.raid_id, phase):
+            new_phase = phase
+        self.phase = max(self.phase, phase)
+
+        # Kết liễu: chỉ một lô được xác nhận và chia phần thưởng
+        killed = False
+        if raw_hp <= 0:
+            self.defeated = True
+            killed = await mark_world_boss_defeated(self.raid_id, last_user, datetime.datetime.utcnow())
+
+        if new_phase is not None and self.on_phase is not None:
+            asyncio.create_task(self.on_phase(self, new_phase))
+        if killed and self.on_defeat is not None:
+            asyncio.create_task(self.on_defeat(self, last_user))
+
+        return RaidUpdate(self.hp, self.max_hp, self.phase, new_phase, True, self.defeated,
+                          last_user if killed else None)
+
+    async def _record_damage(self, pending: Dict[int, int]) -> None:
+        """Ghi sát thương của lô (thử lại với cùng mã lô nên không bị cộng trùng)"""
+        batch_id = uuid.uuid4().hex
+        for attempt in range(WORLD_BOSS_DAMAGE_RETRIES + 1):
+            try:
+                await add_world_boss_damage(self.raid_id, pending, batch_id)
+                return
+            except Exception as e:
+                if attempt == WORLD_BOSS_DAMAGE_RETRIES:
+                    logger.critical(f"Không ghi được sát thương lô {batch_id} của boss thế giới {self.raid_id}: "
+                                    f"{pending} ({e})")
+                    return
+                logger.warning(f"Lỗi khi ghi sát thương boss thế giới {self.raid_id}, thử lại: {e}")
+                await asyncio.sleep(self.interval * (attempt + 1))
+
+    async def final_leaderboard(self) -> DamageLeaderboard:
+        """Bảng xếp hạng từ database (gồm sát thương của mọi tiến trình), dùng để chia phần thưởng"""
+        return DamageLeaderboard(await get_world_boss_damage(self.raid_id))